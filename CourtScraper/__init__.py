@@ -0,0 +1,72 @@
+"""CourtScraper - crawls, collects, processes and exports UK court listings from the Court and Tribunal Finder
+
+    python -m CourtScraper --help
+
+or as a library, e.g.
+
+    from CourtScraper import get_court, MappedCourtQuery
+
+Importing the package is cheap: the names below are only imported from their modules when first used, and the heavy
+dependencies (requests, BeautifulSoup, pyarrow, NumPy) wait until a page is fetched or parsed, or an
+export that needs them is written.
+"""
+
+import sys
+import types
+from importlib import import_module
+
+#   Public name -> the module defining it
+EXPORTS = {
+    'AdaptiveConcurrency': 'adaptive',
+    'get_court': 'api',
+    'CourtLookup': 'api',
+    'ArchiveReader': 'archive',
+    'ArchiveWriter': 'archive',
+    'ResponseCache': 'cache',
+    'CourtIndex': 'discovery',
+    'Fetcher': 'fetch',
+    'HostRateLimiter': 'fetch',
+    'CourtLocator': 'geo',
+    'PostcodeTable': 'geo',
+    'Address': 'model',
+    'Contact': 'model',
+    'CourtRecord': 'model',
+    'CourtQuery': 'query',
+    'MappedCourtQuery': 'query',
+    'load_rows': 'query',
+    'crawl': 'scraper',
+    'discover_courts': 'scraper',
+    'extract_court_details': 'scraper',
+    'standardise_record': 'scraper',
+    'SINKS': 'sinks',
+    'open_sink': 'sinks',
+    }
+
+__all__ = sorted(EXPORTS)
+
+def __getattr__(name):
+    """Imports a public name's module the first time the name is used (PEP 562)"""
+
+    if name not in EXPORTS:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    value = getattr(import_module('.' + EXPORTS[name], __name__), name)
+    setattr(sys.modules[__name__], name, value)
+
+    return value
+
+class LazyPackage(types.ModuleType):
+    """The package as a module with a __getattr__ method, for Pythons older than 3.7, which ignore a module's __getattr__"""
+
+    def __getattr__(self, name):
+        return self.load(name)
+
+if sys.version_info < (3, 7):
+    package = LazyPackage(__name__)
+    package.__dict__.update(globals())
+    package.load = __getattr__
+
+    #   Python 2 clears a module's globals once nothing refers to it, and the functions above still use this one's
+    LazyPackage.module = sys.modules[__name__]
+
+    sys.modules[__name__] = package
@@ -0,0 +1,7 @@
+"""__main__.py - python -m CourtScraper; see cli.py"""
+
+from CourtScraper.cli import main
+
+#   Guarded, as worker processes started with spawn (Windows) import this module again
+if __name__ == "__main__":
+    main()
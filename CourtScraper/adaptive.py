@@ -0,0 +1,151 @@
+"""adaptive.py - an AIMD controller for how many requests the crawl keeps in flight, steered by the server's latency and errors"""
+
+import time
+import threading
+from collections import OrderedDict, deque
+
+#   How a request ended, as far as the controller is concerned
+OK, THROTTLED, FAILED = 'ok', 'throttled', 'failed'
+
+def request_outcome(status, retry_after=None):
+    """THROTTLED for a 429, or a 5xx asking for a wait (`retry_after` seconds); FAILED for another 5xx; OK for anything else
+
+    A 404 says nothing about the server's load, nor does a Retry-After of 0.
+    """
+
+    if status == 429 or (status >= 500 and retry_after):
+        return THROTTLED
+
+    return FAILED if status >= 500 else OK
+
+class AdaptiveConcurrency(object):
+    """A limit on requests in flight that grows while the server keeps up and halves when it struggles
+
+    Requests acquire() a slot before they are sent and release() it with how they went. A throttled request (a 429, or a
+    Retry-After), or a single request slower than `spike` times `latency_target`, cuts the limit by `decrease` at once.
+    Every `window` requests the controller looks at their error rate (5xx and connection errors) and p95 latency: over
+    `error_target` or `latency_target`, the limit is cut; under both, and with the limit actually in use, it grows by
+    one (doubling at first, until the first cut, as TCP's slow start does), so the odd failure does not stop it
+    growing. Only one cut is made per round trip: requests sent before the last cut neither cut the limit again nor
+    count towards the next window, as they show the load the old limit put on the server, not the new one.
+
+    Thread-safe. The limit never leaves `minimum`..`maximum`, and every change is kept for the run's metrics.
+    """
+
+    def __init__(self, initial=2, minimum=1, maximum=16, latency_target=1.0, error_target=0.05, window=20, decrease=0.5, spike=3.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(maximum, initial))
+        self.latency_target = latency_target
+        self.error_target = error_target
+        self.window = window
+        self.decrease = decrease
+        self.spike = spike
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.slow_start = True
+        self.started = time.time()
+        self.last_cut = 0.0
+
+        #   The current window: latencies, errors, and whether the limit held any request back
+        self.latencies = []
+        self.errors = 0
+        self.saturated = False
+
+        self.peak = self.limit
+        self.decisions = OrderedDict((decision, 0) for decision in ('increase', 'throttled', 'latency_spike', 'latency', 'errors'))
+        #   [(seconds into the run, new limit, decision)], the latest changes only
+        self.changes = deque(maxlen=100)
+
+    def acquire(self):
+        """Waits for a free slot; returns the token to release() it with"""
+
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.saturated = True
+                self.condition.wait()
+
+            self.in_flight += 1
+
+            if self.in_flight >= self.limit:
+                self.saturated = True
+
+            return time.time()
+
+    def release(self, token, outcome=OK):
+        """Frees the slot taken at `token`, recording how the request went: OK, THROTTLED or FAILED"""
+
+        now = time.time()
+        latency = now - token
+
+        with self.condition:
+            self.in_flight -= 1
+
+            #   A request sent before the last cut would punish the new limit for the old one's load
+            if token < self.last_cut:
+                pass
+            elif outcome == THROTTLED:
+                self.cut('throttled', now)
+            elif latency > self.spike * self.latency_target:
+                self.cut('latency_spike', now)
+            else:
+                self.latencies.append(latency)
+                self.errors += outcome == FAILED
+
+                if len(self.latencies) >= self.window:
+                    self.review(now)
+
+            self.condition.notify_all()
+
+    def review(self, now):
+        """Decides on a full window; callers must hold the condition"""
+
+        latencies = sorted(self.latencies)
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+
+        if float(self.errors) / len(latencies) > self.error_target:
+            self.cut('errors', now)
+        elif p95 > self.latency_target:
+            self.cut('latency', now)
+        elif self.saturated and self.limit < self.maximum:
+            self.change(min(self.maximum, self.limit * 2 if self.slow_start else self.limit + 1), 'increase', now)
+        else:
+            self.reset_window()
+
+    def cut(self, decision, now):
+        self.slow_start = False
+        self.last_cut = now
+        self.change(max(self.minimum, int(self.limit * self.decrease)), decision, now)
+
+    def change(self, limit, decision, now):
+        self.limit = limit
+        self.peak = max(self.peak, limit)
+        self.decisions[decision] += 1
+        self.changes.append((now - self.started, limit, decision))
+        self.reset_window()
+
+    def reset_window(self):
+        self.latencies = []
+        self.errors = 0
+        self.saturated = False
+
+    def summary(self):
+        """The controller's state and decisions as a JSON-ready dict"""
+
+        with self.condition:
+            return OrderedDict([
+                ('limit', self.limit), ('peak', self.peak), ('minimum', self.minimum), ('maximum', self.maximum),
+                ('latency_target', self.latency_target), ('error_target', self.error_target),
+                ('decisions', OrderedDict(self.decisions)),
+                ('changes', [OrderedDict([('seconds', seconds), ('limit', limit), ('decision', decision)]) for seconds, limit, decision in self.changes]),
+                ])
+
+    def report(self):
+        """One line for the end-of-run report"""
+
+        summary = self.summary()
+        cuts = ", ".join("{} x{}".format(decision, count) for decision, count in summary['decisions'].items() if decision != 'increase' and count)
+
+        return "concurrency: limit {} (peak {}, range {}-{})  increases: {}  cuts: {}".format(
+            summary['limit'], summary['peak'], self.minimum, self.maximum, summary['decisions']['increase'], cuts or "none")
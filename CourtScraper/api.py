@@ -0,0 +1,222 @@
+"""api.py - one court's current details on demand, for services that need a single court rather than a whole crawl
+
+    from CourtScraper import get_court
+    row = get_court("Aberystwyth Justice Centre")       # or by slug: get_court("aberystwyth-justice-centre")
+
+or from the command line: python -m CourtScraper court "Aberystwyth Justice Centre"
+
+A name or slug is resolved to the court's page through the court index a crawl keeps (courts.json) or, failing that,
+the A-Z index pages, read once and kept for `index_ttl` seconds. Only that court's page is then fetched, parsed and
+standardised. Rows are kept in an LRU of the `max_size` most recently asked for courts for `ttl` seconds, so hot
+courts are answered from memory, and callers asking for the same court at the same time share one fetch.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from . import parsing
+from . import scraper
+from .fetch import Fetcher, HostRateLimiter
+from .discovery import COURT_PATH, CourtIndex, canonical_url, sitemap_listing
+from .config import BASE, BUFF, COURT_INDEX
+
+#   A name or slug missing from the index may be a court added since; look again, but no more often than this (seconds)
+REFRESH_AFTER = 300
+
+def lookup_key(name_or_slug):
+    """Names and slugs are matched case- and spacing-insensitively"""
+
+    return u" ".join(name_or_slug.split()).lower()
+
+def copy_row(row):
+    """A row callers can change without changing the cached one"""
+
+    return dict((field, list(value) if isinstance(value, list) else value) for field, value in row.items())
+
+class CourtLookup(object):
+    """Courts' standardised rows by name or slug, fetched on first use and cached; safe to share between threads
+
+    `fetcher` defaults to one limited to 5 requests a second, as a crawl is. `court_index` is the path of a crawl's
+    court index, read in preference to the A-Z pages while it is younger than `index_ttl`; `sitemap`, if given, is read
+    instead of the A-Z pages.
+    """
+
+    def __init__(self, base=BASE, buff=BUFF, fetcher=None, court_index=COURT_INDEX, sitemap=None, ttl=3600, max_size=256, index_ttl=86400, workers=8):
+        self.base = base
+        self.buff = buff
+        self.fetcher = fetcher or Fetcher(rate_limiter=HostRateLimiter(5, 2))
+        self.court_index = court_index
+        self.sitemap = sitemap
+        self.ttl = ttl
+        self.max_size = max_size
+        self.index_ttl = index_ttl
+        self.workers = workers
+
+        #   (loaded at, {lookup key: (url, court name)}), swapped whole so resolve() can read it without a lock
+        self.index = (None, {})
+        self.index_lock = threading.Lock()
+
+        #   canonical URL -> (expires at, row), least recently used first
+        self.rows = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def listing(self):
+        """[(url, court name)] of every court: from the court index file while it is fresh, else from the site"""
+
+        if self.court_index and os.path.exists(self.court_index) and time.time() - os.path.getmtime(self.court_index) < self.index_ttl:
+            entries = CourtIndex.load(self.court_index).entries
+
+            if entries:
+                return [(entry['url'], entry.get('court')) for entry in entries.values() if 'removed' not in entry]
+
+        if self.sitemap:
+            return [(url, None) for letter, courts in sitemap_listing(self.fetcher.get, self.sitemap) for name, url in courts]
+
+        def list_letter(i):
+            page = parsing.parse_index_page(self.fetcher.get(self.base + self.buff + chr(i)))
+
+            return [(url, name) for name, url in scraper.court_links(page, self.base).items()]
+
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        try:
+            return [court for courts in executor.map(list_letter, range(65, 91)) for court in courts]
+        finally:
+            executor.shutdown(wait=False)
+
+    def load_index(self, older_than):
+        """Reloads the index unless another thread already has since `older_than`"""
+
+        with self.index_lock:
+            loaded, courts = self.index
+
+            if loaded is not None and loaded > older_than:
+                return
+
+            courts = {}
+
+            for url, name in self.listing():
+                found = COURT_PATH.search(url)
+
+                if found:
+                    courts[lookup_key(found.group(1))] = (url, name)
+
+                if name:
+                    courts[lookup_key(name)] = (url, name)
+
+            self.index = (time.time(), courts)
+
+    def resolve(self, name_or_slug):
+        """(url, court name) of a court, by its name or slug; raises KeyError for a court the site does not list"""
+
+        key = lookup_key(name_or_slug)
+        now = time.time()
+        loaded, courts = self.index
+
+        if loaded is None or now - loaded >= self.index_ttl:
+            self.load_index(now - self.index_ttl)
+            loaded, courts = self.index
+
+        if key not in courts and now - loaded >= REFRESH_AFTER:
+            self.load_index(now - REFRESH_AFTER)
+            loaded, courts = self.index
+
+        if key not in courts:
+            raise KeyError(name_or_slug)
+
+        return courts[key]
+
+    def fetch(self, url, court_name=None):
+        html = self.fetcher.get(url)
+
+        return scraper.standardise_record(scraper.extract_court_details(url, html, court_name))
+
+    def get_court(self, name_or_slug):
+        """The standardised row of a court, by its name or slug, as written by the crawl's sinks
+
+        Raises KeyError for a court the site does not list, and whatever the fetch raised if the page could not be had;
+        failures are not cached.
+        """
+
+        url, court_name = self.resolve(name_or_slug)
+        key = canonical_url(url)
+
+        with self.lock:
+            cached = self.rows.get(key)
+
+            if cached and cached[0] > time.time():
+                self.hits += 1
+                self.rows[key] = self.rows.pop(key)
+                return copy_row(cached[1])
+
+            future = self.in_flight.get(key)
+            leader = future is None
+
+            if leader:
+                self.misses += 1
+                future = self.in_flight[key] = Future()
+            else:
+                self.shared += 1
+
+        if not leader:
+            return copy_row(future.result())
+
+        try:
+            row = self.fetch(url, court_name)
+        except BaseException as e:
+            with self.lock:
+                del self.in_flight[key]
+
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            self.rows.pop(key, None)
+            self.rows[key] = (time.time() + self.ttl, row)
+
+            while len(self.rows) > self.max_size:
+                self.rows.popitem(last=False)
+
+            del self.in_flight[key]
+
+        future.set_result(row)
+
+        return copy_row(row)
+
+    def invalidate(self, name_or_slug=None):
+        """Drops one court's cached row, or every court's if none is named, so the next lookup fetches it afresh"""
+
+        key = canonical_url(self.resolve(name_or_slug)[0]) if name_or_slug is not None else None
+
+        with self.lock:
+            if key is None:
+                self.rows.clear()
+            else:
+                self.rows.pop(key, None)
+
+    def stats(self):
+        with self.lock:
+            return {'cached': len(self.rows), 'hits': self.hits, 'misses': self.misses, 'shared': self.shared}
+
+#   Shared by the module-level get_court(), created on its first call
+LOOKUP = None
+LOOKUP_LOCK = threading.Lock()
+
+def get_court(name_or_slug):
+    """CourtLookup.get_court() on a CourtLookup with the default settings, shared by every caller in the process"""
+
+    global LOOKUP
+
+    if LOOKUP is None:
+        with LOOKUP_LOCK:
+            if LOOKUP is None:
+                LOOKUP = CourtLookup()
+
+    return LOOKUP.get_court(name_or_slug)
@@ -0,0 +1,286 @@
+"""archive.py - every page a crawl fetched, kept as compressed WARC records, so extraction can be re-run without the network
+
+    python -m CourtScraper --archive pages/                      # archive every page the crawl fetches
+    python -m CourtScraper --from-archive pages/ [--processes 0]  # re-run parsing from the archive alone
+    python -m CourtScraper archive pages/ [URL]                  # list the archive, or print one archived page
+
+An archive is a directory of append-only segments, segment-00001.warc.gz and so on, next to an index.tsv of
+URL -> (segment, offset, length, timestamp). Each page is a WARC/1.0 "resource" record compressed as a gzip member of
+its own, so segments can also be read by ordinary WARC tools, and one page can be decompressed on its own straight from
+a memory map of its segment.
+"""
+
+import os
+import re
+import mmap
+import time
+import uuid
+import zlib
+import base64
+import hashlib
+import threading
+
+INDEX = 'index.tsv'
+SEGMENT = re.compile(r"^segment-(\d+)\.warc\.gz$")
+
+#   Characters that would break an index line or a record's headers, and their escapes (as a URL would percent-encode them)
+URL_ESCAPES = ((u"\t", u"%09"), (u"\n", u"%0A"), (u"\r", u"%0D"))
+
+def archived_url(url):
+    """`url` as the archive keys it: tabs and line breaks percent-encoded"""
+
+    for character, escape in URL_ESCAPES:
+        url = url.replace(character, escape)
+
+    return url
+
+def segment_name(number):
+    return "segment-{:05d}.warc.gz".format(number)
+
+def warc_record(url, body, timestamp):
+    """A page as a WARC/1.0 resource record, i.e. its body without HTTP headers"""
+
+    block = body.encode('utf-8')
+    headers = [
+        ('WARC-Type', 'resource'),
+        ('WARC-Record-ID', '<urn:uuid:{}>'.format(uuid.uuid4())),
+        ('WARC-Date', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))),
+        ('WARC-Target-URI', url),
+        ('WARC-Block-Digest', 'sha1:' + base64.b32encode(hashlib.sha1(block).digest()).decode('ascii')),
+        ('Content-Type', 'text/html; charset=utf-8'),
+        ('Content-Length', str(len(block))),
+        ]
+
+    head = u"WARC/1.0\r\n" + u"".join(u"{}: {}\r\n".format(name, value) for name, value in headers) + u"\r\n"
+
+    return head.encode('utf-8') + block + b"\r\n\r\n"
+
+def gzip_member(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    return compressor.compress(data) + compressor.flush()
+
+def record_body(member):
+    """The page held in one compressed record"""
+
+    record = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(member)
+    head, sep, block = record.partition(b"\r\n\r\n")
+    length = re.search(br"\r\nContent-Length: (\d+)", head)
+
+    return block[:int(length.group(1))].decode('utf-8')
+
+def read_index(path):
+    """{url: (segment, offset, length, timestamp)} of the latest record of every URL in an archive's index"""
+
+    entries = {}
+    index = os.path.join(path, INDEX)
+
+    if not os.path.exists(index):
+        return entries
+
+    with open(index, 'rb') as f:
+        for line in f:
+            fields = line.decode('utf-8').rstrip(u"\n").split(u"\t")
+
+            #   A line cut short by a crash is left out; its record may be incomplete too
+            if len(fields) != 5 or not line.endswith(b"\n"):
+                continue
+
+            url, segment, offset, length, timestamp = fields
+            entries[url] = (segment, int(offset), int(length), float(timestamp))
+
+    return entries
+
+def open_index(path):
+    """Opens an archive's index for appending, first cutting off a line a crash left without its newline
+
+    Appended to, such a line would swallow the next run's first line, and read_index() would drop both.
+    """
+
+    index = open(path, 'ab+')
+    index.seek(0, os.SEEK_END)
+    size = index.tell()
+
+    if size:
+        start = max(0, size - 64 * 1024)
+        index.seek(start)
+        tail = index.read()
+
+        if not tail.endswith(b"\n"):
+            end = tail.rfind(b"\n")
+
+            if end >= 0 or start == 0:
+                index.truncate(start + end + 1)
+            else:
+                index.write(b"\n")
+
+    return index
+
+
+
+##############
+### WRITER ###
+##############
+
+class ArchiveWriter(object):
+    """Appends pages to an archive; safe to share between the crawl's threads
+
+    Each writer starts a new segment, and moves on to another once it holds `segment_bytes` of compressed records, so
+    a segment is only ever written by one writer and never rewritten. A page's record is flushed to its segment before
+    its index line is written, so the index never points at a record that is not all there.
+
+    A page whose latest record already holds the same body is not added again, so re-crawling from a warm cache, or
+    getting 304s for most pages, does not grow the archive by a copy of every page.
+    """
+
+    def __init__(self, path, segment_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self.lock = threading.Lock()
+        self.count = 0
+        self.unchanged = 0
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        numbers = [int(m.group(1)) for m in (SEGMENT.match(name) for name in os.listdir(path)) if m]
+        self.number = max(numbers) if numbers else 0
+        self.segment = None
+        self.index = open_index(os.path.join(path, INDEX))
+
+        #   Records from earlier runs, and the sha1 of the latest body of each URL, read from them as they are needed
+        self.earlier = read_index(path)
+        self.digests = {}
+
+    def next_segment(self):
+        if self.segment:
+            self.segment.close()
+
+        self.number += 1
+        self.name = segment_name(self.number)
+        self.segment = open(os.path.join(self.path, self.name), 'ab')
+        self.offset = 0
+
+    def latest_digest(self, url):
+        """sha1 of the latest archived body of `url`, or None; callers must hold the lock"""
+
+        if url not in self.digests and url in self.earlier:
+            segment, offset, length, timestamp = self.earlier[url]
+
+            with open(os.path.join(self.path, segment), 'rb') as f:
+                f.seek(offset)
+                self.digests[url] = hashlib.sha1(record_body(f.read(length)).encode('utf-8')).digest()
+
+        return self.digests.get(url)
+
+    def add(self, url, body, timestamp=None):
+        """Archives `body` as the page at `url`; returns False, writing nothing, if the archive already holds it"""
+
+        url = archived_url(url)
+        timestamp = timestamp or time.time()
+        digest = hashlib.sha1(body.encode('utf-8')).digest()
+
+        with self.lock:
+            if self.latest_digest(url) == digest:
+                self.unchanged += 1
+                return False
+
+        member = gzip_member(warc_record(url, body, timestamp))
+
+        with self.lock:
+            #   Another thread may have archived the same page while this one compressed it
+            if self.latest_digest(url) == digest:
+                self.unchanged += 1
+                return False
+
+            if self.segment is None or self.offset >= self.segment_bytes:
+                self.next_segment()
+
+            self.segment.write(member)
+            self.segment.flush()
+
+            self.index.write(u"{}\t{}\t{}\t{}\t{:.3f}\n".format(url, self.name, self.offset, len(member), timestamp).encode('utf-8'))
+            self.index.flush()
+
+            self.offset += len(member)
+            self.count += 1
+            self.digests[url] = digest
+
+        return True
+
+    def close(self):
+        with self.lock:
+            if self.segment:
+                self.segment.close()
+
+            self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+
+##############
+### READER ###
+##############
+
+class ArchiveReader(object):
+    """Pages read back from an archive: the latest record of each URL, through a read-only memory map of its segment"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = read_index(path)
+        self.maps = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, url):
+        return archived_url(url) in self.entries
+
+    def segment_map(self, segment):
+        with self.lock:
+            if segment not in self.maps:
+                with open(os.path.join(self.path, segment), 'rb') as f:
+                    self.maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            return self.maps[segment]
+
+    def get(self, url):
+        """The archived body of `url`; raises KeyError if it was never archived"""
+
+        segment, offset, length, timestamp = self.entries[archived_url(url)]
+
+        return record_body(self.segment_map(segment)[offset:offset + length])
+
+    def timestamp(self, url):
+        return self.entries[archived_url(url)][3]
+
+    def urls(self):
+        """Archived URLs in the order their records lie on disk, so reading them in turn reads each segment front to back"""
+
+        return sorted(self.entries, key=lambda url: self.entries[url][:2])
+
+    def pages(self, pattern=None):
+        """Yields (url, body) for every archived URL (matching the regex `pattern`, if given), in urls() order"""
+
+        for url in self.urls():
+            if pattern is None or pattern.search(url):
+                yield url, self.get(url)
+
+    def close(self):
+        with self.lock:
+            for segment_map in self.maps.values():
+                segment_map.close()
+
+            self.maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,105 @@
+"""cache.py - a persistent, compressed on-disk cache of HTTP responses, keyed by URL, used by fetch.Fetcher"""
+
+import time
+import zlib
+import sqlite3
+import threading
+from collections import namedtuple
+
+#   body is the decoded page text; etag / last_modified are the validators the server sent with it (either may be None)
+CachedResponse = namedtuple('CachedResponse', ['url', 'body', 'etag', 'last_modified', 'fetched_at'])
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a page was never cached"""
+
+class ResponseCache(object):
+    """SQLite-backed response cache
+
+    Bodies are stored zlib-compressed next to the ETag / Last-Modified validators they came with, so a stale page can be
+    revalidated with a conditional request instead of downloaded again. Entries younger than `ttl` seconds are served
+    without asking the server at all. Once the stored bodies grow past `max_bytes`, the least recently used entries are
+    evicted.
+    """
+
+    def __init__(self, path, ttl=0, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+            "fetched_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self.db.commit()
+
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def lookup(self, url):
+        """Returns the CachedResponse for `url`, or None"""
+
+        with self.lock:
+            row = self.db.execute("SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?", (url,)).fetchone()
+
+            if row is None:
+                return None
+
+            self.db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self.db.commit()
+
+        body, etag, last_modified, fetched_at = row
+
+        return CachedResponse(url, zlib.decompress(bytes(body)).decode('utf-8'), etag, last_modified, fetched_at)
+
+    def is_fresh(self, entry):
+        return time.time() - entry.fetched_at < self.ttl
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Saves (or replaces) the response for `url`, then evicts old entries if the cache has grown too big"""
+
+        blob = zlib.compress(body.encode('utf-8'), 6)
+        now = time.time()
+
+        with self.lock:
+            old = self.db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (url, body, etag, last_modified, fetched_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, sqlite3.Binary(blob), etag, last_modified, now, now, len(blob))
+                )
+            self.total_bytes += len(blob) - (old[0] if old else 0)
+            self.evict()
+            self.db.commit()
+
+    def touch(self, url):
+        """Marks the entry for `url` as freshly validated, e.g. after the server answered 304 Not Modified"""
+
+        now = time.time()
+
+        with self.lock:
+            self.db.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self.db.commit()
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits in max_bytes; callers must hold the lock"""
+
+        while self.total_bytes > self.max_bytes:
+            victims = self.db.execute("SELECT url, size FROM responses ORDER BY accessed_at LIMIT 64").fetchall()
+
+            if not victims:
+                break
+
+            for url, size in victims:
+                self.db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self.total_bytes -= size
+
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,105 @@
+"""checkpoint.py - a durable journal of crawl progress, so an interrupted crawl can resume without refetching finished pages"""
+
+import os
+import json
+import time
+from collections import OrderedDict
+
+class CheckpointMismatch(Exception):
+    """Raised when resuming from a checkpoint that was written by a crawl of a different site"""
+
+class Checkpoint(object):
+    """Append-only JSON Lines journal of a crawl in progress
+
+    The first line describes the crawl; after it, one line per finished court (its pipeline item: letter, url, row...)
+    and one per letter whose courts have all been written. Every line is flushed and fsync'ed before the crawl moves on,
+    so after a crash the journal holds everything that was finished, and at most the line being written is lost.
+
+    That is one fsync per court: next to downloading the page it is little, but on slow disks it can be felt, and a
+    crawl that will never be resumed can go without the journal (--no-checkpoint).
+    """
+
+    #   The pipeline item keys worth keeping: enough to write the court's row again and keep the manifest in step
+    ITEM_KEYS = ('letter', 'court', 'url', 'row', 'digest', 'unchanged')
+
+    def __init__(self, path):
+        self.path = path
+        self.base = None
+        self.letters = set()
+        self.courts = OrderedDict()
+        self.file = None
+
+    @classmethod
+    def load(cls, path):
+        """Reads back the journal at `path`; an empty Checkpoint if there is none"""
+
+        checkpoint = cls(path)
+
+        if not os.path.exists(path):
+            return checkpoint
+
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line.decode('utf-8'))
+                except ValueError:
+                    #   A line cut short by the crash; everything before it is intact
+                    break
+
+                if 'base' in entry:
+                    checkpoint.base = entry['base']
+                elif 'letter_done' in entry:
+                    checkpoint.letters.add(entry['letter_done'])
+                else:
+                    checkpoint.courts[entry['url']] = entry
+
+        return checkpoint
+
+    def start(self, base, resume=False):
+        """Opens the journal for writing: appending to it when resuming, else starting it afresh"""
+
+        if resume and self.base not in (None, base):
+            raise CheckpointMismatch("{} is a checkpoint for {}, not {}".format(self.path, self.base, base))
+
+        if resume and self.base is not None:
+            self.file = open(self.path, 'ab')
+        else:
+            self.letters, self.courts = set(), OrderedDict()
+            self.file = open(self.path, 'wb')
+            self.write({'base': base, 'started': time.time()})
+
+    def write(self, entry):
+        self.file.write((json.dumps(entry, sort_keys=True) + "\n").encode('utf-8'))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def record_court(self, item):
+        entry = {key : item[key] for key in self.ITEM_KEYS if key in item}
+        self.courts[item['url']] = entry
+        self.write(entry)
+
+    def record_letter(self, letter):
+        self.letters.add(letter)
+        self.write({'letter_done': letter})
+
+    def finished_courts(self, letter):
+        """Items for the courts already finished under `letter`, in the order they were written"""
+
+        return [dict(entry, resumed=True) for entry in self.courts.values() if entry['letter'] == letter]
+
+    def resumed_item(self, url):
+        """The finished item for `url`, or None"""
+
+        entry = self.courts.get(url)
+
+        return dict(entry, resumed=True) if entry else None
+
+    def finish(self):
+        """The crawl completed and its output is committed: the journal is no longer needed"""
+
+        self.file.close()
+        os.remove(self.path)
+
+    def close(self):
+        if self.file:
+            self.file.close()
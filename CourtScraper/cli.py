@@ -0,0 +1,457 @@
+"""cli.py - the command line, run as python -m CourtScraper COMMAND
+
+    python -m CourtScraper crawl --output dictwrite.csv courts.idx      # crawl is the default: python -m CourtScraper --output ...
+    python -m CourtScraper export dictwrite.jsonl --output courts.parquet courts.snap
+    python -m CourtScraper query build dictwrite.jsonl courts.idx
+    python -m CourtScraper query find courts.idx outward_code SY23
+    python -m CourtScraper snapshot take dictwrite.jsonl courts.snap
+    python -m CourtScraper snapshot diff yesterday.snap today.snap [--output delta.jsonl]
+    python -m CourtScraper nearest ONSPD.csv dictwrite.jsonl "SY23 1AS" [--count 5] [--type crown]
+    python -m CourtScraper archive pages/ [URL]
+    python -m CourtScraper court "Aberystwyth Justice Centre"
+
+Each command imports the modules it runs when it runs, so the offline ones (export, query, snapshot) start without
+the HTTP client or the HTML parser.
+"""
+
+import sys
+import json
+import argparse
+from . import config
+
+def text_argument(value):
+    """Command line arguments as unicode: Python 2 hands them over as bytes"""
+
+    return value if sys.version_info[0] > 2 else value.decode(sys.stdin.encoding or 'utf-8')
+
+def write_json_line(out, row):
+    out.write((json.dumps(row, sort_keys=True, ensure_ascii=False) + u"\n").encode('utf-8'))
+
+def stdout_bytes():
+    return getattr(sys.stdout, 'buffer', sys.stdout)
+
+
+
+#############
+### CRAWL ###
+#############
+
+def crawl_arguments(parser):
+    from .sinks import SINKS
+    from .parsing import BACKENDS
+    from .metrics import STAGES, PROFILERS
+
+    parser.add_argument('--base-url', default=config.BASE, help='site to crawl (default: {})'.format(config.BASE))
+    parser.add_argument('--index-path', default=config.BUFF, help='path of the A-Z index pages under --base-url (default: {})'.format(config.BUFF))
+    parser.add_argument('--workers', type=int, default=8, help='number of court pages fetched in parallel (default: 8)')
+    parser.add_argument('--rate', type=float, default=5.0, help='maximum requests per second to each host; 0 for no limit, e.g. with --adaptive (default: 5)')
+    parser.add_argument('--burst', type=int, default=2, help='requests allowed back-to-back before --rate applies (default: 2)')
+    parser.add_argument('--adaptive', action='store_true', help='vary the requests in flight between 1 and --workers with the server\'s latency and errors, halving on 429s, slow responses and runs of 5xx or connection errors')
+    parser.add_argument('--latency-target', type=float, default=1.0, help='with --adaptive, p95 seconds per request above which fewer requests are sent at once (default: 1)')
+    parser.add_argument('--error-target', type=float, default=0.05, help='with --adaptive, share of 5xx responses and connection errors above which fewer requests are sent at once (default: 0.05)')
+    parser.add_argument('--timeout', type=float, default=30, help='seconds to wait for a server response (default: 30)')
+    parser.add_argument('--retries', type=int, default=3, help='times to retry a page after a connection error, timeout, 429 or 5xx (default: 3)')
+    parser.add_argument('--backoff', type=float, default=0.5, help='base delay in seconds for exponential backoff between retries (default: 0.5)')
+    parser.add_argument('--cache', default=config.CACHE, help='on-disk response cache (default: {})'.format(config.CACHE))
+    parser.add_argument('--no-cache', action='store_true', help='always download every page and keep nothing on disk')
+    parser.add_argument('--cache-ttl', type=float, default=0, help='seconds a cached page is used without revalidating it with the server (default: 0, always revalidate)')
+    parser.add_argument('--cache-size', type=int, default=256, help='megabytes of compressed pages to keep before evicting the least recently used (default: 256)')
+    parser.add_argument('--offline', action='store_true', help='never touch the network; parse and export purely from the cache')
+    parser.add_argument('--parser', default='auto', choices=('auto',) + BACKENDS, help='HTML parser backend; auto picks lxml when it is installed (default: auto)')
+    parser.add_argument('--output', nargs='+', default=[config.OUTPUT], metavar='PATH', help='files to write, in the format given by each extension: {} (default: {})'.format(', '.join('.' + f for f in sorted(SINKS)), config.OUTPUT))
+    parser.add_argument('--batch-size', type=int, default=1000, help='rows buffered per write, i.e. per Parquet row group (default: 1000)')
+    parser.add_argument('--incremental', action='store_true', help='only re-parse courts whose pages changed since the last incremental run')
+    parser.add_argument('--manifest', default=config.MANIFEST, help='where --incremental remembers each court page and its row (default: {})'.format(config.MANIFEST))
+    parser.add_argument('--from-html', nargs='+', metavar='PATH', help='parse court pages saved to disk (files, or directories of .html files) instead of crawling')
+    parser.add_argument('--checkpoint', default=config.CHECKPOINT, help='journal of finished courts, kept until the crawl completes (default: {})'.format(config.CHECKPOINT))
+    parser.add_argument('--no-checkpoint', action='store_true', help='keep no journal, saving an fsync per court; an interrupted crawl then starts over')
+    parser.add_argument('--resume', action='store_true', help='carry on from where an interrupted crawl stopped, without refetching the courts it finished')
+    parser.add_argument('--sitemap', metavar='URL', help='find the courts to crawl in this sitemap (or sitemap index) instead of the A-Z index pages')
+    parser.add_argument('--court-index', default=config.COURT_INDEX, help='every court found so far, with when it was first and last seen (default: {})'.format(config.COURT_INDEX))
+    parser.add_argument('--discover-only', action='store_true', help='just find the courts, update --court-index and list new and removed ones; no court pages are fetched')
+    parser.add_argument('--archive', metavar='DIR', help='also keep every page fetched in this archive (see archive.py), for re-running extraction later with --from-archive')
+    parser.add_argument('--from-archive', metavar='DIR', help='parse the court pages kept in an --archive instead of crawling; no network is used')
+    parser.add_argument('--processes', type=int, metavar='N', help='with --from-html or --from-archive, parse and standardise in N worker processes; 0 for one per core')
+    parser.add_argument('--chunk-size', type=int, default=16, help='pages sent to a worker process at a time (default: 16)')
+    parser.add_argument('--queue-size', type=int, default=64, help='items buffered between pipeline stages (default: 64)')
+    parser.add_argument('--metrics', metavar='PATH', help='write a run summary here when the run ends: stage timings, downloads, cache hits, retries, per-letter throughput')
+    parser.add_argument('--metrics-format', default='json', choices=('json', 'prometheus'), help='format of the --metrics summary (default: json)')
+    parser.add_argument('--profile-stage', choices=STAGES, help='profile one pipeline stage, and only that stage')
+    parser.add_argument('--profiler', default='cprofile', choices=sorted(PROFILERS), help='cprofile for exact call counts, sampling for low overhead (default: cprofile)')
+    parser.add_argument('--profile-output', metavar='PATH', help='where --profile-stage writes its profile (default: STAGE.prof for cprofile, STAGE.folded for sampling)')
+
+def run_crawl(args, parser):
+    import csv
+    from . import parsing, scraper
+    from .fetch import Fetcher, HostRateLimiter
+    from .cache import ResponseCache
+    from .manifest import Manifest
+    from .sinks import open_sink
+    from .checkpoint import Checkpoint, CheckpointMismatch
+    from .discovery import CourtIndex
+
+    base, buff, metrics = args.base_url, args.index_path, scraper.METRICS
+
+    if args.offline and args.no_cache:
+        parser.error('--offline needs the cache')
+
+    try:
+        parsing.set_backend(args.parser)
+    except ValueError as e:
+        parser.error(str(e))
+
+    source = '--from-html' if args.from_html else '--from-archive' if args.from_archive else None
+
+    if args.from_html and args.from_archive:
+        parser.error('choose one of --from-html and --from-archive')
+
+    if source and (args.incremental or args.resume):
+        parser.error('--incremental and --resume only apply to a crawl, not {}'.format(source))
+
+    if source and (args.sitemap or args.discover_only or args.archive):
+        parser.error('--sitemap, --discover-only and --archive only apply to a crawl, not {}'.format(source))
+
+    if args.resume and args.no_checkpoint:
+        parser.error('--resume needs the checkpoint')
+
+    if args.processes is not None and not source:
+        parser.error('--processes only applies to --from-html or --from-archive')
+
+    cache = None if args.no_cache else ResponseCache(args.cache, args.cache_ttl, args.cache_size * 1024 * 1024)
+
+    if args.archive:
+        from .archive import ArchiveWriter
+
+    if args.adaptive:
+        from .adaptive import AdaptiveConcurrency
+
+    fetcher = scraper.FETCHER = Fetcher(
+        timeout=(min(5, args.timeout), args.timeout),
+        retries=args.retries,
+        backoff=args.backoff,
+        pool_size=args.workers,
+        rate_limiter=HostRateLimiter(args.rate, args.burst) if args.rate > 0 else None,
+        cache=cache,
+        offline=args.offline,
+        archive=ArchiveWriter(args.archive) if args.archive else None,
+        concurrency=AdaptiveConcurrency(maximum=args.workers, latency_target=args.latency_target, error_target=args.error_target) if args.adaptive else None
+        )
+
+    if args.profile_stage:
+        metrics.profile(args.profile_stage, args.profiler)
+
+    checkpoint = None
+    court_index = None if source else CourtIndex.load(args.court_index)
+
+    if args.discover_only:
+        for item in scraper.discover_courts(base, buff, workers=args.workers, sitemap=args.sitemap, court_index=court_index):
+            pass
+
+        removed = court_index.removed()
+
+        for key in court_index.added:
+            print("new: {}".format(key))
+        for key in removed:
+            print("removed: {}".format(key))
+
+        court_index.save()
+
+        print("courts: {}  new: {}  removed: {}".format(len(court_index.seen), len(court_index.added), len(removed)))
+        sys.stderr.write(metrics.report(fetcher.stats, fetcher.concurrency) + "\n")
+        return
+
+    if args.from_archive:
+        from .archive import ArchiveReader
+
+    if args.from_html and args.processes is not None:
+        items = scraper.parse_pages_in_processes(scraper.saved_pages(scraper.saved_page_paths(args.from_html)), args.processes, args.chunk_size)
+    elif args.from_html:
+        items = scraper.standardise_records(scraper.buffered(scraper.parse_pages(scraper.load_saved_pages(scraper.saved_page_paths(args.from_html))), args.queue_size))
+    elif args.from_archive and args.processes is not None:
+        items = scraper.parse_pages_in_processes(scraper.buffered(scraper.load_archived_pages(ArchiveReader(args.from_archive)), args.queue_size), args.processes, args.chunk_size)
+    elif args.from_archive:
+        items = scraper.standardise_records(scraper.buffered(scraper.parse_pages(scraper.load_archived_pages(ArchiveReader(args.from_archive))), args.queue_size))
+    else:
+        manifest = Manifest.load(args.manifest) if args.incremental else None
+        checkpoint = None if args.no_checkpoint else Checkpoint.load(args.checkpoint) if args.resume else Checkpoint(args.checkpoint)
+
+        try:
+            if checkpoint:
+                checkpoint.start(base, args.resume)
+        except CheckpointMismatch as e:
+            parser.error(str(e))
+
+        if args.resume:
+            print("resuming: {} courts and {} letters already done".format(len(checkpoint.courts), len(checkpoint.letters)))
+
+        items = scraper.crawl(base, buff, args.workers, manifest, args.queue_size, checkpoint, args.sitemap, court_index)
+
+    count_total = 0
+    status = 'failed'
+
+    try:
+        #   Every output is written to a temp file and only replaces the real one once the whole run has succeeded
+        sinks = [open_sink(path, batch_size=args.batch_size) for path in args.output]
+
+        try:
+            for item in scraper.write_rows(items, sinks):
+                #   Courts found through a sitemap are nameless until their page is parsed, and unchanged or resumed ones never are
+                line = u"-_-_-_-_-_-_-_-_-_-_Total: {}: {}".format(count_total, item['court'] or item['row'].get('court_name') or item['url'])
+
+                #   Python 2 would encode a court name with accents as ASCII, and fail, when printing to a pipe
+                print(line if sys.version_info[0] > 2 else line.encode('utf-8'))
+
+                count_total += 1
+
+            if args.incremental:
+                #   Only reached once every letter has been crawled, so a court missing now really has gone from the site
+                removed = manifest.removed()
+                manifest.prune()
+
+        except BaseException:
+            for sink in sinks:
+                sink.close(commit=False)
+            raise
+
+        for sink in sinks:
+            sink.close()
+
+        if court_index:
+            #   Every court page has been written, so discovery ran to the end and courts it did not find have gone
+            removed_courts = court_index.removed()
+            court_index.save()
+
+            print("courts found: {}  new: {}  removed: {}".format(len(court_index.seen), len(court_index.added), len(removed_courts)))
+
+        if args.incremental:
+            manifest.save()
+
+            print("added: {}  changed: {}  unchanged: {}  removed: {}".format(manifest.added, manifest.changed, manifest.unchanged, len(removed)))
+
+        #   Outputs and manifest are committed, so there is nothing left to resume
+        if checkpoint:
+            checkpoint.finish()
+
+        status = 'ok'
+
+    except csv.Error as e:
+        sys.exit('file %s, line %d: %s' % (', '.join(args.output), count_total, e))
+
+    except KeyboardInterrupt:
+        status = 'interrupted'
+        raise
+
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+        if fetcher.archive:
+            fetcher.archive.close()
+
+        sys.stderr.write(metrics.report(fetcher.stats, fetcher.concurrency) + "\n")
+
+        if args.profile_stage:
+            profile_output = args.profile_output or args.profile_stage + ('.prof' if args.profiler == 'cprofile' else '.folded')
+
+            if metrics.save_profile(profile_output):
+                sys.stderr.write("profile of the {} stage written to {}\n".format(args.profile_stage, profile_output))
+
+        if args.metrics:
+            metrics.save(args.metrics, args.metrics_format, fetcher.stats, status, fetcher.concurrency)
+
+
+
+########################
+### OFFLINE COMMANDS ###
+########################
+
+def export_arguments(parser):
+    from .sinks import SINKS
+
+    parser.add_argument('rows', help='courts as exported by a crawl (.jsonl, or .csv)')
+    parser.add_argument('--output', nargs='+', required=True, metavar='PATH', help='files to write, in the format given by each extension: {}'.format(', '.join('.' + f for f in sorted(SINKS))))
+    parser.add_argument('--batch-size', type=int, default=1000, help='rows buffered per write, i.e. per Parquet row group (default: 1000)')
+
+def run_export(args, parser):
+    from .query import load_rows
+    from .sinks import open_sink
+
+    sinks = [open_sink(path, batch_size=args.batch_size) for path in args.output]
+
+    try:
+        for row in load_rows(args.rows):
+            for sink in sinks:
+                sink.write(row)
+    except BaseException:
+        for sink in sinks:
+            sink.close(commit=False)
+        raise
+
+    for sink in sinks:
+        sink.close()
+
+def query_arguments(parser):
+    from .query import INDEXES
+
+    commands = parser.add_subparsers(dest='query_command')
+
+    build_command = commands.add_parser('build', help='index the rows of a JSON Lines (or CSV) export')
+    build_command.add_argument('rows')
+    build_command.add_argument('index')
+
+    find_command = commands.add_parser('find', help='print the rows filed under a value, as JSON Lines')
+    find_command.add_argument('index')
+    find_command.add_argument('name', choices=sorted(INDEXES))
+    find_command.add_argument('value', type=text_argument)
+
+def run_query(args, parser):
+    from . import query
+
+    if args.query_command == 'build':
+        query.build(query.load_rows(args.rows)).save(args.index)
+
+    elif args.query_command == 'find':
+        with query.MappedCourtQuery(args.index) as index:
+            for row in index.find(args.name, args.value):
+                write_json_line(stdout_bytes(), row)
+
+    else:
+        parser.print_usage()
+
+def snapshot_arguments(parser):
+    commands = parser.add_subparsers(dest='snapshot_command')
+
+    take_command = commands.add_parser('take', help='snapshot the rows of a JSON Lines (or CSV) export')
+    take_command.add_argument('rows')
+    take_command.add_argument('snapshot')
+
+    diff_command = commands.add_parser('diff', help='list the courts added, removed or modified between two snapshots')
+    diff_command.add_argument('old')
+    diff_command.add_argument('new')
+    diff_command.add_argument('--output', metavar='PATH', help='write the changes here as JSON Lines, e.g. for a downstream sync (default: stdout)')
+
+def run_snapshot(args, parser):
+    from . import snapshot
+
+    if args.snapshot_command == 'take':
+        from .query import load_rows
+        snapshot.save(args.snapshot, load_rows(args.rows))
+
+    elif args.snapshot_command == 'diff':
+        counts = {'added': 0, 'removed': 0, 'modified': 0}
+        out = open(args.output, 'wb') if args.output else stdout_bytes()
+
+        try:
+            for change in snapshot.diff(snapshot.read(args.old), snapshot.read(args.new)):
+                counts[change['change']] += 1
+                write_json_line(out, change)
+        finally:
+            if args.output:
+                out.close()
+
+        sys.stderr.write("added: {}  removed: {}  modified: {}\n".format(counts['added'], counts['removed'], counts['modified']))
+
+    else:
+        parser.print_usage()
+
+def nearest_arguments(parser):
+    from .geo import COURT_TYPES
+
+    parser.add_argument('postcodes', help='CSV of postcodes with their latitude and longitude, e.g. the ONS Postcode Directory')
+    parser.add_argument('rows', help='courts as exported by a crawl (.jsonl, or .csv)')
+    parser.add_argument('postcode', help='the postcode to search from')
+    parser.add_argument('--count', type=int, default=5, help='how many courts to list (default: 5)')
+    parser.add_argument('--type', choices=[kind for kind, code, words in COURT_TYPES], help='only courts of this type')
+
+def run_nearest(args, parser):
+    from .query import load_rows
+    from .geo import CourtLocator, PostcodeTable, court_postcode
+
+    locator = CourtLocator(load_rows(args.rows), PostcodeTable.load(args.postcodes))
+
+    try:
+        for km, row in locator.nearest(args.postcode, args.count, args.type):
+            stdout_bytes().write(u"{:7.1f} km  {}  {}\n".format(km, row['court_name'], court_postcode(row)).encode('utf-8'))
+    except KeyError:
+        sys.exit("{} is not in {}".format(args.postcode, args.postcodes))
+
+def archive_arguments(parser):
+    parser.add_argument('archive', help='directory written by crawl --archive')
+    parser.add_argument('url', nargs='?', type=text_argument, help='print this page; without one, list every page in the archive')
+
+def run_archive(args, parser):
+    import time
+    from .archive import ArchiveReader
+
+    with ArchiveReader(args.archive) as pages:
+        if args.url:
+            try:
+                body = pages.get(args.url)
+            except KeyError:
+                sys.exit("{} is not in {}".format(args.url, args.archive))
+
+            stdout_bytes().write(body.encode('utf-8'))
+
+        else:
+            for url in pages.urls():
+                segment, offset, length, timestamp = pages.entries[url]
+                stdout_bytes().write(u"{}  {}  {}  {}\n".format(time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)), segment, length, url).encode('utf-8'))
+
+
+
+##############
+### LOOKUP ###
+##############
+
+def court_arguments(parser):
+    parser.add_argument('court', type=text_argument, help='court name or slug, e.g. "Aberystwyth Justice Centre" or aberystwyth-justice-centre')
+    parser.add_argument('--base-url', default=config.BASE, help='site to look the court up on (default: {})'.format(config.BASE))
+    parser.add_argument('--index-path', default=config.BUFF, help='path of the A-Z index pages under --base-url (default: {})'.format(config.BUFF))
+    parser.add_argument('--court-index', default=config.COURT_INDEX, help='court index of an earlier crawl, used to find the court when it is fresh (default: {})'.format(config.COURT_INDEX))
+    parser.add_argument('--sitemap', metavar='URL', help='find the court in this sitemap instead of the A-Z index pages')
+
+def run_court(args, parser):
+    from .api import CourtLookup
+
+    lookup = CourtLookup(args.base_url, args.index_path, court_index=args.court_index, sitemap=args.sitemap)
+
+    try:
+        write_json_line(stdout_bytes(), lookup.get_court(args.court))
+    except KeyError:
+        message = u"no court named {}".format(args.court)
+        sys.exit(message if sys.version_info[0] > 2 else message.encode('utf-8'))
+
+#   (command, help, add its arguments, run it), in the order --help lists them
+COMMANDS = [
+    ('crawl', 'crawl the site (or saved pages, or an archive) and export every court', crawl_arguments, run_crawl),
+    ('export', 'write the rows of an earlier export in other formats', export_arguments, run_export),
+    ('query', 'build or search a court query index', query_arguments, run_query),
+    ('snapshot', 'take crawl snapshots and diff them', snapshot_arguments, run_snapshot),
+    ('nearest', 'find the courts nearest to a postcode (needs NumPy)', nearest_arguments, run_nearest),
+    ('archive', 'list an archive of fetched pages, or print one page', archive_arguments, run_archive),
+    ('court', "look up one court's current details", court_arguments, run_court),
+    ]
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    names = [name for name, summary, arguments, run in COMMANDS]
+
+    #   The command line before there were commands was all crawl options, and still works as one
+    if not argv or (argv[0] not in names and argv[0] not in ('-h', '--help')):
+        argv = ['crawl'] + argv
+
+    parser = argparse.ArgumentParser(prog='python -m CourtScraper', description='Crawl, collect, process and export UK court listings')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+
+    for name, summary, arguments, run in COMMANDS:
+        command = commands.add_parser(name, help=summary, description=summary)
+
+        #   Only the chosen command's arguments are set up, so its options (and their imports) are all that is loaded
+
+        if name == argv[0]:
+            arguments(command)
+
+    args = parser.parse_args(argv)
+    run = dict((name, run) for name, summary, arguments, run in COMMANDS)[args.command]
+
+    run(args, commands.choices[args.command])
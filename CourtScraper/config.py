@@ -0,0 +1,11 @@
+"""config.py - the defaults CourtScraper runs with: where it crawls, and the files it reads and writes; each has a command line flag"""
+
+#   The Court and Tribunal Finder, and the path under it of the A-Z index pages
+BASE = 'https://courttribunalfinder.service.gov.uk/'
+BUFF = 'courts/'
+
+OUTPUT = 'dictwrite.csv'
+CACHE = 'courtcache.sqlite'
+MANIFEST = 'manifest.json'
+CHECKPOINT = 'crawl.checkpoint'
+COURT_INDEX = 'courts.json'
@@ -0,0 +1,140 @@
+"""discovery.py - the list of every court to crawl: read from a sitemap, and kept in a timestamped index that shows which courts are new or gone"""
+
+import re
+import os
+import json
+import time
+import threading
+from xml.etree import ElementTree
+from .manifest import atomic_open
+
+#   A court's detail page, as opposed to an A-Z index page (a single letter) or anything else the site lists
+COURT_PATH = re.compile(r"/courts/([^/?#]{2,})/?$")
+
+def canonical_url(url):
+    """`url` with repeated slashes in its path collapsed: index pages link to https://host//courts/x, sitemaps to https://host/courts/x"""
+
+    scheme, sep, rest = url.partition('://')
+
+    if not sep:
+        scheme, rest = '', url
+
+    return scheme + sep + re.sub('/{2,}', '/', rest)
+
+def court_letter(slug):
+    """The index letter a court is listed under, going by its slug"""
+
+    letter = slug[:1].upper()
+
+    return letter if 'A' <= letter <= 'Z' else '#'
+
+###############
+### SITEMAP ###
+###############
+
+def sitemap_locations(xml):
+    """Returns (is_index, [<loc> URLs]) for a sitemap; is_index when it is a <sitemapindex> of further sitemaps"""
+
+    if not isinstance(xml, bytes):
+        xml = xml.encode('utf-8')
+
+    root = ElementTree.fromstring(xml)
+
+    #   Tags carry the sitemap namespace, e.g. {http://www.sitemaps.org/schemas/sitemap/0.9}loc
+    locations = [element.text.strip() for element in root.iter() if element.tag.rsplit('}', 1)[-1] == 'loc' and element.text]
+
+    return root.tag.rsplit('}', 1)[-1] == 'sitemapindex', locations
+
+def sitemap_listing(get, url, depth=2):
+    """Every court page in the sitemap at `url`, as [(letter, [(None, court url), ...]), ...] sorted by letter and URL
+
+    `get` fetches a URL's body (e.g. Fetcher.get). A sitemap index is followed `depth` levels down. Sitemaps do not
+    name the courts, so the name is left for the parser to read from each page's <h1>.
+    """
+
+    is_index, locations = sitemap_locations(get(url))
+    urls = []
+
+    if is_index:
+        for location in locations if depth else []:
+            urls.extend(court_url for letter, courts in sitemap_listing(get, location, depth - 1) for name, court_url in courts)
+    else:
+        urls = [location for location in locations if COURT_PATH.search(location)]
+
+    letters = {}
+
+    for court_url in urls:
+        letters.setdefault(court_letter(COURT_PATH.search(court_url).group(1)), []).append((None, court_url))
+
+    return [(letter, sorted(letters[letter], key=lambda court: court[1])) for letter in sorted(letters)]
+
+
+
+###################
+### COURT INDEX ###
+###################
+
+class CourtIndex(object):
+    """canonical court URL -> {"url", "court", "letter", "first_seen", "last_seen"[, "removed"]}, persisted as JSON
+
+    Every court found by a complete discovery pass is seen(); afterwards `added` lists the courts that were not in the
+    index before and removed() those that were but have now gone. Gone courts are kept, marked with when they went, so
+    they are only reported once, and report as new again if they come back. Safe to use from the crawl's threads.
+    """
+
+    FORMAT = 1
+
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries or {}
+        self.seen = set()
+        self.added = []
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls(path)
+
+        with open(path, 'rb') as f:
+            saved = json.loads(f.read().decode('utf-8'))
+
+        if saved.get('format') != cls.FORMAT:
+            return cls(path)
+
+        return cls(path, saved['courts'])
+
+    def see(self, url, court, letter):
+        now = time.time()
+        key = canonical_url(url)
+
+        with self.lock:
+            self.seen.add(key)
+            entry = self.entries.get(key)
+
+            if entry is None or 'removed' in entry:
+                self.added.append(key)
+                entry = self.entries[key] = {'first_seen': now}
+
+            entry.update(url=url, letter=letter, last_seen=now)
+
+            #   Courts found through a sitemap have no name until their page is parsed; keep the one the index gave
+            if court is not None or 'court' not in entry:
+                entry['court'] = court
+
+    def removed(self):
+        """Courts in the index, and not already known to be gone, that were not seen this run"""
+
+        return sorted(key for key, entry in self.entries.items() if key not in self.seen and 'removed' not in entry)
+
+    def save(self):
+        """Marks the courts not seen this run as removed, and writes the index"""
+
+        now = time.time()
+
+        with self.lock:
+            for key in self.removed():
+                self.entries[key]['removed'] = now
+
+            with atomic_open(self.path) as f:
+                f.write(json.dumps({'format': self.FORMAT, 'updated': now, 'courts': self.entries}, sort_keys=True, indent=1).encode('utf-8'))
@@ -0,0 +1,320 @@
+"""fetch.py - the shared HTTP layer used by CourtScraper: one pooled session, polite rate limiting, retries with backoff, response caching and per-request stats"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_tz, mktime_tz
+from .cache import CacheMiss
+from .adaptive import FAILED, request_outcome
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+#   Responses worth trying again; anything else (404 etc.) is final
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+
+##################################
+### THROTTLING / RATE LIMITING ###
+##################################
+
+class TokenBucket(object):
+    """Hands out tokens at a steady `rate` per second, holding at most `capacity` in reserve for short bursts
+
+    Callers that find the bucket empty reserve a token anyway (the balance goes negative) and sleep until it would
+    have been refilled, so waiting threads are served in the order they arrived rather than racing each other.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = self.capacity
+        self.stamp = time.time()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.time()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+
+        if delay:
+            time.sleep(delay)
+
+class HostRateLimiter(object):
+    """Keeps one TokenBucket per host, so the request rate is capped per server no matter how many workers are fetching"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            bucket = self.buckets[host]
+
+        bucket.acquire()
+
+
+
+###################
+### FETCH STATS ###
+###################
+
+class FetchStats(object):
+    """Thread-safe counters for every attempt the Fetcher makes: latency per request, retries and failures by reason"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.bytes = 0
+        #   served from the cache without a request / revalidated with a 304
+        self.cache_hits = 0
+        self.not_modified = 0
+        self.retry_reasons = {}
+        self.latencies = []
+        #   [(seconds, url)], the slowest requests seen so far
+        self.slowest = []
+
+    def record(self, url, seconds, size=0):
+        with self.lock:
+            self.requests += 1
+            self.bytes += size
+            self.latencies.append(seconds)
+            self.slowest = sorted(self.slowest + [(seconds, url)], reverse=True)[:5]
+
+    def record_retry(self, reason):
+        with self.lock:
+            self.retries += 1
+            self.retry_reasons[reason] = self.retry_reasons.get(reason, 0) + 1
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+
+    def record_cache_hit(self):
+        with self.lock:
+            self.cache_hits += 1
+
+    def record_not_modified(self):
+        with self.lock:
+            self.not_modified += 1
+
+    def percentile(self, pct):
+        with self.lock:
+            latencies = sorted(self.latencies)
+
+        if not latencies:
+            return None
+
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100.0))]
+
+    def summary(self):
+        """Returns a short multi-line report, e.g. for printing once the crawl has finished"""
+
+        total = sum(self.latencies)
+        lines = [
+            "requests: {}  retries: {}  failures: {}  downloaded: {} bytes".format(self.requests, self.retries, self.failures, self.bytes),
+            "cache hits: {}  not modified: {}".format(self.cache_hits, self.not_modified),
+            "time in requests: {:.2f}s  mean: {:.3f}s  p50: {:.3f}s  p95: {:.3f}s".format(
+                total, total / (self.requests or 1), self.percentile(50) or 0, self.percentile(95) or 0),
+        ]
+
+        if self.retry_reasons:
+            lines.append("retried on: " + ", ".join("{} x{}".format(k, v) for k, v in sorted(self.retry_reasons.items())))
+
+        lines.extend("slow: {:.3f}s {}".format(seconds, url) for seconds, url in self.slowest)
+
+        return "\n".join(lines)
+
+
+
+###############
+### FETCHER ###
+###############
+
+def retry_after_seconds(value):
+    """Parses a Retry-After header, which may be a number of seconds or an HTTP-date, into seconds from now"""
+
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    parsed = parsedate_tz(value)
+
+    if parsed:
+        return max(0.0, mktime_tz(parsed) - time.time())
+
+    return None
+
+class Fetcher(object):
+    """Fetches pages through one pooled requests.Session, so connections (and their TLS handshakes) are reused across courts
+
+    Connection errors, timeouts and RETRY_STATUSES responses are retried up to `retries` times, waiting an exponentially
+    growing, jittered delay in between (or whatever the server asks for with Retry-After).
+
+    With a cache.ResponseCache, cached pages are revalidated with If-None-Match / If-Modified-Since, and with `offline`
+    set, pages only ever come from the cache.
+
+    With an archive.ArchiveWriter, every page get() returns, downloaded or from the cache, is also added to the archive,
+    unless the archive already holds that page unchanged.
+
+    With an adaptive.AdaptiveConcurrency, every request holds one of its slots while it is sent, and tells it how it went,
+    so the number of requests in flight follows what the server can take rather than the number of worker threads.
+
+    requests is imported, and the session opened, on the first download, so a Fetcher that only ever serves the cache
+    (or is never used) costs nothing to create.
+    """
+
+    def __init__(self, timeout=(5, 30), retries=3, backoff=0.5, max_backoff=60, pool_size=10, rate_limiter=None, cache=None, offline=False, archive=None, concurrency=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.offline = offline
+        self.archive = archive
+        self.concurrency = concurrency
+        self.pool_size = pool_size
+        self.stats = FetchStats()
+        self.session = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        """The pooled session, opened the first time it is needed"""
+
+        with self.lock:
+            if self.session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.session = session
+
+            return self.session
+
+    def delay(self, attempt, retry_after=None):
+        """Seconds to sleep before retry number `attempt` (0-based): full jitter over an exponential ceiling"""
+
+        if retry_after is not None:
+            return min(self.max_backoff, retry_after)
+
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def request(self, url, headers=None):
+        """GETs `url`, retrying transient failures, and returns the final requests.Response"""
+
+        import requests
+
+        session = self.connect()
+        attempt = 0
+
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.wait(url)
+
+            start = time.time()
+            retry_after = None
+
+            try:
+                response = self.send(session, url, headers)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.stats.record(url, time.time() - start)
+                reason = type(e).__name__
+
+                if attempt >= self.retries:
+                    self.stats.record_failure()
+                    raise
+            else:
+                self.stats.record(url, time.time() - start, len(response.content))
+
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+
+                reason = str(response.status_code)
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+
+                if attempt >= self.retries:
+                    self.stats.record_failure()
+                    response.raise_for_status()
+
+            self.stats.record_retry(reason)
+            time.sleep(self.delay(attempt, retry_after))
+            attempt += 1
+
+    def send(self, session, url, headers):
+        """One attempt at `url`, inside a concurrency slot when there is a controller"""
+
+        if not self.concurrency:
+            return session.get(url, headers=headers, timeout=self.timeout)
+
+        token = self.concurrency.acquire()
+        #   Anything that stops session.get returning (a timeout, a refused connection) counts against the server
+        outcome = FAILED
+
+        try:
+            response = session.get(url, headers=headers, timeout=self.timeout)
+            outcome = request_outcome(response.status_code, retry_after_seconds(response.headers.get('Retry-After')))
+            return response
+        finally:
+            self.concurrency.release(token, outcome)
+
+    def get(self, url):
+        """Returns the body of `url` as text, from the cache when it is fresh or the server says it has not changed"""
+
+        entry = self.cache.lookup(url) if self.cache else None
+
+        if entry and (self.offline or self.cache.is_fresh(entry)):
+            self.stats.record_cache_hit()
+            return self.archived(url, entry.body)
+
+        if self.offline:
+            raise CacheMiss(url)
+
+        headers = {}
+
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+        response = self.request(url, headers)
+
+        if entry and response.status_code == 304:
+            self.stats.record_not_modified()
+            self.cache.touch(url)
+            return self.archived(url, entry.body)
+
+        if self.cache and response.status_code == 200:
+            self.cache.store(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+        if response.status_code == 200:
+            self.archived(url, response.text)
+
+        return response.text
+
+    def archived(self, url, body):
+        if self.archive:
+            self.archive.add(url, body)
+
+        return body
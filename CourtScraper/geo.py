@@ -0,0 +1,276 @@
+"""geo.py - places courts by their postcodes, using a local postcode file, and finds the courts nearest to a postcode
+
+    python -m CourtScraper nearest ONSPD.csv dictwrite.jsonl "SY23 1AS" [--count 5] [--type crown]
+
+Needs NumPy. The postcode file is any CSV with a postcode column (pcds, pcd or postcode) and latitude / longitude
+columns (lat / long, as in the ONS Postcode Directory, or latitude / longitude).
+"""
+
+import io
+import sys
+import csv
+from .textnorm import find_postcode
+
+EARTH_RADIUS_KM = 6371.0088
+
+#   Court types nearest() can filter on: (type, court code that marks it, words in the court name that mark it)
+COURT_TYPES = (
+    ('crown', 'crown_court_id', ('crown court',)),
+    ('county', 'county_court_id', ('county court',)),
+    ('magistrates', None, ("magistrates",)),
+    ('family', None, ('family',)),
+    ('tribunal', None, ('tribunal',)),
+    )
+
+def import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("CourtScraper.geo needs NumPy: pip install numpy")
+
+    return numpy
+
+def court_postcode(row):
+    """A court's postcode: its visiting address's, else its postal address's; for flat addresses, read from the street address"""
+
+    for kind in ('visiting', 'postal'):
+        postcode = find_postcode(row.get(kind + '_postcode')) or find_postcode(row.get(kind + '_street_address'))
+
+        if postcode:
+            return postcode
+
+    return None
+
+def court_types(row):
+    name = (row.get('court_name') or '').lower()
+
+    return set(kind for kind, code, words in COURT_TYPES if (code and row.get(code)) or any(word in name for word in words))
+
+def postcode_key(postcode):
+    """"SY23 1AS", "sy231as" -> b"SY231AS": postcodes compared without spaces or case
+
+    Raises KeyError for text that cannot be a postcode because it is not ASCII, e.g. a typo with an accented letter.
+    """
+
+    try:
+        return "".join(postcode.split()).upper().encode('ascii')
+    except UnicodeError:
+        raise KeyError(postcode)
+
+######################
+### POSTCODE TABLE ###
+######################
+
+class PostcodeTable(object):
+    """Postcode -> (latitude, longitude), held as a sorted NumPy array of postcodes and two of coordinates
+
+    A couple of million postcodes take tens of megabytes this way rather than the best part of a gigabyte as a dict,
+    and a lookup is a binary search.
+    """
+
+    def __init__(self, postcodes, latitudes, longitudes):
+        np = import_numpy()
+
+        order = np.argsort(postcodes)
+        self.postcodes = postcodes[order]
+        self.latitudes = latitudes[order]
+        self.longitudes = longitudes[order]
+
+    @classmethod
+    def load(cls, path):
+        np = import_numpy()
+
+        if sys.version_info[0] > 2:
+            f = io.open(path, newline='', encoding='utf-8')
+        else:
+            f = open(path, 'rb')
+
+        keys, latitudes, longitudes = [], [], []
+
+        with f:
+            reader = csv.reader(f)
+            header = [column.strip().lower() for column in next(reader)]
+
+            try:
+                at = [next(header.index(name) for name in names if name in header) for names in (('pcds', 'pcd', 'postcode'), ('lat', 'latitude'), ('long', 'lon', 'longitude'))]
+            except StopIteration:
+                raise ValueError("{} needs a postcode column and latitude / longitude columns".format(path))
+
+            for line in reader:
+                try:
+                    key, latitude, longitude = postcode_key(line[at[0]]), float(line[at[1]]), float(line[at[2]])
+                except (IndexError, ValueError, KeyError):
+                    continue
+
+                #   The ONS directory gives postcodes without a location 99.999999 latitude
+                if key and abs(latitude) <= 90:
+                    keys.append(key)
+                    latitudes.append(latitude)
+                    longitudes.append(longitude)
+
+        return cls(np.array(keys), np.array(latitudes), np.array(longitudes))
+
+    def __len__(self):
+        return len(self.postcodes)
+
+    def locate(self, postcode):
+        """(latitude, longitude) of `postcode`, or None if the table does not have it"""
+
+        np = import_numpy()
+
+        try:
+            key = postcode_key(postcode)
+        except KeyError:
+            return None
+
+        if not len(self.postcodes):
+            return None
+
+        i = np.searchsorted(self.postcodes, key)
+
+        if i < len(self.postcodes) and self.postcodes[i] == key:
+            return float(self.latitudes[i]), float(self.longitudes[i])
+
+        return None
+
+
+
+#####################
+### SPATIAL INDEX ###
+#####################
+
+def unit_vectors(np, latitudes, longitudes):
+    """Points on the unit sphere: straight-line (chord) distance between them grows with great-circle distance, so it can be compared exactly"""
+
+    lat, lon = np.radians(latitudes), np.radians(longitudes)
+
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+def chord_to_km(np, chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+
+class SpatialIndex(object):
+    """A uniform grid of `cell_km` cubes over the points' unit vectors, for exact nearest-N searches
+
+    nearest() visits occupied cells in rings of growing Chebyshev distance from the query's cell, measuring the points
+    in each ring all at once with NumPy, and stops as soon as no point in a further ring could beat the N found so far
+    (every point r rings out is at least r - 1 cells away in a straight line).
+    """
+
+    def __init__(self, latitudes, longitudes, items, cell_km=25.0):
+        np = self.np = import_numpy()
+
+        self.items = list(items)
+        self.cell = cell_km / EARTH_RADIUS_KM
+        self.points = unit_vectors(np, np.asarray(latitudes, dtype=float), np.asarray(longitudes, dtype=float)).reshape(-1, 3)
+
+        cells = np.floor(self.points / self.cell).astype(np.int64)
+
+        #   Points sorted by cell, so each occupied cell's points are one slice: order[starts[c]:starts[c + 1]]
+        self.cells, cell_of_point = np.unique(cells, axis=0, return_inverse=True) if len(cells) else (np.zeros((0, 3), np.int64), np.zeros(0, np.int64))
+        cell_of_point = cell_of_point.reshape(-1)
+        self.order = np.argsort(cell_of_point, kind='mergesort')
+        self.starts = np.concatenate(([0], np.cumsum(np.bincount(cell_of_point, minlength=len(self.cells)))))
+
+    def __len__(self):
+        return len(self.items)
+
+    def nearest(self, latitude, longitude, count=5):
+        """The `count` items nearest to a point, nearest first, as [(kilometres, item), ...]"""
+
+        np = self.np
+
+        if not len(self.items) or count < 1:
+            return []
+
+        query = unit_vectors(np, np.array([latitude]), np.array([longitude]))[0]
+        rings = np.abs(self.cells - np.floor(query / self.cell).astype(np.int64)).max(axis=1)
+        by_ring = np.argsort(rings, kind='mergesort')
+
+        best = np.zeros(0, dtype=np.int64)
+        best_chords = np.zeros(0)
+        i = 0
+
+        while i < len(by_ring):
+            ring = rings[by_ring[i]]
+
+            if len(best) >= count and (ring - 1) * self.cell >= best_chords.max():
+                break
+
+            j = i
+
+            while j < len(by_ring) and rings[by_ring[j]] == ring:
+                j += 1
+
+            found = np.concatenate([self.order[self.starts[c]:self.starts[c + 1]] for c in by_ring[i:j]])
+            chords = np.sqrt(((self.points[found] - query) ** 2).sum(axis=1))
+
+            best = np.concatenate((best, found))
+            best_chords = np.concatenate((best_chords, chords))
+
+            if len(best) > count:
+                keep = np.argpartition(best_chords, count - 1)[:count]
+                best, best_chords = best[keep], best_chords[keep]
+
+            i = j
+
+        ranked = np.argsort(best_chords, kind='mergesort')
+
+        return [(float(km), self.items[point]) for km, point in zip(chord_to_km(np, best_chords[ranked]), best[ranked])]
+
+
+
+#####################
+### COURT LOCATOR ###
+#####################
+
+class CourtLocator(object):
+    """Standardised court rows placed on the map through a PostcodeTable, searchable by distance from any postcode
+
+    Courts whose postcode is missing, or not in the table, are left in `unlocated`.
+    """
+
+    def __init__(self, rows, postcodes, cell_km=25.0):
+        self.postcodes = postcodes
+        self.cell_km = cell_km
+        self.located = []
+        self.unlocated = []
+        self.by_type = {}
+
+        for row in rows:
+            postcode = court_postcode(row)
+            point = postcodes.locate(postcode) if postcode else None
+
+            if point:
+                self.located.append((point, row))
+            else:
+                self.unlocated.append(row)
+
+        self.index = self.build(self.located)
+
+    def build(self, located):
+        return SpatialIndex([lat for (lat, lon), row in located], [lon for (lat, lon), row in located], [row for point, row in located], self.cell_km)
+
+    def of_type(self, kind):
+        """The SpatialIndex of just the courts of one COURT_TYPES type, built the first time it is asked for"""
+
+        if kind not in self.by_type:
+            self.by_type[kind] = self.build([(point, row) for point, row in self.located if kind in court_types(row)])
+
+        return self.by_type[kind]
+
+    def nearest(self, postcode, count=5, kind=None):
+        """The `count` courts nearest to `postcode` (of type `kind`, if given), as [(kilometres, row), ...]
+
+        Raises KeyError for a postcode the table does not have; an empty table has nothing to search, and finds nothing.
+        """
+
+        if not len(self.postcodes):
+            return []
+
+        point = self.postcodes.locate(postcode)
+
+        if point is None:
+            raise KeyError(postcode)
+
+        return (self.of_type(kind) if kind else self.index).nearest(point[0], point[1], count)
@@ -0,0 +1,110 @@
+"""manifest.py - remembers what every court page looked like last run, so unchanged courts can skip parsing entirely"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+
+#   Bumped whenever the rows CourtScraper builds from a page change shape or content, so rows stored by an older
+#   version are rebuilt rather than reused just because the page itself has not changed
+FORMAT = 3
+
+#   os.replace() overwrites the target atomically on every platform; Python 2 only has os.rename(), which does so on POSIX
+replace = getattr(os, 'replace', os.rename)
+
+@contextmanager
+def atomic_open(path, mode='wb'):
+    """Opens a temp file next to `path` and renames it over `path` only once the block finishes without an exception,
+    so readers see either the old file or the complete new one, never half a file"""
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+        replace(tmp_path, path)
+
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def page_digest(court_name, html):
+    """Fingerprint of everything a court's row is built from: its name on the index page and its detail page"""
+
+    return hashlib.sha1(u"{}\0{}".format(court_name, html).encode('utf-8')).hexdigest()
+
+class Manifest(object):
+    """court URL -> {"hash": page_digest, "row": the CSV row last emitted for it}
+
+    lookup() hands back the stored row when a page's digest has not changed, update() records freshly parsed ones, and
+    removed() lists courts that were not seen at all this run. Safe to use from the crawl's worker threads.
+    """
+
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = entries or {}
+        self.seen = set()
+        self.added = self.changed = self.unchanged = 0
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls(path)
+
+        with open(path, 'rb') as f:
+            saved = json.loads(f.read().decode('utf-8'))
+
+        if saved.get('format') != FORMAT:
+            return cls(path)
+
+        return cls(path, saved['courts'])
+
+    def lookup(self, url, digest):
+        """Returns the previously emitted row for `url` if its page is unchanged, else None"""
+
+        with self.lock:
+            self.seen.add(url)
+            entry = self.entries.get(url)
+
+            if entry and entry['hash'] == digest:
+                self.unchanged += 1
+                return entry['row']
+
+        return None
+
+    def update(self, url, digest, row):
+        with self.lock:
+            self.seen.add(url)
+
+            if url in self.entries:
+                self.changed += 1
+            else:
+                self.added += 1
+
+            self.entries[url] = {'hash': digest, 'row': row}
+
+    def keep(self, url):
+        """Marks `url` as seen this run, leaving whatever is stored for it as it is"""
+
+        with self.lock:
+            self.seen.add(url)
+
+    def removed(self):
+        return sorted(url for url in self.entries if url not in self.seen)
+
+    def prune(self):
+        """Forgets every court that was not seen this run"""
+
+        for url in self.removed():
+            del self.entries[url]
+
+    def save(self):
+        with atomic_open(self.path) as f:
+            f.write(json.dumps({'format': FORMAT, 'courts': self.entries}, sort_keys=True, indent=1).encode('utf-8'))
@@ -0,0 +1,390 @@
+"""metrics.py - per-stage timings and crawl counters, an optional profiler scoped to one stage, and a run summary as JSON or Prometheus text"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from collections import OrderedDict
+
+#   The stages CourtScraper times: index pages, court page downloads, HTML parsing, address / contact extraction,
+#   standardisation and writing to the sinks
+STAGES = ('index', 'fetch', 'parse', 'extract', 'standardise', 'write')
+
+#   Histogram bucket upper bounds, in seconds: 1-2.5-5 steps from 0.1ms to a minute
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+
+#################
+### HISTOGRAM ###
+#################
+
+class Histogram(object):
+    """Thread-safe count of observations per fixed bucket, as a Prometheus histogram keeps them
+
+    Memory stays the same however long the crawl runs; quantiles are estimated by interpolating inside the bucket the
+    wanted rank falls in, the way Prometheus' histogram_quantile() does.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        #   One count per bucket, plus one for everything above the last bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        with self.lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q):
+        with self.lock:
+            counts, count, largest = list(self.counts), self.count, self.max
+
+        if not count:
+            return None
+
+        rank = q * count
+        seen = 0
+
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else largest
+
+                return min(largest, lower + (upper - lower) * (rank - seen) / n)
+
+            seen += n
+
+        return largest
+
+    def to_dict(self):
+        return OrderedDict([
+            ('count', self.count), ('seconds', self.sum), ('mean', self.sum / self.count if self.count else None),
+            ('p50', self.quantile(0.5)), ('p95', self.quantile(0.95)), ('p99', self.quantile(0.99)), ('max', self.max)
+            ])
+
+
+
+#################
+### PROFILERS ###
+#################
+
+class StageProfiler(object):
+    """cProfile, switched on only while a thread is inside one stage
+
+    Each thread running the stage gets a profiler of its own (cProfile only ever sees the thread that enabled it), and
+    save() merges them into one .prof file for pstats / snakeviz.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.profiles = []
+
+    def start(self):
+        pass
+
+    def enter(self):
+        profile = getattr(self.local, 'profile', None)
+
+        if profile is None:
+            profile = self.local.profile = cProfile.Profile()
+
+            with self.lock:
+                self.profiles.append(profile)
+
+        try:
+            profile.enable()
+            self.local.active = True
+        except ValueError:
+            #   Python 3.12+ allows one active profiler per process: a thread that finds one running goes unprofiled
+            self.local.active = False
+
+    def exit(self):
+        if self.local.active:
+            self.local.profile.disable()
+
+    def save(self, path):
+        profiles = [profile for profile in self.profiles if profile.getstats()]
+
+        if not profiles:
+            return False
+
+        stats = pstats.Stats(profiles[0])
+
+        for profile in profiles[1:]:
+            stats.add(profile)
+
+        stats.dump_stats(path)
+
+        return True
+
+class StageSampler(object):
+    """A sampling profiler: every `interval` seconds, records the stacks of the threads inside one stage
+
+    Much cheaper than cProfile, so timings stay close to an unprofiled run. save() writes the samples as collapsed
+    stacks ("outer;inner;innermost count" per line), the input of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, stage, interval=0.005):
+        self.stage = stage
+        self.interval = interval
+        self.lock = threading.Lock()
+        #   {thread id: how deep it is inside the stage}
+        self.inside = {}
+        self.samples = {}
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def enter(self):
+        ident = threading.current_thread().ident
+
+        with self.lock:
+            self.inside[ident] = self.inside.get(ident, 0) + 1
+
+    def exit(self):
+        ident = threading.current_thread().ident
+
+        with self.lock:
+            self.inside[ident] -= 1
+
+            if not self.inside[ident]:
+                del self.inside[ident]
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            with self.lock:
+                idents = list(self.inside)
+
+            frames = sys._current_frames()
+
+            for ident in idents:
+                frame = frames.get(ident)
+
+                if frame is not None:
+                    stack = collapsed_stack(frame)
+
+                    with self.lock:
+                        self.samples[stack] = self.samples.get(stack, 0) + 1
+
+    def save(self, path):
+        """Stops sampling, waiting for the sampler to finish its last pass, and writes the samples; False if there were none"""
+
+        self.stopped.set()
+
+        if self.thread is not None:
+            self.thread.join()
+
+        with self.lock:
+            samples = sorted(self.samples.items())
+
+        if not samples:
+            return False
+
+        with open(path, 'w') as f:
+            for stack, count in samples:
+                f.write("{} {}\n".format(stack, count))
+
+        return True
+
+def collapsed_stack(frame):
+    """"module:function" for every frame from the outermost in, joined with ";" """
+
+    names = []
+
+    while frame is not None:
+        names.append("{}:{}".format(os.path.splitext(os.path.basename(frame.f_code.co_filename))[0], frame.f_code.co_name))
+        frame = frame.f_back
+
+    return ";".join(reversed(names))
+
+PROFILERS = {'cprofile': StageProfiler, 'sampling': StageSampler}
+
+
+
+###############
+### METRICS ###
+###############
+
+class Metrics(object):
+    """Everything measured during one run: a Histogram per stage, and courts written per letter
+
+    The Fetcher's FetchStats (requests, bytes, retries, cache hits) are folded in when the summary is made, so there is
+    one report for the whole run.
+    """
+
+    def __init__(self, stages=STAGES):
+        self.lock = threading.Lock()
+        self.stages = OrderedDict((stage, Histogram()) for stage in stages)
+        self.started = time.time()
+        self.courts = 0
+        #   {letter: [courts, seconds]}; a letter's seconds run from the last court of the letter before it to its own last
+        self.letters = OrderedDict()
+        self.letter_mark = self.started
+        self.profiler = None
+
+    def profile(self, stage, kind='cprofile'):
+        """Profiles every pass through `stage` from now on, with a StageProfiler ("cprofile") or a StageSampler ("sampling")"""
+
+        if stage not in self.stages:
+            raise ValueError("unknown stage {!r}, expected one of: {}".format(stage, ", ".join(self.stages)))
+
+        self.profiler = PROFILERS[kind](stage)
+        self.profiler.start()
+
+    @contextmanager
+    def time(self, stage):
+        """Times the block into the stage's Histogram (and profiles it, if it is the profiled stage)"""
+
+        profiler = self.profiler if self.profiler and self.profiler.stage == stage else None
+
+        if profiler:
+            profiler.enter()
+
+        start = time.time()
+
+        try:
+            yield
+        finally:
+            self.stages[stage].observe(time.time() - start)
+
+            if profiler:
+                profiler.exit()
+
+    def record_court(self, letter=None):
+        """Counts a court as written; with its letter, towards that letter's throughput too"""
+
+        now = time.time()
+
+        with self.lock:
+            self.courts += 1
+
+            if letter is None:
+                return
+
+            entry = self.letters.setdefault(letter, [0, 0.0])
+            entry[0] += 1
+            entry[1] += now - self.letter_mark
+            self.letter_mark = now
+
+    def summary(self, fetch_stats=None, status=None, concurrency=None):
+        """The run summary as a JSON-ready dict; with an adaptive.AdaptiveConcurrency, its limit and decisions too"""
+
+        elapsed = time.time() - self.started
+        summary = OrderedDict([
+            ('status', status),
+            ('started', self.started),
+            ('seconds', elapsed),
+            ('courts', self.courts),
+            ('courts_per_second', self.courts / elapsed if elapsed else None),
+            ('stages', OrderedDict((stage, histogram.to_dict()) for stage, histogram in self.stages.items())),
+            ('letters', OrderedDict((letter, OrderedDict([('courts', courts), ('seconds', seconds), ('courts_per_second', courts / seconds if seconds else None)]))
+                                    for letter, (courts, seconds) in self.letters.items())),
+            ])
+
+        if fetch_stats is not None:
+            summary['fetch'] = OrderedDict([
+                ('requests', fetch_stats.requests), ('bytes', fetch_stats.bytes), ('cache_hits', fetch_stats.cache_hits),
+                ('not_modified', fetch_stats.not_modified), ('retries', fetch_stats.retries), ('failures', fetch_stats.failures),
+                ('retry_reasons', dict(fetch_stats.retry_reasons)),
+                ('request_p50', fetch_stats.percentile(50)), ('request_p95', fetch_stats.percentile(95)),
+                ('slowest', [OrderedDict([('seconds', seconds), ('url', url)]) for seconds, url in fetch_stats.slowest]),
+                ])
+
+        if concurrency is not None:
+            summary['concurrency'] = concurrency.summary()
+
+        return summary
+
+    def prometheus_text(self, fetch_stats=None, status=None, concurrency=None):
+        """The run summary in the Prometheus text exposition format, e.g. for node_exporter's textfile collector"""
+
+        lines = []
+
+        def metric(name, kind, help, samples):
+            lines.append("# HELP courtscraper_{} {}".format(name, help))
+            lines.append("# TYPE courtscraper_{} {}".format(name, kind))
+            lines.extend("courtscraper_{}{} {}".format(name + suffix, labels, value) for suffix, labels, value in samples)
+
+        samples = []
+
+        for stage, histogram in self.stages.items():
+            cumulative = 0
+
+            for bound, count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                cumulative += count
+                samples.append(('_bucket', '{{stage="{}",le="{}"}}'.format(stage, bound), cumulative))
+
+            samples.append(('_sum', '{{stage="{}"}}'.format(stage), repr(histogram.sum)))
+            samples.append(('_count', '{{stage="{}"}}'.format(stage), histogram.count))
+
+        metric('stage_seconds', 'histogram', 'Seconds per pass through each pipeline stage', samples)
+        metric('courts_total', 'counter', 'Courts written, by index letter', [('', '{{letter="{}"}}'.format(letter), courts) for letter, (courts, seconds) in self.letters.items()] or [('', '', self.courts)])
+        metric('letter_seconds', 'gauge', 'Seconds spent on each index letter', [('', '{{letter="{}"}}'.format(letter), repr(seconds)) for letter, (courts, seconds) in self.letters.items()])
+        metric('run_seconds', 'gauge', 'Seconds the run took', [('', '', repr(time.time() - self.started))])
+        metric('run_succeeded', 'gauge', 'Whether the run completed', [('', '', int(status == 'ok'))])
+
+        if fetch_stats is not None:
+            metric('requests_total', 'counter', 'HTTP requests made, retries included', [('', '', fetch_stats.requests)])
+            metric('downloaded_bytes_total', 'counter', 'Bytes of response bodies downloaded', [('', '', fetch_stats.bytes)])
+            metric('cache_hits_total', 'counter', 'Pages served from the cache without a request', [('', '', fetch_stats.cache_hits)])
+            metric('not_modified_total', 'counter', 'Cached pages revalidated with a 304', [('', '', fetch_stats.not_modified)])
+            metric('retries_total', 'counter', 'Requests retried, by reason', [('', '{{reason="{}"}}'.format(reason), count) for reason, count in sorted(fetch_stats.retry_reasons.items())])
+            metric('failures_total', 'counter', 'Pages given up on after the last retry', [('', '', fetch_stats.failures)])
+
+        if concurrency is not None:
+            controller = concurrency.summary()
+            metric('concurrency_limit', 'gauge', 'Requests the adaptive controller allowed in flight at the end of the run', [('', '', controller['limit'])])
+            metric('concurrency_limit_peak', 'gauge', 'Highest in-flight limit the adaptive controller reached', [('', '', controller['peak'])])
+            metric('concurrency_decisions_total', 'counter', 'Limit changes made by the adaptive controller, by decision', [('', '{{decision="{}"}}'.format(decision), count) for decision, count in controller['decisions'].items()])
+
+        return "\n".join(lines) + "\n"
+
+    def report(self, fetch_stats=None, concurrency=None):
+        """A short human-readable report, e.g. for stderr at the end of the run"""
+
+        lines = ["{:<12} {:>7} {:>9} {:>9} {:>9} {:>9}".format("stage", "count", "seconds", "p50 ms", "p95 ms", "max ms")]
+
+        for stage, histogram in self.stages.items():
+            if histogram.count:
+                lines.append("{:<12} {:>7} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f}".format(
+                    stage, histogram.count, histogram.sum, histogram.quantile(0.5) * 1000, histogram.quantile(0.95) * 1000, histogram.max * 1000))
+
+        if fetch_stats is not None:
+            lines.append(fetch_stats.summary())
+
+        if concurrency is not None:
+            lines.append(concurrency.report())
+
+        return "\n".join(lines)
+
+    def save(self, path, format='json', fetch_stats=None, status=None, concurrency=None):
+        """Writes the run summary to `path` as "json" or "prometheus" text"""
+
+        if format == 'prometheus':
+            text = self.prometheus_text(fetch_stats, status, concurrency)
+        else:
+            text = json.dumps(self.summary(fetch_stats, status, concurrency), indent=2) + "\n"
+
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def save_profile(self, path):
+        """Writes what the stage profiler collected; False if nothing was profiled"""
+
+        return self.profiler.save(path) if self.profiler else False
@@ -0,0 +1,87 @@
+"""model.py - compact records for a scraped court, filled in by CourtScraper's parsers and read by every exporter"""
+
+class Address(object):
+    """One of a court's addresses
+
+    `kind` is the id of the block it came from ("visiting", "postal"), `lines` the street address a line at a time.
+    town, region and postcode are only known for addresses marked up with <span property="...">; flat-text addresses
+    keep everything, postcode included, in `lines`.
+    """
+
+    __slots__ = ('kind', 'lines', 'town', 'region', 'postcode')
+
+    def __init__(self, kind, lines=None, town=None, region=None, postcode=None):
+        self.kind = kind
+        self.lines = lines or []
+        self.town = town
+        self.region = region
+        self.postcode = postcode
+
+    @property
+    def street_address(self):
+        return "\n".join(self.lines)
+
+    def __repr__(self):
+        return "Address({!r}, {!r}, town={!r}, region={!r}, postcode={!r})".format(self.kind, self.lines, self.town, self.region, self.postcode)
+
+class Contact(object):
+    """A labelled group of contact details, e.g. Contact("telephone", "Enquiries:", [u"01970 621 250"])"""
+
+    __slots__ = ('kind', 'label', 'values')
+
+    def __init__(self, kind, label, values=None):
+        self.kind = kind
+        self.label = label
+        self.values = values or []
+
+    def __repr__(self):
+        return "Contact({!r}, {!r}, {!r})".format(self.kind, self.label, self.values)
+
+class CourtRecord(object):
+    """Everything scraped for one court: its addresses and contacts in page order, and its codes ("pros") by name"""
+
+    __slots__ = ('name', 'url', 'addresses', 'contacts', 'codes')
+
+    def __init__(self, name, url, addresses=None, contacts=None, codes=None):
+        self.name = name
+        self.url = url
+        self.addresses = addresses or []
+        self.contacts = contacts or []
+        self.codes = codes or {}
+
+    def address(self, kind):
+        """The address of the given kind, or None; if the page lists a kind twice, the last one wins"""
+
+        found = None
+
+        for address in self.addresses:
+            if address.kind == kind:
+                found = address
+
+        return found
+
+    def contact(self, kind, label):
+        """The contact with the given kind and label, or None; if the page lists one twice, the last one wins"""
+
+        found = None
+
+        for contact in self.contacts:
+            if contact.kind == kind and contact.label == label:
+                found = contact
+
+        return found
+
+    @property
+    def crown_court_id(self):
+        return self.codes.get('Crown Court location code')
+
+    @property
+    def county_court_id(self):
+        return self.codes.get('County Court location code')
+
+    @property
+    def dx(self):
+        return self.codes.get('DX')
+
+    def __repr__(self):
+        return "CourtRecord({!r}, {!r}, addresses={!r}, contacts={!r}, codes={!r})".format(self.name, self.url, self.addresses, self.contacts, self.codes)
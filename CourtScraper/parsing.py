@@ -0,0 +1,77 @@
+"""parsing.py - builds BeautifulSoup trees for CourtScraper, on the fastest installed backend and for only the part of the page that is used
+
+BeautifulSoup (and lxml) are only imported once the first page is parsed, so commands that never parse HTML start
+without them.
+"""
+
+BACKENDS = ("lxml", "html.parser")
+
+#   What the parse_*_page() functions keep of a page, as SoupStrainer arguments:
+#   a court page's addresses, pros and contacts all live inside its "court" block, and get_courts() only reads the
+#   index's list of courts
+STRAINERS = {
+    'court': ('div', {'class': 'content inner cf court'}),
+    'index': ('div', {'class': 'content inner cf'}),
+    }
+
+#   Changed with set_backend(), e.g. from the command line; None until then, or until the first page is parsed
+BACKEND = None
+
+#   SoupStrainers built from STRAINERS, the first time each is used
+BUILT = {}
+
+def default_backend():
+    """lxml when it is installed, as the fastest, else the html.parser that comes with Python"""
+
+    try:
+        import lxml
+    except ImportError:
+        return "html.parser"
+
+    return "lxml"
+
+def set_backend(name):
+    """Selects the tree builder used from now on: "lxml", "html.parser", or "auto" for the fastest one installed"""
+
+    global BACKEND
+
+    if name == "auto":
+        name = default_backend()
+
+    if name not in BACKENDS:
+        raise ValueError("unknown parser backend {!r}, expected one of: auto, {}".format(name, ", ".join(BACKENDS)))
+
+    if name == "lxml" and default_backend() != "lxml":
+        raise ValueError("the lxml parser backend needs lxml to be installed")
+
+    BACKEND = name
+
+def backend():
+    """The selected backend, picking the default the first time if none was set"""
+
+    if BACKEND is None:
+        set_backend("auto")
+
+    return BACKEND
+
+def page_strainer(name):
+    from bs4 import SoupStrainer
+
+    if name not in BUILT:
+        BUILT[name] = SoupStrainer(*STRAINERS[name])
+
+    return BUILT[name]
+
+def make_soup(html, strainer=None):
+    """Parses `html` with the selected backend; with a SoupStrainer, only the elements it matches (and everything inside
+    them) are built into the tree, which skips the page chrome entirely"""
+
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, backend(), parse_only=strainer)
+
+def parse_court_page(html):
+    return make_soup(html, page_strainer('court'))
+
+def parse_index_page(html):
+    return make_soup(html, page_strainer('index'))
@@ -0,0 +1,274 @@
+"""query.py - hash indexes over standardised court rows for point lookups by code, postcode area, town, region or email domain
+
+    python -m CourtScraper query build dictwrite.jsonl courts.idx
+    python -m CourtScraper query find courts.idx outward_code SY23
+
+or write the index during a crawl, as one of its outputs: python -m CourtScraper --output dictwrite.csv courts.idx
+
+build() indexes rows in memory; save() writes the same indexes as one file that MappedCourtQuery opens with mmap, so a
+lookup service starts without reading or parsing the whole dataset and each lookup only touches the pages it needs.
+"""
+
+import io
+import sys
+import csv
+import json
+import mmap
+import zlib
+import struct
+from .textnorm import find_postcode, outward_code
+
+def normalise(value):
+    """Index keys are compared case- and spacing-insensitively"""
+
+    return u" ".join(value.split()).lower() if value else None
+
+def code_keys(field):
+    return lambda row: [normalise(row.get(field))]
+
+def outward_keys(row):
+    """Postcode areas of both addresses: span addresses have a postcode field, flat ones end their street address with it"""
+
+    keys = []
+
+    for kind in ('visiting', 'postal'):
+        postcode = row.get(kind + '_postcode') or find_postcode(row.get(kind + '_street_address'))
+        keys.append(normalise(outward_code(postcode)))
+
+    return keys
+
+def place_keys(field):
+    return lambda row: [normalise(row.get('visiting_' + field)), normalise(row.get('postal_' + field))]
+
+def email_domain_keys(row):
+    return [normalise(email.rsplit('@', 1)[-1].rstrip('.')) for email in row.get('emails') or [] if '@' in email]
+
+#   {index name: function returning the (normalised) keys a row is filed under}
+INDEXES = {
+    'crown_court_id': code_keys('crown_court_id'),
+    'county_court_id': code_keys('county_court_id'),
+    'dx': code_keys('dx'),
+    'outward_code': outward_keys,
+    'town': place_keys('town'),
+    'region': place_keys('region'),
+    'email_domain': email_domain_keys,
+    }
+
+
+
+#################
+### IN MEMORY ###
+#################
+
+class CourtQuery(object):
+    """Standardised rows and, for each of INDEXES, a dict of key -> positions of the rows filed under it"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.indexes = dict((name, {}) for name in INDEXES)
+
+        for position, row in enumerate(self.rows):
+            for name, keys in INDEXES.items():
+                for key in set(keys(row)):
+                    if key:
+                        self.indexes[name].setdefault(key, []).append(position)
+
+    def find(self, index, value):
+        """The rows filed under `value` in `index`, e.g. find("crown_court_id", "401"), in the order they were indexed"""
+
+        return [self.rows[position] for position in self.indexes[index].get(normalise(value), [])]
+
+    def keys(self, index):
+        return sorted(self.indexes[index])
+
+    def save(self, path):
+        #   Imported here, so a lookup service that only reads indexes never loads it
+        from .manifest import atomic_open
+
+        with atomic_open(path) as f:
+            write_index(f, self.rows, self.indexes)
+
+def build(rows):
+    return CourtQuery(rows)
+
+def load_rows(path):
+    """Reads back the rows written by the JSON Lines or CSV sink; CSV lacks the url, dx and postcode columns"""
+
+    if path.endswith('.csv'):
+        from .sinks import CSV_COLUMNS, LIST_FIELDS
+
+        if sys.version_info[0] > 2:
+            f = io.open(path, newline='', encoding='utf-8')
+        else:
+            f = open(path, 'rb')
+
+        with f:
+            for line in csv.DictReader(f):
+                if sys.version_info[0] < 3:
+                    line = dict((k, v.decode('utf-8')) for k, v in line.items())
+
+                yield dict((field, (line[header].split(',') if line[header] else []) if field in LIST_FIELDS else (line[header] or None)) for header, field in CSV_COLUMNS)
+
+    else:
+        with io.open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+
+###############################
+### MEMORY-MAPPED HASH FILE ###
+###############################
+
+"""     Layout, all integers little-endian:
+
+    header      MAGIC, version, row count, index count
+    directory   per index: name (32 bytes, NUL-padded), offset of its slot table, slot count
+    rows        (row count + 1) offsets, then each row as UTF-8 JSON
+    per index   slot table: (crc32 of key, offset of entry) per slot, an offset of 0 marking an empty slot; then the
+                entries: key length, key (UTF-8), posting count, row positions
+
+Slot tables are open-addressed with linear probing and at most half full, so a lookup hashes the key, reads one or two
+12-byte slots and compares one key before it reaches the row positions.
+"""
+
+MAGIC = b'CTQX'
+VERSION = 1
+HEADER = struct.Struct('<4sIII')
+DIRECTORY = struct.Struct('<32sQI')
+OFFSET = struct.Struct('<Q')
+SLOT = struct.Struct('<IQ')
+LENGTH = struct.Struct('<H')
+COUNT = struct.Struct('<I')
+
+def key_hash(key):
+    """crc32: unlike hash(), the same in every process and on Python 2 and 3"""
+
+    return zlib.crc32(key) & 0xffffffff
+
+def write_index(f, rows, indexes):
+    names = sorted(indexes)
+    blobs = [json.dumps(row, sort_keys=True, ensure_ascii=False).encode('utf-8') for row in rows]
+
+    f.write(HEADER.pack(MAGIC, VERSION, len(rows), len(names)))
+    directory_at = f.tell()
+    f.write(b'\0' * DIRECTORY.size * len(names))
+
+    position = f.tell() + OFFSET.size * (len(blobs) + 1)
+
+    for blob in blobs + [b'']:
+        f.write(OFFSET.pack(position))
+        position += len(blob)
+
+    for blob in blobs:
+        f.write(blob)
+
+    directory = []
+
+    for name in names:
+        entries = indexes[name]
+        slot_count = 1
+
+        while slot_count < 2 * len(entries):
+            slot_count *= 2
+
+        table_at = f.tell()
+        position = table_at + SLOT.size * slot_count
+        slots = [(0, 0)] * slot_count
+        body = []
+
+        for key in sorted(entries):
+            encoded = key.encode('utf-8')
+            h = key_hash(encoded)
+            slot = h & (slot_count - 1)
+
+            while slots[slot][1]:
+                slot = (slot + 1) & (slot_count - 1)
+
+            slots[slot] = (h, position)
+
+            entry = LENGTH.pack(len(encoded)) + encoded + COUNT.pack(len(entries[key])) + struct.pack('<{}I'.format(len(entries[key])), *entries[key])
+            body.append(entry)
+            position += len(entry)
+
+        f.write(b''.join(SLOT.pack(*slot) for slot in slots))
+        f.write(b''.join(body))
+
+        directory.append(DIRECTORY.pack(name.encode('ascii'), table_at, slot_count))
+
+    f.seek(directory_at)
+    f.write(b''.join(directory))
+
+class MappedCourtQuery(object):
+    """The find() of CourtQuery, answered straight from a file written by CourtQuery.save()
+
+    Opening only reads the header and index directory; rows are decoded from JSON as lookups return them.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.row_count, index_count = HEADER.unpack_from(self.map, 0)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a court query index (version {})".format(path, VERSION))
+
+        self.tables = {}
+
+        for i in range(index_count):
+            name, table_at, slot_count = DIRECTORY.unpack_from(self.map, HEADER.size + i * DIRECTORY.size)
+            self.tables[name.rstrip(b'\0').decode('ascii')] = (table_at, slot_count)
+
+        self.rows_at = HEADER.size + index_count * DIRECTORY.size
+
+    def __len__(self):
+        return self.row_count
+
+    def row(self, position):
+        start, end = struct.unpack_from('<QQ', self.map, self.rows_at + position * OFFSET.size)
+
+        return json.loads(self.map[start:end].decode('utf-8'))
+
+    def positions(self, index, value):
+        """Positions of the rows filed under `value` in `index`, without decoding the rows"""
+
+        key = normalise(value)
+
+        if not key:
+            return ()
+
+        key = key.encode('utf-8')
+        table_at, slot_count = self.tables[index]
+        h = key_hash(key)
+        slot = h & (slot_count - 1)
+
+        while True:
+            slot_hash, entry_at = SLOT.unpack_from(self.map, table_at + slot * SLOT.size)
+
+            if not entry_at:
+                return ()
+
+            if slot_hash == h:
+                length, = LENGTH.unpack_from(self.map, entry_at)
+                start = entry_at + LENGTH.size
+
+                if self.map[start:start + length] == key:
+                    count, = COUNT.unpack_from(self.map, start + length)
+                    return struct.unpack_from('<{}I'.format(count), self.map, start + length + COUNT.size)
+
+            slot = (slot + 1) & (slot_count - 1)
+
+    def find(self, index, value):
+        return [self.row(position) for position in self.positions(index, value)]
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
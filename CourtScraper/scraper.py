@@ -0,0 +1,675 @@
+"""scraper.py - crawling, collecting and processing UK court listings: the pipeline stages cli.py runs, and the functions they are built from"""
+
+import io
+import os
+import time
+import threading
+import multiprocessing
+from functools import partial
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from . import parsing
+from .fetch import Fetcher
+from .manifest import page_digest
+from .metrics import Metrics
+from .discovery import COURT_PATH, canonical_url, court_letter, sitemap_listing
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from .model import Address, Contact, CourtRecord
+from .textnorm import COLON_LINE, process_flat_address, process_single_and_multi_line_address, remove_matched_line, remove_colon, remove_newlines, is_solicitor, enquiries_line
+
+############################################################################################
+### EXTRACT THE NECESSARY DATA FROM COLLECTED DICTIONARIES AND READY IT FOR WRITE TO CSV ###
+############################################################################################
+
+def enquiry_telephones(record):
+    """The court's enquiries telephone numbers"""
+
+    contact = record.contact('telephone', 'Enquiries:')
+
+    return [number for number in contact.values if number] if contact else []
+
+def enquiry_emails(record):
+    """The court's enquiries email addresses, leaving out any meant for solicitors
+
+    When there is no "Enquiries:" email, falls back to the first line of any contact detail that mentions enquiries.
+    """
+
+    contact = record.contact('email', 'Enquiries:')
+
+    #   >   [u'rcjbankclccdjhearings@hmcts.gsi.gov.uk', u'rcjcompgenclcc@hmcts.gsi.gov.uk']
+    if contact and any(contact.values):
+        return [email for email in contact.values if email and not is_solicitor(email)]
+
+    emails = []
+
+    for contact in record.contacts:
+        for line in contact.values:
+            if not is_solicitor(line):
+                enquiries = enquiries_line(line)
+
+                if enquiries:
+                    emails.append(enquiries)
+
+    return emails
+
+def standardise_record(record):
+    """Takes a CourtRecord and flattens the relevant parts of it into a standardised row, the form every sink in sinks.py writes
+
+    Record example:
+    CourtRecord(u'Aberystwyth Justice Centre', u'https://courttribunalfinder.service.gov.uk//courts/aberystwyth-justice-centre',
+        addresses=[Address(u'visiting', [u'Aberystwyth Justice Centre', u'Y Lanfa', u'Trefechan'], town=u'Aberystwyth', region=u'Ceredigion', postcode=u'SY23 1AS')],
+        contacts=[Contact(u'telephone', u'Enquiries:', [u'01970 621 250']), Contact(u'email', u'County Court:', [u'enquiries@aberystwyth.countycourt.gsi.gov.uk'])],
+        codes={u'Crown Court location code': u'3253', u'DX': u'99560 Aberystwyth 2', u'County Court location code': u'102'})
+    --->
+    {'court_name': u'Aberystwyth Justice Centre', 'url': u'https://courttribunalfinder.service.gov.uk//courts/aberystwyth-justice-centre',
+     'crown_court_id': u'3253', 'county_court_id': u'102', 'dx': u'99560 Aberystwyth 2', 'telephones': [u'01970 621 250'], 'emails': [],
+     'visiting_street_address': u'Aberystwyth Justice Centre\nY Lanfa\nTrefechan', 'visiting_town': u'Aberystwyth', 'visiting_region': u'Ceredigion', 'visiting_postcode': u'SY23 1AS',
+     'postal_street_address': None, 'postal_town': None, 'postal_region': None, 'postal_postcode': None}
+    """
+
+    row = {
+            'court_name' : record.name,
+            'url' : record.url,
+            'crown_court_id' : record.crown_court_id,
+            'county_court_id' : record.county_court_id,
+            'dx' : record.dx,
+            'telephones' : enquiry_telephones(record),
+            'emails' : enquiry_emails(record),
+    }
+
+    for kind in ('visiting', 'postal'):
+        address = record.address(kind)
+
+        row[kind + '_street_address'] = address.street_address if address else None
+        row[kind + '_town'] = address.town if address else None
+        row[kind + '_region'] = address.region if address else None
+        row[kind + '_postcode'] = address.postcode if address else None
+
+    return row
+
+
+
+#######################################
+### PROCESS ADDRESSES BASED ON TYPE ###
+#######################################
+
+def process_span_address(kind, addr_block):
+    """         Takes a block of HTML with multiple tags like <span property="SomeProperty">SomeText</span> and gives you a beautiful Address, with the streetAddress split into lines
+    ---------------
+    [<span property="streetAddress">\n            \n              Aberystwyth Justice Centre <br/>\n            \n              Y Lanfa<br/>\n            \n              Trefechan<br/>\n</span>, <span property="addressLocality">Aberystwyth</span>, <span property="addressRegion">Ceredigion</span>, <span property="postalCode">SY23 1AS</span>]
+    --->
+    Address(u'visiting', [u'Aberystwyth Justice Centre', u'Y Lanfa', u'Trefechan'], town=u'Aberystwyth', region=u'Ceredigion', postcode=u'SY23 1AS')
+    """
+
+    #   Process each line into {property : text} for each span tag
+    properties = {span.get('property') : process_single_and_multi_line_address(span.text) for span in addr_block}
+
+    street = properties.get('streetAddress') or []
+
+    return Address(
+        kind,
+        street if isinstance(street, list) else [street],
+        town=properties.get('addressLocality'),
+        region=properties.get('addressRegion'),
+        postcode=properties.get('postalCode')
+        )
+
+###############################################################################
+### COLLECT EVERYTHING CONTAINED WITH THE ADDRESS, CONTACT AND CODES BLOCKS ###
+###############################################################################
+
+def extract_court_details(full_link, html=None, court_name=None):
+    """         Takes in a link of a court page and fills a CourtRecord straight from the items available on it:
+
+        addresses (Address):
+    [Address(u'visiting', [u'Russell House', u'King Street'], town=u'Ayr', region=u'Ayrshire', postcode=u'KA8 0BD'), Address(u'postal', [u'The Glasgow Tribunals Centre', u'20 York Street', u'Glasgow', u'G2 8GT'])]
+
+        contacts (Contact):
+    [Contact(u'email', u'Employment tribunal:', [u'aberdeenet@justice.gov.uk']), Contact(u'telephone', u'Employment tribunal:', [u'01224 593  137']), Contact(u'telephone', u'Fax:', [u'0870 761 7766'])]
+
+        codes ("pros"):
+    {u'DX': u'44457 Strand'}
+    {u'Crown Court location code': u'401'}
+
+    Pass `html` when the page has already been fetched, to parse it instead of downloading it again. Without a
+    `court_name` (e.g. for a page saved to disk), the name is taken from the page's <h1>.
+    """
+
+    if html is None:
+        with METRICS.time('fetch'):
+            html = FETCHER.get(full_link)
+
+    with METRICS.time('parse'):
+        page = parsing.parse_court_page(html)
+
+    with METRICS.time('extract'):
+        return extract_record(page, full_link, court_name)
+
+def extract_record(page, full_link, court_name=None):
+    """Fills the CourtRecord for extract_court_details() from a court page already parsed with parsing.parse_court_page()"""
+
+    #   Main chunk of content containing Addresses, Contacts and Codes
+    content_block = page.find('div', {'class': 'content inner cf court'})
+
+    #   Address-containing chunk
+    address_block = content_block.find('div', {'id': 'addresses'})
+
+    #   Contact-containing chunk
+    contact_block = content_block.find('div', {'id': 'contacts'})
+
+    if court_name is None:
+        heading = content_block.find('h1')
+        court_name = heading.text.strip() if heading else None
+
+
+    #########################
+    ##  Process Addresses  ##
+    #########################
+
+    #   List of addresses, as there may be "Visiting" and "Postal" (which could be in the span format or flat-text format)
+    addresses = []
+
+    #   Collect all the items, skipping "pros" for now
+    for item in address_block.find_all('div', attrs={'id': lambda x: x !='pros'}):
+
+        #   Is it a span address?
+        if item.find('span'):
+            addresses.append(process_span_address(item['id'], item.find_all('span')))
+
+        #   Is it a flat address?
+        else:
+            flat_address = ''.join(text for text in item(string=True) if text.parent.name !="h2")
+            # split by address line, dropping labels such as "Civil and family enquiries:"
+            addresses.append(Address(item['id'], remove_matched_line(COLON_LINE, process_flat_address(flat_address))))
+
+
+    #############################
+    ##  Process Pros / Codes   ##
+    #############################
+
+    pros = {}
+
+    if address_block.find('div', attrs={'id': 'pros'}):
+        dl = address_block.find('div', attrs={'id': 'pros'})
+        pros = dict(zip([(remove_colon(x.text)) for x in dl.find_all('dt')], [(remove_colon(y.text)) for y in dl.find_all('dd')]))
+
+
+    #########################
+    ##  Process Contacts   ##
+    #########################
+
+    #   Collect div elements excluding spacers
+    contact_divs = contact_block.find_all('div', attrs={'class': lambda x: x !='spacer'})
+
+    contact_category = []
+    #   example:    [u'email', u'telephone', u'telephone', u'telephone', u'telephone', u'telephone', u'telephone', u'telephone', u'telephone']
+    contact_category_keys = []
+    #   example:    [u'', u'Enquiries:', u'Registry:', u'Associates:', u'Case progression (A):(Phones will only be answered between 10am-12pm and 2pm-4pm)', u'Case progression (B):(Phones will only be answered between 10am-12pm and 2pm-4pm)', u'Case progression (C):(Phones will only be answered between 10am-12pm and 2pm-4pm)', u'Listing:', u'Disabled access:']
+    contact_category_values = []
+    #   example:    [[u'civilappeals.registry@hmcts.gsi.gov.uk', u'civilappeals.cmsa@hmcts.gsi.gov.uk', u'civilappeals.listing@hmcts.gsi.gov.uk'], [u'020 7947 6916'], [u'020 7947 7121'], [u'020 7947 6879']]
+
+
+    for block in contact_divs:
+        """     block:
+        ...
+        <span class="label-pad" property="contactType" typeof="ContactPoint">Enquiries:</span>                                                                  <- contact_category_keys
+        <div class="email-addresses">
+        <a href="mailto:birmingham.enquiries@birmingham.crowncourt.gsi.gov.uk" property="email">birmingham.enquiries@birmingham.crowncourt.gsi.gov.uk</a>       <- contact_category, contact_category_values
+        </div>
+        <div class="phone-number">
+        <a href="tel:0121  681 3300" property="telephone">0121  681 3300</a><br/>                                                                               <- contact_category, contact_category_values
+        <a href="tel:0121 681 3339" property="telephone">0121 681 3339</a>
+        </div>
+        ...
+        """
+
+        #   Get contact_category_keys
+        if not block.find('a'):
+            dkeys = remove_newlines(block.text.strip())
+            contact_category_keys.append(dkeys)
+
+        #   If more than one, get list of contact_category_values == 'email'
+        elif len(block.find_all('a', {'property' : 'email'})) > 1:
+
+            contact_category.append(block.a.attrs['property'])
+
+            multi_emails = []
+            multi_emails_found = block.find_all('a', {'property' : 'email'})
+
+            for i in multi_emails_found:
+                multi_emails.append(i.text)
+
+            contact_category_values.append(multi_emails)
+
+        #   If more than one, get list of contact_category_values == 'telephone'
+        elif len(block.find_all('a', {'property' : 'telephone'})) > 1:
+
+            contact_category.append(block.a.attrs['property'])
+
+            multi_telephones = []
+            multi_telephones_found = block.find_all('a', {'property' : 'telephone'})
+
+            for i in multi_telephones_found:
+                multi_telephones.append(i.text)
+
+            contact_category_values.append(multi_telephones)
+
+        #   If just one item
+        else:
+            contact_category.append(block.a.attrs['property'])
+            dvalues = remove_newlines(block.text.strip())
+            contact_category_values.append([dvalues])
+
+    #   Pair each label with the category and values in the same position, e.g. Contact("email", "Enquiries:", [...])
+    contacts = [Contact(category, label, values) for label, category, values in zip(contact_category_keys, contact_category, contact_category_values)]
+
+    return CourtRecord(court_name, full_link, addresses, contacts, pros)
+
+
+
+##################################
+### EXTRACT COURT NAME AND URL ###
+##################################
+
+def get_courts(base, buff, char):
+    """Works through A-Z of courts Index pages and returns the Court Name and URL link to Court Address page"""
+
+    url = base + buff + str(chr(char))
+
+    with METRICS.time('index'):
+        return court_links(parsing.parse_index_page(FETCHER.get(url)), base)
+
+def court_links(page, base):
+    """The {court name: court URL} listed on an index page already parsed with parsing.parse_index_page()"""
+
+    links = page.find('div', {'class', 'content inner cf'}).find('ul')
+
+    name_link_dict = {}
+
+    for item in links.find_all('a', href=True):
+
+        if len(item.string) > 1:
+            court_link = item['href']
+            court_name = item.string
+
+            court_detail_url = base + court_link
+
+            name_link_dict[court_name] = court_detail_url
+
+    return name_link_dict
+    """     Outbound "name_link_dict":
+    {u'Agricultural Land and Drainage - First-tier Tribunal (Property Chamber) ': u'https://courttribunalfinder.service.gov.uk//courts/first-tier-tribunal-property-chamber-agricultural-land-and-drainage', u'Ashford Tribunal Hearing Centre': u'https://courttribunalfinder.service.gov.uk//courts/ashford-tribunal-hearing-centre', u'Administrative Court': u'https://courttribunalfinder.service.gov.uk//courts/administrative-court', u'Admiralty and Commercial Court': u'https://courttribunalfinder.service.gov.uk//courts/admiralty-and-commercial-court', u'Amersham Law Courts': u'https://courttribunalfinder.service.gov.uk//courts/amersham-law-courts', u'Ayr Social Security and Child Support Tribunal': u'https://courttribunalfinder.service.gov.uk//courts/ayr-social-security-and-child-support-tribunal', u'Aylesbury Crown Court': u'https://courttribunalfinder.service.gov.uk//courts/aylesbury-crown-court', u'Aberystwyth Justice Centre': u'https://courttribunalfinder.service.gov.uk//courts/aberystwyth-justice-centre', u'Aldershot Justice Centre': u'https://courttribunalfinder.service.gov.uk//courts/aldershot-magistrates-court', u'Avon and Somerset Central Accounts Department': u'https://courttribunalfinder.service.gov.uk//courts/avon-and-somerset-central-accounts-department', u'Aberdeen Tribunal Hearing Centre': u'https://courttribunalfinder.service.gov.uk//courts/aberdeen-employment-tribunal'}
+    """
+
+
+
+##############################################
+### STREAMING PIPELINE: INDEX PAGES TO CSV ###
+##############################################
+
+"""     Every stage is a generator that takes the items of the stage before it and yields them on, so the crawl is just:
+
+    discover_courts -> fetch_pages -> [skip_unchanged] -> parse_pages -> standardise_records -> [remember_rows] -> write_rows
+
+Items are small dictionaries, filled in a little more by each stage:
+    {"court": ..., "url": ...}  ->  + "html"  ->  + "record", a CourtRecord (html dropped)  ->  + "row"
+
+so a pipeline can be started from any stage, e.g. parse_pages(load_saved_pages(paths)) for HTML saved to disk.
+"""
+
+def buffered(iterable, maxsize=64):
+    """Runs `iterable` in a background thread, keeping up to `maxsize` of its items waiting in a bounded queue
+
+    Puts a stage in its own thread so it works ahead of the stage consuming it, while the bounded queue keeps memory
+    flat however far ahead it could get. Exceptions raised by the stage are re-raised in the consumer.
+    """
+
+    items = queue.Queue(maxsize)
+    stop = threading.Event()
+    done = object()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+
+            put((done, None))
+
+        except Exception as e:
+            put((done, e))
+
+    producer = threading.Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+
+    try:
+        while True:
+            item, error = items.get()
+
+            if item is done:
+                if error:
+                    raise error
+                return
+
+            yield item
+
+    finally:
+        #   Also reached when the consumer stops early, which lets the producer thread give up instead of blocking forever
+        stop.set()
+
+def ordered_map(executor, fn, iterable, window):
+    """Like executor.map(), but only pulls `window` items ahead of the consumer, and still yields results in input order
+
+    Results are yielded in the order the arguments came in, so output stays deterministic no matter which fetch finishes first.
+    """
+
+    pending = deque()
+
+    for args in iterable:
+        pending.append(executor.submit(fn, *args))
+
+        if len(pending) >= window:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+def index_listing(base, buff, letters=range(65, 91), workers=8, skip=()):
+    """Yields (letter, [(court name, url), ...] sorted by name) for every letter, fetching up to `workers` index pages at once
+
+    Letters come out in order, each as soon as its page is in, so court pages under A are already being fetched while
+    later index pages are still on their way. Letters in `skip` are not fetched, and come out with no courts.
+    """
+
+    def list_letter(i):
+        return chr(i), ([] if chr(i) in skip else sorted(get_courts(base, buff, i).items()))
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    try:
+        for letter, courts in ordered_map(executor, list_letter, ((i,) for i in letters), workers):
+            yield letter, courts
+    finally:
+        executor.shutdown(wait=False)
+
+def discover_courts(base, buff, letters=range(65, 91), checkpoint=None, workers=8, sitemap=None, court_index=None):
+    """Yields {"letter", "court", "url"} for every court, in letter order, from the A-Z index pages or a sitemap
+
+    A court listed under several letters (or in several sitemaps) is only yielded the first time. Every court found is
+    recorded in `court_index` (a discovery.CourtIndex), if given.
+
+    When resuming from a checkpoint, courts it already holds are yielded as their finished items instead (which later
+    stages pass straight through), and index pages of letters it has finished are not even fetched again.
+    """
+
+    done = checkpoint.letters if checkpoint else set()
+
+    if sitemap:
+        listing = sitemap_listing(FETCHER.get, sitemap)
+    else:
+        listing = index_listing(base, buff, letters, workers, skip=done)
+
+    seen = set()
+
+    for letter, courts in listing:
+
+        if letter in done:
+            courts = [(item["court"], item["url"]) for item in checkpoint.finished_courts(letter)]
+
+        for court_name, url in courts:
+            key = canonical_url(url)
+
+            if key in seen:
+                continue
+
+            seen.add(key)
+
+            if court_index:
+                court_index.see(url, court_name, letter)
+
+            resumed = checkpoint.resumed_item(url) if checkpoint else None
+
+            yield resumed or {"letter" : letter, "court" : court_name, "url" : url}
+
+def fetch_page(item):
+    if "row" not in item:
+        with METRICS.time('fetch'):
+            item["html"] = FETCHER.get(item["url"])
+
+    return item
+
+def fetch_pages(items, workers=8):
+    """Downloads each item's page using a pool of `workers` threads, yielding items in the order they came in"""
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    try:
+        for item in ordered_map(executor, fetch_page, ((item,) for item in items), workers * 2):
+            yield item
+    finally:
+        executor.shutdown(wait=False)
+
+def saved_pages(paths):
+    """Yields {"url"} for court pages saved to disk, for parse_pages_in_processes() to read in its workers"""
+
+    for path in paths:
+        yield {"court" : None, "url" : path}
+
+def load_saved_pages(paths):
+    """Yields {"url", "html"} for court pages saved to disk, ready for parse_pages(); the court name is read from the page"""
+
+    for path in paths:
+        with io.open(path, encoding='utf-8') as f:
+            yield {"court" : None, "url" : path, "html" : f.read()}
+
+def load_archived_pages(archive):
+    """Yields {"letter", "url", "html"} for every court page in an archive.ArchiveReader, in a crawl's order
+
+    A crawl writes courts letter by letter, and by name within a letter. The archive keeps no names, so pages come out by
+    letter and then by canonical URL, whose slug follows the name; re-parsing an archive then writes its rows in (nearly
+    always) the order the crawl that made it did, rather than the order the pages lie on disk.
+    """
+
+    courts = []
+
+    for url in archive.urls():
+        found = COURT_PATH.search(url)
+
+        if found:
+            courts.append((court_letter(found.group(1)), canonical_url(url), url))
+
+    for letter, key, url in sorted(courts):
+        yield {"letter" : letter, "court" : None, "url" : url, "html" : archive.get(url)}
+
+def skip_unchanged(items, manifest):
+    """Gives items whose page has not changed since the manifest last saw it their previous row, so later stages skip them"""
+
+    for item in items:
+        if "row" not in item:
+            item["digest"] = page_digest(item["court"], item["html"])
+            row = manifest.lookup(item["url"], item["digest"])
+
+            if row:
+                item["row"] = row
+                item["unchanged"] = True
+
+        #   Resumed from a checkpoint: found unchanged by the interrupted run, so let the manifest know it was seen
+        elif item.get("unchanged"):
+            manifest.lookup(item["url"], item["digest"])
+
+        yield item
+
+def parse_pages(items):
+    """Extracts addresses, contacts and codes from each item's page into a CourtRecord"""
+
+    for item in items:
+        if "row" not in item:
+            item["record"] = extract_court_details(item["url"], item.pop("html"), item.get("court"))
+            item["court"] = item["record"].name
+
+        yield item
+
+def parse_chunk(chunk, backend):
+    """Parses and standardises a list of items in a worker process; items without "html" are saved pages, read from "url"
+
+    Runs in a fresh process under spawn (Windows), so the parser backend is passed in rather than inherited.
+    """
+
+    parsing.set_backend(backend)
+
+    for item in chunk:
+        if "row" not in item:
+            html = item.pop("html", None)
+
+            if html is None:
+                with io.open(item["url"], encoding='utf-8') as f:
+                    html = f.read()
+
+            record = extract_court_details(item["url"], html, item.get("court"))
+            item["court"] = record.name
+            item["row"] = standardise_record(record)
+
+    return chunk
+
+def chunked(items, size):
+    chunk = []
+
+    for item in items:
+        chunk.append(item)
+
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+def parse_pages_in_processes(items, processes=None, chunk_size=16):
+    """parse_pages() and standardise_records() in one, spread over `processes` worker processes (default: one per core)
+
+    BeautifulSoup and the regex cleaners hold the GIL, so threads cannot share that work out; processes can. Items go
+    to the workers `chunk_size` at a time, which keeps the cost of pickling them small next to the parsing, and only a
+    few chunks per process are in flight, so memory stays flat. Results come back in the order the items went in.
+    """
+
+    processes = processes or multiprocessing.cpu_count()
+    executor = ProcessPoolExecutor(max_workers=processes)
+
+    try:
+        for chunk in ordered_map(executor, parse_chunk, ((chunk, parsing.backend()) for chunk in chunked(items, chunk_size)), processes * 2):
+            for item in chunk:
+                yield item
+    finally:
+        executor.shutdown(wait=False)
+
+def standardise_records(items):
+    for item in items:
+        if "row" not in item:
+            #   standardise the structure of the collected elements ready to be written to csv
+            with METRICS.time('standardise'):
+                item["row"] = standardise_record(item["record"])
+
+        yield item
+
+def remember_rows(items, manifest):
+    """Records freshly parsed rows in the manifest"""
+
+    for item in items:
+        #   Resumed from the checkpoint of a run without --incremental, which never fingerprinted the page: the court
+        #   is still there, but without a digest its row cannot be stored, so whatever the manifest held for it stands
+        if "digest" not in item:
+            manifest.keep(item["url"])
+        elif not item.get("unchanged"):
+            manifest.update(item["url"], item["digest"], item["row"])
+
+        yield item
+
+def checkpoint_items(items, checkpoint, letters=range(65, 91)):
+    """Journals every finished court, and every letter once the first court of a later one (or the end) comes through"""
+
+    pending = [chr(i) for i in letters if chr(i) not in checkpoint.letters]
+
+    for item in items:
+        while pending and pending[0] < item["letter"]:
+            checkpoint.record_letter(pending.pop(0))
+
+        if not item.get("resumed"):
+            checkpoint.record_court(item)
+
+        yield item
+
+    while pending:
+        checkpoint.record_letter(pending.pop(0))
+
+def write_rows(items, sinks):
+    """Writes each item's row to every sink (see sinks.py), then passes the item on (e.g. for progress reporting)"""
+
+    for item in items:
+        with METRICS.time('write'):
+            for sink in sinks:
+                sink.write(item["row"])
+
+        METRICS.record_court(item.get("letter"))
+
+        yield item
+
+def crawl(base, buff, workers=8, manifest=None, queue_size=64, checkpoint=None, sitemap=None, court_index=None):
+    """Chains the stages for a full A-Z crawl, each in its own thread with a bounded queue to the next"""
+
+    items = buffered(discover_courts(base, buff, checkpoint=checkpoint, workers=workers, sitemap=sitemap, court_index=court_index), queue_size)
+    items = buffered(fetch_pages(items, workers), queue_size)
+
+    if manifest:
+        items = skip_unchanged(items, manifest)
+
+    items = buffered(parse_pages(items), queue_size)
+    items = standardise_records(items)
+
+    if manifest:
+        items = remember_rows(items, manifest)
+
+    if checkpoint:
+        items = checkpoint_items(items, checkpoint)
+
+    return items
+
+def saved_page_paths(paths):
+    """Expands directories into the .html files inside them, sorted so output order is stable"""
+
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.html'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+
+####################
+### SHARED STATE ###
+####################
+
+#   Shared by get_courts() and extract_court_details(); cli.py swaps in one configured from the command line
+FETCHER = Fetcher()
+
+#   Timings of every pipeline stage, reported when the run ends
+METRICS = Metrics()
+
+def soup(url): return parsing.make_soup(FETCHER.get(url))
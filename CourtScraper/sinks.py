@@ -0,0 +1,352 @@
+"""sinks.py - batched writers that export standardised court rows as CSV, JSON Lines, Parquet, Arrow, a query index or a snapshot"""
+
+import io
+import os
+import sys
+import json
+import tempfile
+from .manifest import replace
+
+#   The standardised row CourtScraper.standardise_record() builds for every court, in output column order
+FIELDS = [
+    'court_name', 'url', 'crown_court_id', 'county_court_id', 'dx', 'telephones', 'emails',
+    'visiting_street_address', 'visiting_town', 'visiting_region', 'visiting_postcode',
+    'postal_street_address', 'postal_town', 'postal_region', 'postal_postcode'
+    ]
+
+#   Fields holding a list of strings rather than a single string
+LIST_FIELDS = ('telephones', 'emails')
+
+#   Fields with few distinct values, stored dictionary-encoded by the columnar sinks
+DICTIONARY_FIELDS = ('visiting_town', 'visiting_region', 'postal_town', 'postal_region')
+
+#   The original CSV layout: (CSV header, row field)
+CSV_COLUMNS = [
+    ('court name', 'court_name'), ('crown court id', 'crown_court_id'), ('county court id', 'county_court_id'),
+    ('telephone', 'telephones'), ('email', 'emails'),
+    ('visiting - street address', 'visiting_street_address'), ('visiting - town', 'visiting_town'), ('visiting - region', 'visiting_region'),
+    ('postal - street address', 'postal_street_address'), ('postal - town', 'postal_town'), ('postal - region', 'postal_region')
+    ]
+
+CSV_FIELDS = [header for header, field in CSV_COLUMNS]
+
+def list2line(a_list):
+    """ Takes in a list of items and converts them into a comma seperated list, so that in CSV they're stored as CS-strings"""
+
+    try:
+        return ','.join(a_list)
+    except:
+        return None
+
+def csv_row(row):
+    """Flattens a standardised row into the CSV layout; csv on Python 2 only writes byte strings, so unicode is encoded to UTF-8"""
+
+    flat = {header : (list2line(row.get(field)) if field in LIST_FIELDS else row.get(field)) for header, field in CSV_COLUMNS}
+
+    if sys.version_info[0] > 2:
+        return flat
+
+    return {k : (v.encode('utf-8') if isinstance(v, type(u'')) else v) for k, v in flat.items()}
+
+
+
+#################
+### SINK BASE ###
+#################
+
+class Sink(object):
+    """Collects rows and hands them to write_batch(rows), which each format defines, `batch_size` at a time
+
+    Unless appending, output goes to a temp file next to `path` that only replaces `path` once the sink is closed
+    without an error, so an interrupted export never leaves a half-written file behind. Use as a context manager, or
+    call close() (commit=False to throw the output away).
+    """
+
+    extensions = ()
+    can_append = False
+
+    def __init__(self, path, batch_size=1000, append=False):
+        if append and not self.can_append:
+            raise ValueError("{} cannot append to an existing file".format(type(self).__name__))
+
+        self.path = path
+        self.batch_size = batch_size
+        self.batch = []
+        self.count = 0
+        self.tmp_path = None
+
+        if append:
+            self.target = path
+        else:
+            fd, self.tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=os.path.dirname(os.path.abspath(path)))
+            os.close(fd)
+            self.target = self.tmp_path
+
+        try:
+            self.open(append)
+        except Exception:
+            if self.tmp_path:
+                os.remove(self.tmp_path)
+            raise
+
+    def open(self, append):
+        pass
+
+    def finish(self, commit):
+        """Completes the output; with commit False the output is about to be thrown away, so only release what is held"""
+
+        pass
+
+    def write(self, row):
+        self.batch.append(row)
+        self.count += 1
+
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.write_batch(self.batch)
+            self.batch = []
+
+    def close(self, commit=True):
+        committed = False
+
+        try:
+            try:
+                if commit:
+                    self.flush()
+            except BaseException:
+                commit = False
+                raise
+            finally:
+                self.finish(commit)
+
+            committed = commit
+        finally:
+            #   Whatever failed above, the temp file never outlives the sink
+            if self.tmp_path:
+                if committed:
+                    replace(self.tmp_path, self.path)
+                elif os.path.exists(self.tmp_path):
+                    os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+
+
+
+########################
+### TEXT-BASED SINKS ###
+########################
+
+class CsvSink(Sink):
+    """The original export: one CSV row per court, list fields comma-joined, headers as in CSV_FIELDS"""
+
+    extensions = ('.csv',)
+    can_append = True
+
+    def open(self, append):
+        import csv
+
+        #   Appending to an existing export carries on under the header it already has
+        needs_header = not (append and os.path.exists(self.target) and os.path.getsize(self.target))
+
+        if sys.version_info[0] > 2:
+            self.file = io.open(self.target, 'a' if append else 'w', newline='', encoding='utf-8')
+        else:
+            self.file = open(self.target, 'ab' if append else 'wb')
+
+        self.writer = csv.DictWriter(self.file, fieldnames = CSV_FIELDS)
+
+        if needs_header:
+            self.writer.writeheader()
+
+    def write_batch(self, rows):
+        self.writer.writerows(csv_row(row) for row in rows)
+
+    def finish(self, commit):
+        self.file.close()
+
+class JsonLinesSink(Sink):
+    """One JSON object per line and per court, list fields as JSON arrays"""
+
+    extensions = ('.jsonl', '.ndjson')
+
+    def open(self, append):
+        self.file = open(self.target, 'wb')
+
+    def write_batch(self, rows):
+        lines = [json.dumps({field : row.get(field) for field in FIELDS}, sort_keys=True, ensure_ascii=False) for row in rows]
+        self.file.write((u"\n".join(lines) + u"\n").encode('utf-8'))
+
+    def finish(self, commit):
+        self.file.close()
+
+
+
+######################
+### COLUMNAR SINKS ###
+######################
+
+def arrow_schema(pa):
+    return pa.schema([
+        pa.field(field,
+            pa.list_(pa.string()) if field in LIST_FIELDS else
+            pa.dictionary(pa.int32(), pa.string()) if field in DICTIONARY_FIELDS else
+            pa.string())
+        for field in FIELDS
+        ])
+
+def arrow_table(pa, schema, rows, vocabularies=None):
+    """Builds one typed Arrow table (e.g. one Parquet row group) from a batch of rows
+
+    Dictionary fields get a dictionary of their own per batch, unless `vocabularies` ({field: [values seen so far]}) is
+    given: then every batch shares one dictionary that only ever grows, as the Arrow IPC file format requires.
+    """
+
+    columns = []
+
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+
+        if field.name in DICTIONARY_FIELDS and vocabularies is not None:
+            vocabulary, positions = vocabularies.setdefault(field.name, ([], {}))
+
+            for value in values:
+                if value is not None and value not in positions:
+                    positions[value] = len(vocabulary)
+                    vocabulary.append(value)
+
+            indices = pa.array([positions.get(value) for value in values], type=pa.int32())
+            columns.append(pa.DictionaryArray.from_arrays(indices, pa.array(vocabulary, type=pa.string())))
+
+        elif field.name in DICTIONARY_FIELDS:
+            columns.append(pa.array(values, type=pa.string()).dictionary_encode())
+
+        else:
+            columns.append(pa.array(values, type=field.type))
+
+    return pa.Table.from_arrays(columns, schema=schema)
+
+def import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Arrow output need pyarrow: pip install pyarrow")
+
+    return pyarrow
+
+class ParquetSink(Sink):
+    """A Parquet file with one row group per batch: typed list columns for telephones / emails, dictionary-encoded towns and regions"""
+
+    extensions = ('.parquet',)
+
+    def open(self, append):
+        self.pa = import_pyarrow()
+        import pyarrow.parquet as pq
+
+        self.schema = arrow_schema(self.pa)
+        self.writer = pq.ParquetWriter(self.target, self.schema, compression='snappy')
+
+    def write_batch(self, rows):
+        self.writer.write_table(arrow_table(self.pa, self.schema, rows))
+
+    def finish(self, commit):
+        self.writer.close()
+
+class ArrowSink(Sink):
+    """An Arrow IPC (Feather v2) file with one record batch per batch, same columns as ParquetSink"""
+
+    extensions = ('.arrow', '.feather')
+
+    def open(self, append):
+        self.pa = import_pyarrow()
+
+        self.schema = arrow_schema(self.pa)
+        self.vocabularies = {}
+        self.writer = self.pa.ipc.new_file(self.target, self.schema, options=self.pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+    def write_batch(self, rows):
+        self.writer.write_table(arrow_table(self.pa, self.schema, rows, self.vocabularies))
+
+    def finish(self, commit):
+        self.writer.close()
+
+
+
+#############################
+### INDEXES AND SNAPSHOTS ###
+#############################
+
+class QueryIndexSink(Sink):
+    """The hash indexes of query.py, saved for MappedCourtQuery; built in memory, so written out once every row is in"""
+
+    extensions = ('.idx',)
+
+    def open(self, append):
+        self.rows = []
+
+    def write_batch(self, rows):
+        self.rows.extend(rows)
+
+    def finish(self, commit):
+        if not commit:
+            return
+
+        from . import query
+
+        with open(self.target, 'wb') as f:
+            query.write_index(f, self.rows, query.build(self.rows).indexes)
+
+
+
+class SnapshotSink(Sink):
+    """A snapshot.py snapshot of the crawl: every court's row and fingerprint, sorted by URL for diffing against the next"""
+
+    extensions = ('.snap',)
+
+    def open(self, append):
+        self.rows = []
+
+    def write_batch(self, rows):
+        self.rows.extend(rows)
+
+    def finish(self, commit):
+        if not commit:
+            return
+
+        from . import snapshot
+
+        with open(self.target, 'wb') as f:
+            snapshot.write_snapshot(f, snapshot.take(self.rows))
+
+
+
+################
+### REGISTRY ###
+################
+
+SINKS = {'csv': CsvSink, 'jsonl': JsonLinesSink, 'parquet': ParquetSink, 'arrow': ArrowSink, 'index': QueryIndexSink, 'snapshot': SnapshotSink}
+
+def sink_for(path, format=None):
+    """The Sink class for `format`, or else for the extension of `path`"""
+
+    if format:
+        return SINKS[format]
+
+    extension = os.path.splitext(path)[1].lower()
+
+    for sink in SINKS.values():
+        if extension in sink.extensions:
+            return sink
+
+    raise ValueError("cannot tell the output format of {!r}; use one of: {}".format(path, ", ".join(sorted(SINKS))))
+
+def open_sink(path, format=None, batch_size=1000, append=False):
+    sink = sink_for(path, format)
+
+    return sink(path, batch_size, append and sink.can_append)
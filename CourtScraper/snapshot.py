@@ -0,0 +1,170 @@
+"""snapshot.py - one file per crawl holding every court's row and fingerprint, and a diff between two of them
+
+    python -m CourtScraper snapshot take dictwrite.jsonl courts.snap
+    python -m CourtScraper snapshot diff yesterday.snap today.snap [--output delta.jsonl]
+
+or write a snapshot during a crawl, as one of its outputs: python -m CourtScraper --output dictwrite.csv courts.snap
+
+A snapshot is JSON Lines: a header line, then {"url", "fingerprint", "row"} per court, one per URL, sorted by URL. Being
+sorted, two snapshots are diffed in a single pass over both, without holding either in memory. The "url" is canonical
+(see discovery.canonical_url), so courts match across crawls that found them through the index pages or a sitemap; the
+row keeps the URL as crawled.
+"""
+
+import io
+import json
+import time
+import hashlib
+
+#   Format 1 keyed courts by their URL as crawled; its snapshots are still read, their URLs made canonical as they are
+FORMAT = 2
+
+#   Fields compared by a diff, grouped as the downstream systems think of them
+FIELD_GROUPS = (
+    ('name', ('court_name',)),
+    ('codes', ('crown_court_id', 'county_court_id', 'dx')),
+    ('telephone', ('telephones',)),
+    ('email', ('emails',)),
+    ('address', ('visiting_street_address', 'visiting_town', 'visiting_region', 'visiting_postcode',
+                 'postal_street_address', 'postal_town', 'postal_region', 'postal_postcode')),
+    )
+
+FIELDS = [field for group, fields in FIELD_GROUPS for field in fields]
+
+#   Compared as sets: the same numbers listed in another order are not a change
+LIST_FIELDS = ('telephones', 'emails')
+
+def canonical(row):
+    """The compared fields of a row, with list fields sorted and blanks as None"""
+
+    return dict((field, sorted(row.get(field) or []) if field in LIST_FIELDS else (row.get(field) or None)) for field in FIELDS)
+
+def fingerprint(row):
+    """sha1 of a row's compared fields: equal for two rows exactly when a diff would find no change between them"""
+
+    return hashlib.sha1(json.dumps(canonical(row), sort_keys=True).encode('utf-8')).hexdigest()
+
+def take(rows):
+    """[(canonical url, fingerprint, row)] sorted by URL, one per URL (the last row wins if a URL comes twice)
+
+    CSV exports have no url column, so their rows are keyed by court name instead.
+    """
+
+    #   Imported here, like atomic_open in save(), so diffing snapshots never loads it
+    from .discovery import canonical_url
+
+    by_url = {}
+
+    for row in rows:
+        by_url[canonical_url(row['url']) if row.get('url') else row['court_name']] = row
+
+    return [(url, fingerprint(by_url[url]), by_url[url]) for url in sorted(by_url)]
+
+def write_snapshot(f, entries, taken=None):
+    f.write((json.dumps({'format': FORMAT, 'taken': taken or time.time()}) + "\n").encode('utf-8'))
+
+    for url, digest, row in entries:
+        f.write((json.dumps({'url': url, 'fingerprint': digest, 'row': row}, sort_keys=True, ensure_ascii=False) + u"\n").encode('utf-8'))
+
+def save(path, rows):
+    from .manifest import atomic_open
+
+    with atomic_open(path) as f:
+        write_snapshot(f, take(rows))
+
+def read(path):
+    """Yields (url, fingerprint, row) from a snapshot, in URL order"""
+
+    with io.open(path, encoding='utf-8') as f:
+        header = json.loads(f.readline() or '{}')
+
+        if header.get('format') not in (1, FORMAT):
+            raise ValueError("{} is not a snapshot (format {})".format(path, FORMAT))
+
+        entries = (json.loads(line) for line in f)
+
+        if header['format'] == 1:
+            entries = canonical_entries(entries)
+
+        previous = None
+
+        for entry in entries:
+            #   diff() relies on the order; a file edited by hand might have lost it
+            if previous is not None and entry['url'] <= previous:
+                raise ValueError("{} is not sorted by URL at {}".format(path, entry['url']))
+
+            previous = entry['url']
+
+            yield entry['url'], entry['fingerprint'], entry['row']
+
+def canonical_entries(entries):
+    """Format 1 entries keyed by canonical URL, one per URL (the last wins, as in take()) and sorted again
+
+    URLs that differed as crawled can be one canonical URL, and canonical URLs need not sort as the crawled ones did, so
+    the entries are read into memory to put them back in order.
+    """
+
+    from .discovery import canonical_url
+
+    by_url = {}
+
+    for entry in entries:
+        entry['url'] = canonical_url(entry['url'])
+        by_url[entry['url']] = entry
+
+    return [by_url[url] for url in sorted(by_url)]
+
+
+
+############
+### DIFF ###
+############
+
+def field_changes(before, after):
+    """{group: {field: change}} for every compared field that differs; list fields report the values added and removed"""
+
+    before, after = canonical(before), canonical(after)
+    changes = {}
+
+    for group, fields in FIELD_GROUPS:
+        for field in fields:
+            if before[field] == after[field]:
+                continue
+
+            if field in LIST_FIELDS:
+                change = {'added': sorted(set(after[field]) - set(before[field])), 'removed': sorted(set(before[field]) - set(after[field]))}
+            else:
+                change = {'before': before[field], 'after': after[field]}
+
+            changes.setdefault(group, {})[field] = change
+
+    return changes
+
+def diff(old, new):
+    """Yields a change for every court added, removed or modified between two snapshots' (url, fingerprint, row) entries
+
+    A merge join over the two URL-sorted streams: each entry is read once, and unchanged courts are skipped on their
+    fingerprints alone. Changes come out in URL order:
+        {"change": "added", "url", "row"}
+        {"change": "removed", "url", "row"}
+        {"change": "modified", "url", "row", "fields": field_changes()}
+    """
+
+    old, new = iter(old), iter(new)
+    done = object()
+    a, b = next(old, done), next(new, done)
+
+    while a is not done or b is not done:
+        if b is done or (a is not done and a[0] < b[0]):
+            yield {'change': 'removed', 'url': a[0], 'row': a[2]}
+            a = next(old, done)
+
+        elif a is done or b[0] < a[0]:
+            yield {'change': 'added', 'url': b[0], 'row': b[2]}
+            b = next(new, done)
+
+        else:
+            if a[1] != b[1]:
+                yield {'change': 'modified', 'url': b[0], 'row': b[2], 'fields': field_changes(a[2], b[2])}
+
+            a, b = next(old, done), next(new, done)
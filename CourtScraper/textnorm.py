@@ -0,0 +1,118 @@
+"""textnorm.py - precompiled patterns and line cleaners for the free text CourtScraper pulls out of court pages"""
+
+import re
+
+#   A "Maps and Directions" style link at the end of a flat address, up to the end of its line
+MAPS_LINK = re.compile(r"[mM]aps\s+[a-zA-Z].*")
+
+#   A line with some text on it: a word, one whitespace character, then the rest of the line
+TEXT_LINE = re.compile(r"\S+\s.*")
+
+#   A line containing a colon, e.g. "Civil and family enquiries:"
+COLON_LINE = re.compile(".*:.*")
+
+#   A line mentioning enquiries
+ENQUIRIES_LINE = re.compile(".*enq.*")
+
+#   A UK postcode, e.g. "SY23 1AS" or "m14ah": outward code (area and district), then inward code (sector and unit)
+POSTCODE = re.compile(r"\b([A-Z]{1,2}[0-9][A-Z0-9]?)\s*([0-9][A-Z]{2})\b", re.IGNORECASE)
+
+#   Pattern strings handed to remove_matched_line() are compiled once and kept here
+COMPILED = {}
+
+def clean_lines(text, drop_maps_link=False):
+    """Splits a block of text into its non-blank lines, stripped of surrounding whitespace, in a single scan of the text
+
+    Optionally cuts a trailing "Maps and Directions" link out first.
+    """
+
+    if drop_maps_link:
+        text = MAPS_LINK.sub("", text)
+
+    return [line.strip() for line in TEXT_LINE.findall(text)]
+
+def process_flat_address(chunk):
+    """         Takes a chunk of flat, multi-lined text (with multiple blank lines in between), removes new-lines and strips blank spaces, then gives you a beautiful list representing each line in the address
+    ---------------
+            1st Floor
+
+            Piccadilly Exchange
+
+            Piccadilly Plaza
+
+          Manchester                            --->                            [u'1st Floor', u'Piccadilly Exchange', u'Piccadilly Plaza', u'Manchester', u'Greater Manchester', u'M1 4AH']
+
+
+            Greater Manchester
+
+          M1 4AH
+
+    Maps and Direction
+    """
+
+    return clean_lines(chunk, drop_maps_link=True)
+
+def process_single_and_multi_line_address(address_string):
+    """         Takes in both multi-lined and single lined text data and returns the multi-lined data as list, otherwise returns a string
+    ----------------
+                  Aberystwyth Justice Centre
+                                                                                    ['Aberystwyth Justice Centre', 'Y Lanfa', 'Trefechan']
+                  Y Lanfa                            --->                            ----------------
+                                                                                    Aberystwyth
+                  Trefechan
+    ----------------
+    Aberystwyth
+    ----------------
+    """
+
+    return clean_lines(address_string) if "\n" in address_string else address_string.strip()
+
+def remove_matched_line(regx_match, a_list):
+    """removes a regex match from a list of address lines (usually a line containing a colon)"""
+
+    if not hasattr(regx_match, 'match'):
+        if regx_match not in COMPILED:
+            COMPILED[regx_match] = re.compile(regx_match)
+        regx_match = COMPILED[regx_match]
+
+    match = regx_match.match
+
+    return [i for i in a_list if not match(i)]
+
+def remove_colon(string): return string.replace(":", "")
+
+def remove_newlines(string): return string.replace("\n", "")
+
+def is_solicitor(line):
+    """True for contact details meant for solicitors rather than the public"""
+
+    return 'solicitor' in line
+
+def enquiries_line(line):
+    """Returns the first line of `line` if it mentions enquiries, else None"""
+
+    m = ENQUIRIES_LINE.match(line)
+
+    return m.group(0) if m else None
+
+def find_postcode(text):
+    """Returns the last UK postcode in `text`, normalised to upper case with one space ("m1 4ah" -> "M1 4AH"), or None
+
+    The last one, because flat addresses end with their postcode, after any lines that might look like one.
+    """
+
+    matches = POSTCODE.findall(text or "")
+
+    if not matches:
+        return None
+
+    outward, inward = matches[-1]
+
+    return u"{} {}".format(outward.upper(), inward.upper())
+
+def outward_code(postcode):
+    """The outward half of a postcode, e.g. "SY23" of "SY23 1AS" (the postcode area and district), or None"""
+
+    found = find_postcode(postcode)
+
+    return found.split(" ")[0] if found else None
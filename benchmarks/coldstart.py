@@ -0,0 +1,100 @@
+"""coldstart.py - times short-lived CourtScraper commands from a cold interpreter, as CLI and serverless calls run them
+
+    python benchmarks/coldstart.py [--repeat 20] [--json PATH]
+
+Each command is started `--repeat` times in a fresh interpreter and its median and fastest wall times reported, next to
+an empty interpreter and one importing requests and BeautifulSoup: what every command paid when the scraper imported
+them up front. The rows, index and snapshots the offline commands read are made once beforehand, from the fixture
+corpus's court pages.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..')
+sys.path.insert(0, ROOT)
+
+from make_fixtures import FIXTURES, make_fixtures
+from crawl_bench import court_pages
+
+def commands(work):
+    rows, index, snapshot = [os.path.join(work, name) for name in ('rows.jsonl', 'courts.idx', 'courts.snap')]
+
+    return [
+        ('python', ['-c', 'pass']),
+        ('import requests, bs4', ['-c', 'import requests, bs4']),
+        ('import CourtScraper', ['-c', 'import CourtScraper']),
+        ('--help', ['-m', 'CourtScraper', '--help']),
+        ('query find', ['-m', 'CourtScraper', 'query', 'find', index, 'crown_court_id', '100']),
+        ('export csv', ['-m', 'CourtScraper', 'export', rows, '--output', os.path.join(work, 'export.csv')]),
+        ('snapshot diff', ['-m', 'CourtScraper', 'snapshot', 'diff', snapshot, snapshot]),
+        ]
+
+def prepare(work, fixtures):
+    """Parses the fixture court pages once, into the rows, index and snapshot the timed commands read"""
+
+    command = [sys.executable, '-m', 'CourtScraper', '--no-cache', '--from-html'] + court_pages(fixtures) + ['--output'] + [os.path.join(work, name) for name in ('rows.jsonl', 'courts.idx', 'courts.snap')]
+
+    with open(os.devnull, 'wb') as devnull:
+        if subprocess.call(command, cwd=ROOT, stdout=devnull, stderr=devnull):
+            sys.exit('could not parse the fixtures: {}'.format(' '.join(command[:4])))
+
+def time_command(arguments, repeat):
+    times = []
+
+    with open(os.devnull, 'wb') as devnull:
+        for i in range(repeat):
+            start = time.time()
+            status = subprocess.call([sys.executable] + arguments, cwd=ROOT, stdout=devnull, stderr=devnull)
+            times.append(time.time() - start)
+
+            if status:
+                return None
+
+    times.sort()
+
+    return {'median_ms': times[len(times) // 2] * 1000, 'fastest_ms': times[0] * 1000}
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Time CourtScraper commands from a cold start')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per command (default: 20)')
+    parser.add_argument('--fixtures', default=FIXTURES, help='corpus whose court pages make the test data; written with make_fixtures.py if missing (default: benchmarks/fixtures)')
+    parser.add_argument('--json', metavar='PATH', help='save the results here')
+    args = parser.parse_args()
+
+    if not os.path.isdir(os.path.join(args.fixtures, 'courts')):
+        make_fixtures(args.fixtures)
+
+    work = tempfile.mkdtemp(prefix='coldstart.')
+    results = []
+
+    try:
+        prepare(work, args.fixtures)
+
+        for name, arguments in commands(work):
+            result = time_command(arguments, args.repeat)
+            results.append(dict(result or {}, command=name, failed=result is None))
+    finally:
+        shutil.rmtree(work)
+
+    header = '{:<22} {:>10} {:>10}'.format('command', 'median ms', 'fastest ms')
+    print(header)
+    print('-' * len(header))
+
+    for r in results:
+        if r['failed']:
+            print('{:<22} {:>10} {:>10}'.format(r['command'], 'failed', '-'))
+        else:
+            print('{:<22} {:>10.1f} {:>10.1f}'.format(r['command'], r['median_ms'], r['fastest_ms']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'repeat': args.repeat, 'results': results}, f, indent=2, sort_keys=True)
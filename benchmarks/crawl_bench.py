@@ -0,0 +1,304 @@
+"""crawl_bench.py - times full crawls of a local fixture server, one execution mode at a time, without touching the real site
+
+    python benchmarks/crawl_bench.py [--modes ...] [--workers 1,4,8,16] [--latency MS] [--error-rate P] [--json PATH] [--baseline PATH]
+
+Modes:
+    sequential   a crawl with one worker and no cache: the original script's behaviour
+    threaded     a crawl with each of --workers; the one to tune the worker count with
+    revalidate   a crawl against a primed cache, every page revalidated with a conditional GET (mostly 304s)
+    offline      a crawl served entirely from a primed cache
+    from-html    --from-html over the fixture court pages: parsing and standardising only
+    processes    --from-html --processes with each of --workers as the process count, to check scaling across cores
+
+Each mode runs in a fresh interpreter, so its peak RSS is its own. For each it reports court pages per second, end-to-end
+time (index pages to finished CSV), p50/p99 latency of get_courts(), extract_court_details() and standardise_record(),
+and peak RSS (of the parent only, in processes mode, where the timed functions run in the workers). --json saves the results; --baseline compares against saved ones and exits 1 if a mode lost more than
+--tolerance of its throughput.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+try:
+    import resource
+except ImportError:
+    #   Windows: peak RSS is reported as unknown
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from make_fixtures import FIXTURES, make_fixtures
+
+MODES = ('sequential', 'threaded', 'revalidate', 'offline', 'from-html', 'processes')
+
+#   The functions timed call by call; the pipeline looks them up on the CourtScraper.scraper module, so wrapping them there is enough
+TIMED = ('get_courts', 'extract_court_details', 'standardise_record')
+
+def percentile(values, pct):
+    values = sorted(values)
+
+    if not values:
+        return None
+
+    return values[min(len(values) - 1, int(len(values) * pct / 100.0))]
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    #   kilobytes on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+
+####################################
+### ONE MODE, IN A CHILD PROCESS ###
+####################################
+
+def timed(fn, timings):
+    def wrapper(*args, **kwargs):
+        start = time.time()
+
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings.append(time.time() - start)
+
+    return wrapper
+
+def court_pages(fixtures):
+    """The saved court pages of a corpus, leaving out the A-Z index pages"""
+
+    directory = os.path.join(fixtures, 'courts')
+
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith('.html') and len(name) > len('A.html')]
+
+def run_mode(mode, base, workers, fixtures, args):
+    from CourtScraper import scraper
+    from CourtScraper.fetch import Fetcher, HostRateLimiter
+    from CourtScraper.cache import ResponseCache
+    from CourtScraper.sinks import open_sink
+
+    timings = dict((name, []) for name in TIMED)
+
+    for name in TIMED:
+        setattr(scraper, name, timed(getattr(scraper, name), timings[name]))
+
+    def fetcher(cache=None, offline=False):
+        return Fetcher(
+            timeout=(5, args.timeout),
+            retries=args.retries,
+            backoff=args.backoff,
+            pool_size=workers,
+            rate_limiter=HostRateLimiter(args.rate, workers) if args.rate else None,
+            cache=cache,
+            offline=offline
+            )
+
+    workdir = tempfile.mkdtemp(prefix='crawl_bench.')
+
+    try:
+        cache = None
+
+        if mode in ('revalidate', 'offline'):
+            #   Prime the cache with one untimed crawl
+            cache = ResponseCache(os.path.join(workdir, 'cache.sqlite'))
+            scraper.FETCHER = fetcher(cache)
+
+            for item in scraper.crawl(base, 'courts/', workers):
+                pass
+
+            for values in timings.values():
+                del values[:]
+
+        scraper.FETCHER = fetcher(cache, offline=(mode == 'offline'))
+
+        start = time.time()
+
+        if mode == 'from-html':
+            items = scraper.standardise_records(scraper.parse_pages(scraper.load_saved_pages(court_pages(fixtures))))
+        elif mode == 'processes':
+            items = scraper.parse_pages_in_processes(scraper.saved_pages(court_pages(fixtures)), workers)
+        else:
+            items = scraper.crawl(base, 'courts/', workers)
+
+        with open_sink(os.path.join(workdir, 'out.csv')) as sink:
+            courts = sum(1 for item in scraper.write_rows(items, [sink]))
+
+        elapsed = time.time() - start
+
+    finally:
+        shutil.rmtree(workdir)
+
+    stats = scraper.FETCHER.stats
+    result = {
+        'mode': mode,
+        'workers': workers,
+        'courts': courts,
+        'requests': stats.requests,
+        'retries': stats.retries,
+        'failures': stats.failures,
+        'seconds': elapsed,
+        'pages_per_second': courts / elapsed if elapsed else None,
+        'peak_rss_mb': peak_rss_mb(),
+        }
+
+    for name, values in timings.items():
+        result[name + '_p50'] = percentile(values, 50)
+        result[name + '_p99'] = percentile(values, 99)
+
+    return result
+
+
+
+##############
+### REPORT ###
+##############
+
+def ms(seconds):
+    return '-' if seconds is None else '{:.2f}'.format(seconds * 1000)
+
+def report(results, baseline=None):
+    header = '{:<11} {:>7} {:>6} {:>8} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9} {:>8}'.format(
+        'mode', 'workers', 'courts', 'seconds', 'pages/s', 'parse p50', 'parse p99', 'index p50', 'std p50', 'RSS MB', 'change')
+    lines = [header, '-' * len(header)]
+
+    for r in results:
+        before = baseline.get((r['mode'], r['workers'])) if baseline else None
+        change = '{:+.0%}'.format(r['pages_per_second'] / before['pages_per_second'] - 1) if before else ''
+
+        lines.append('{:<11} {:>7} {:>6} {:>8.2f} {:>8.1f} {:>9} {:>9} {:>9} {:>9} {:>9} {:>8}'.format(
+            r['mode'], r['workers'], r['courts'], r['seconds'], r['pages_per_second'],
+            ms(r['extract_court_details_p50']), ms(r['extract_court_details_p99']), ms(r['get_courts_p50']), ms(r['standardise_record_p50']),
+            '-' if r['peak_rss_mb'] is None else '{:.1f}'.format(r['peak_rss_mb']), change))
+
+    return '\n'.join(lines)
+
+def regressions(results, baseline, tolerance):
+    """The results whose throughput fell more than `tolerance` (a fraction) below their baseline"""
+
+    slower = []
+
+    for r in results:
+        before = baseline.get((r['mode'], r['workers']))
+
+        if before and r['pages_per_second'] < before['pages_per_second'] * (1 - tolerance):
+            slower.append(r)
+
+    return slower
+
+
+
+############
+### MAIN ###
+############
+
+def start_server(args):
+    """Runs fixture_server.py in its own process, so serving pages does not compete with the crawl for the GIL"""
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, 'fixture_server.py'), args.fixtures, '--port', '0',
+         '--latency', str(args.latency), '--jitter', str(args.jitter), '--error-rate', str(args.error_rate), '--seed', str(args.seed)],
+        stdout=subprocess.PIPE)
+
+    #   "serving N pages on http://127.0.0.1:PORT/"
+    line = server.stdout.readline().decode('utf-8')
+
+    if not line.startswith('serving'):
+        server.kill()
+        sys.exit('fixture server failed to start')
+
+    return server, line.split()[-1]
+
+def run_child(mode, base, workers, args):
+    fd, path = tempfile.mkstemp(prefix='crawl_bench.', suffix='.json')
+    os.close(fd)
+
+    command = [sys.executable, os.path.abspath(__file__), '--child', mode, '--base', base, '--result', path, '--workers', str(workers), '--fixtures', args.fixtures,
+               '--rate', str(args.rate), '--timeout', str(args.timeout), '--retries', str(args.retries), '--backoff', str(args.backoff)]
+
+    try:
+        with open(os.devnull, 'wb') as devnull:
+            #   The crawl's own progress output is not part of the report
+            if subprocess.call(command, stdout=devnull):
+                sys.exit('{} mode failed'.format(mode))
+
+        with open(path) as f:
+            return json.load(f)
+    finally:
+        os.remove(path)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark CourtScraper against a local fixture server')
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES, help='execution modes to run (default: all)')
+    parser.add_argument('--workers', default='1,4,8,16', help='comma-separated worker counts for the threaded and processes modes; the others use the largest (default: 1,4,8,16)')
+    parser.add_argument('--fixtures', default=FIXTURES, help='corpus to serve; written with make_fixtures.py if missing (default: benchmarks/fixtures)')
+    parser.add_argument('--latency', type=float, default=20, help='milliseconds the server adds to every response (default: 20)')
+    parser.add_argument('--jitter', type=float, default=10, help='up to this many random extra milliseconds per response (default: 10)')
+    parser.add_argument('--error-rate', type=float, default=0, help='share of requests the server fails with a 503, 429 or dropped connection (default: 0)')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the server\'s latency and error draws (default: 1)')
+    parser.add_argument('--rate', type=float, default=0, help='requests per second per host, as --rate of CourtScraper; 0 for unlimited (default: 0)')
+    parser.add_argument('--timeout', type=float, default=30, help='seconds to wait for a response (default: 30)')
+    parser.add_argument('--retries', type=int, default=3, help='retries per page (default: 3)')
+    parser.add_argument('--backoff', type=float, default=0.05, help='base backoff between retries, in seconds (default: 0.05)')
+    parser.add_argument('--json', metavar='PATH', help='save the results here, e.g. as a baseline for later runs')
+    parser.add_argument('--baseline', metavar='PATH', help='results saved with --json to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='throughput loss against --baseline that counts as a regression (default: 0.2)')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--base', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = run_mode(args.child, args.base, int(args.workers), args.fixtures, args)
+
+        with open(args.result, 'w') as f:
+            json.dump(result, f)
+
+        sys.exit(0)
+
+    if not os.path.isdir(os.path.join(args.fixtures, 'courts')):
+        make_fixtures(args.fixtures)
+
+    worker_counts = [int(w) for w in args.workers.split(',')]
+    runs = [(mode, w) for mode in args.modes for w in (worker_counts if mode in ('threaded', 'processes') else [1] if mode in ('sequential', 'from-html') else [max(worker_counts)])]
+
+    server, base = start_server(args)
+    results = []
+
+    try:
+        for mode, workers in runs:
+            results.append(run_child(mode, base, workers, args))
+    finally:
+        server.kill()
+
+    baseline = None
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = dict(((r['mode'], r['workers']), r) for r in json.load(f)['results'])
+
+    print(report(results, baseline))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'latency_ms': args.latency, 'jitter_ms': args.jitter, 'error_rate': args.error_rate, 'results': results}, f, indent=2, sort_keys=True)
+
+    if baseline:
+        slower = regressions(results, baseline, args.tolerance)
+
+        for r in slower:
+            print('regression: {} with {} workers is down to {:.1f} pages/s'.format(r['mode'], r['workers'], r['pages_per_second']))
+
+        if slower:
+            sys.exit(1)
@@ -0,0 +1,151 @@
+"""fixture_server.py - serves a fixture corpus over HTTP the way the court finder would, with injected latency and errors
+
+    python benchmarks/fixture_server.py [--port 8765] [--latency MS] [--jitter MS] [--error-rate P] [DIRECTORY]
+
+GET /courts/A serves <DIRECTORY>/courts/A.html. Every page has an ETag and a matching If-None-Match gets a 304, so the
+response cache's revalidation path is exercised too. With --error-rate, that share of requests fails instead: a 503 or
+429 (with Retry-After: 0) or a connection dropped without any response, in equal parts.
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import hashlib
+import argparse
+import threading
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+
+from make_fixtures import FIXTURES
+
+class FixtureServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, directory=FIXTURES, latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        HTTPServer.__init__(self, address, FixtureHandler)
+
+        self.pages = load_pages(directory)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.served = 0
+        self.errors = 0
+
+    def draw(self):
+        """This request's delay in seconds, and the error to fail it with (None to serve it)"""
+
+        with self.lock:
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            error = self.random.choice((503, 429, 'drop')) if self.random.random() < self.error_rate else None
+
+            if error:
+                self.errors += 1
+            else:
+                self.served += 1
+
+        return delay, error
+
+    @property
+    def url(self):
+        return 'http://{}:{}/'.format(*self.server_address)
+
+def load_pages(directory):
+    """{path: (body, etag)} for every .html file under `directory`, held in memory so the server costs next to nothing"""
+
+    pages = {}
+
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if name.endswith('.html'):
+                with open(os.path.join(root, name), 'rb') as f:
+                    body = f.read()
+
+                path = os.path.relpath(os.path.join(root, name[:-len('.html')]), directory).replace(os.sep, '/')
+                pages[path] = (body, '"{}"'.format(hashlib.md5(body).hexdigest()))
+
+    return pages
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        delay, error = self.server.draw()
+
+        if delay:
+            time.sleep(delay)
+
+        if error == 'drop':
+            self.close_connection = True
+            return
+
+        if error:
+            return self.respond(error, headers={'Retry-After': '0'})
+
+        #   The crawler joins BASE and hrefs that both carry a slash, so requests arrive as //courts/...
+        page = self.server.pages.get(re.sub('/+', '/', self.path.split('?')[0]).strip('/'))
+
+        if page is None:
+            return self.respond(404)
+
+        body, etag = page
+
+        if self.headers.get('If-None-Match') == etag:
+            return self.respond(304, headers={'ETag': etag})
+
+        self.respond(200, body, {'ETag': etag, 'Content-Type': 'text/html; charset=utf-8'})
+
+    def respond(self, status, body=b'', headers=None):
+        self.send_response(status)
+
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve_in_thread(directory=FIXTURES, port=0, **kwargs):
+    """Starts a FixtureServer on a background thread (port 0: any free port) and returns it; stop it with shutdown()"""
+
+    server = FixtureServer(('127.0.0.1', port), directory, **kwargs)
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    return server
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Serve a fixture corpus with injected latency and errors')
+    parser.add_argument('directory', nargs='?', default=FIXTURES, help='the corpus to serve (default: benchmarks/fixtures)')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on, 0 for any free one (default: 8765)')
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds added to every response (default: 0)')
+    parser.add_argument('--jitter', type=float, default=0, help='up to this many random extra milliseconds per response (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0, help='share of requests answered with a 503, a 429 or a dropped connection (default: 0)')
+    parser.add_argument('--seed', type=int, default=None, help='seed for the latency and error draws')
+    args = parser.parse_args()
+
+    server = FixtureServer(('127.0.0.1', args.port), args.directory, args.latency / 1000.0, args.jitter / 1000.0, args.error_rate, args.seed)
+
+    #   The harness reads this line to learn the port when it asked for any free one
+    sys.stdout.write("serving {} pages on {}\n".format(len(server.pages), server.url))
+    sys.stdout.flush()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""make_fixtures.py - writes a corpus of A-Z index pages and court pages in the markup CourtScraper parses
+
+    python benchmarks/make_fixtures.py [--courts-per-letter N] [--seed S] [DIRECTORY]
+
+The pages follow the structure of courttribunalfinder.service.gov.uk: span-style and flat-text addresses, optional
+"pros" codes, and contact blocks with single and multiple emails and telephones. Each page carries a realistic amount of
+site chrome (header, navigation, footer, scripts) around the content CourtScraper reads, so parse timings are
+representative. The same seed gives the same corpus, on Python 2 and 3 alike.
+"""
+
+import io
+import os
+import random
+import argparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+TOWNS = [
+    (u'Aberystwyth', u'Ceredigion', u'SY23 1AS'), (u'Ayr', u'Ayrshire', u'KA8 0BD'), (u'Bury St Edmunds', u'Suffolk', u'IP33 1TR'),
+    (u'Norwich', u'Norfolk', u'NR3 1UR'), (u'Manchester', u'Greater Manchester', u'M1 4AH'), (u'Birmingham', u'West Midlands', u'B4 7NA'),
+    (u'Cardiff', u'South Glamorgan', u'CF10 1ET'), (u'Glasgow', u'Lanarkshire', u'G2 8GT'), (u'Caernarfon', u'Gwynedd', u'LL55 1BE'),
+    (u'Ystradgynlais', u'Powys', u'SA9 1JJ'), (u'Exeter', u'Devon', u'EX1 1UH'), (u'Leeds', u'West Yorkshire', u'LS1 3BG'),
+    (u'Oxford', u'Oxfordshire', u'OX1 1TL'), (u'Kingston upon Hull', u'East Yorkshire', u'HU1 2EZ'), (u'Wrexham', u'Wrecsam', u'LL13 8DG'),
+    (u'Ynys Môn', u'Anglesey', u'LL77 7EY'), (u'Dundee', u'Angus', u'DD1 4QB'), (u'Ipswich', u'Suffolk', u'IP1 2AP'),
+    (u'Taunton', u'Somerset', u'TA1 4EU'), (u'Uxbridge', u'Greater London', u'UB8 1JT'), (u'Reading', u'Berkshire', u'RG1 3EH'),
+    ]
+
+KINDS = [u'Crown Court', u'County Court', u"Magistrates' Court", u'Tribunal Hearing Centre', u'Justice Centre', u'Combined Court', u'Family Court']
+
+STREETS = [u'King Street', u'York Street', u'High Street', u'Bishop Gate', u'Y Lanfa', u'Trefechan', u'Piccadilly Plaza', u'Castle Street']
+
+#   Letters with no courts, which still cost a round trip for their index page
+EMPTY_LETTERS = u'QXZ'
+
+#   random() is the one draw that gives the same sequence for a seed on Python 2 and 3; choice() and randint() do not
+def pick(rnd, seq):
+    return seq[int(rnd.random() * len(seq))]
+
+def between(rnd, low, high):
+    return low + int(rnd.random() * (high - low + 1))
+
+def chrome():
+    """Header, navigation and footer of the kind every real page carries around its content"""
+
+    nav = u''.join(u'<li><a href="/help/{0}">Help topic {0}</a><span class="hint">Find out more</span></li>\n'.format(i) for i in range(120))
+    letters = u''.join(u'<li><a href="/courts/{0}">{0}</a></li>'.format(chr(c)) for c in range(65, 91))
+    scripts = u'<script>window.GOVUK = window.GOVUK || {}; GOVUK.analytics = {"dimensions": [1, 2, 3]};</script>\n' * 10
+
+    header = u'<header id="global-header"><div class="header-wrapper"><ul class="nav">\n' + nav + u'</ul></div></header>\n<ul class="letters">' + letters + u'</ul>\n'
+    footer = u'<footer id="footer"><div class="footer-meta"><p>All content is available under the Open Government Licence v3.0, except where otherwise stated</p><p>&copy; Crown copyright</p></div></footer>\n' + scripts
+
+    return header, footer
+
+def span_address(kind, lines, town, region, postcode):
+    street = u''.join(u'\n            \n              {} <br/>'.format(line) for line in lines) + u'\n'
+
+    return (
+        u'<div id="{0}">\n<h2>{1} address</h2>\n<p property="address" typeof="PostalAddress">'
+        u'<span property="streetAddress">{2}</span>\n<span property="addressLocality">{3}</span>\n'
+        u'<span property="addressRegion">{4}</span>\n<span property="postalCode">{5}</span></p>\n</div>\n'
+        ).format(kind, kind.title(), street, town, region, postcode)
+
+def flat_address(kind, lines):
+    body = u''.join(u'\n        {}\n'.format(line) for line in lines)
+
+    return u'<div id="{0}">\n<h2>{1} address</h2>\n{2}\n  <a href="#map">Maps and Directions</a>\n</div>\n'.format(kind, kind.title(), body)
+
+def contacts(rnd, domain):
+    blocks = [u'<div id="contacts">\n<h2>Contacts</h2>\n']
+    labels = [u'Enquiries:', u'Listing:', u'Fax:', u'Solicitor enquiries:', u'County Court:', u'Registry:']
+
+    for j in range(between(rnd, 1, 4)):
+        label = labels[j] if j else (u'Enquiries:' if rnd.random() < 0.8 else u'Listing:')
+        blocks.append(u'<div class="contact-type"><span class="label-pad" property="contactType" typeof="ContactPoint">{}</span></div>\n'.format(label))
+
+        if rnd.random() < 0.5:
+            emails = [u'{}{}@{}'.format(pick(rnd, [u'enquiries', u'listing', u'solicitors', u'enq']), k, domain) for k in range(pick(rnd, [1, 1, 2, 3]))]
+            blocks.append(u'<div class="email-addresses">\n' + u'\n'.join(u'<a href="mailto:{0}" property="email">{0}</a>'.format(e) for e in emails) + u'\n</div>\n')
+        else:
+            phones = [u'0{} {:03d} {:04d}'.format(between(rnd, 1000, 2999), between(rnd, 0, 999), between(rnd, 0, 9999)) for k in range(pick(rnd, [1, 1, 2]))]
+            blocks.append(u'<div class="phone-number">\n' + u'<br/>\n'.join(u'<a href="tel:{0}" property="telephone">{0}</a>'.format(p) for p in phones) + u'\n</div>\n')
+
+        blocks.append(u'<div class="spacer"></div>\n')
+
+    blocks.append(u'</div>\n')
+
+    return u''.join(blocks)
+
+def court_page(rnd, name, slug, header, footer):
+    town, region, postcode = pick(rnd, TOWNS)
+    lines = [name, u'{} {}'.format(between(rnd, 1, 99), pick(rnd, STREETS)), pick(rnd, STREETS)]
+    parts = [
+        u'<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8"><title>{} - Court and tribunal finder</title></head><body>\n'.format(name),
+        header,
+        u'<main id="content"><div class="content inner cf court">\n<h1>{}</h1>\n<div id="addresses">\n'.format(name)
+        ]
+
+    shape = rnd.random()
+
+    if shape < 0.5:
+        parts.append(span_address(u'visiting', lines[:between(rnd, 1, 3)], town, region, postcode))
+    elif shape < 0.8:
+        parts.append(span_address(u'visiting', lines[:2], town, region, postcode))
+        parts.append(flat_address(u'postal', [u'Civil and family enquiries:'] + lines + [town, region, postcode]))
+    else:
+        parts.append(flat_address(u'visiting', lines + [town, postcode]))
+
+    if rnd.random() < 0.8:
+        codes = [u'<div id="pros">\n<dl>\n']
+        if rnd.random() < 0.6:
+            codes.append(u'<dt>Crown Court location code:</dt><dd>{}</dd>\n'.format(between(rnd, 100, 999)))
+        if rnd.random() < 0.6:
+            codes.append(u'<dt>County Court location code:</dt><dd>{}</dd>\n'.format(between(rnd, 100, 399)))
+        codes.append(u'<dt>DX:</dt><dd>{} {} 2</dd>\n</dl>\n</div>\n'.format(between(rnd, 10000, 99999), town))
+        parts.append(u''.join(codes))
+
+    parts.append(u'</div>\n')
+    parts.append(contacts(rnd, slug.replace(u'-', u'.') + u'.gsi.gov.uk') if rnd.random() < 0.95 else u'<div id="contacts">\n<h2>Contacts</h2>\n</div>\n')
+    parts.append(u'</div></main>\n')
+    parts.append(footer)
+    parts.append(u'</body></html>\n')
+
+    return u''.join(parts)
+
+def index_page(letter, courts, header, footer):
+    items = u''.join(u'<li><a href="/courts/{}">{}</a></li>\n'.format(slug, name) for name, slug in courts)
+
+    return (
+        u'<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8"><title>Courts beginning with {0}</title></head><body>\n{1}'
+        u'<main id="content"><div class="content inner cf">\n<h1>Courts beginning with {0}</h1>\n<ul>\n{2}</ul>\n</div></main>\n{3}</body></html>\n'
+        ).format(letter, header, items, footer)
+
+def write(path, text):
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def make_fixtures(directory=FIXTURES, courts_per_letter=6, seed=1):
+    """Writes <directory>/courts/<letter>.html index pages and <directory>/courts/<slug>.html court pages"""
+
+    rnd = random.Random(seed)
+    header, footer = chrome()
+    courts_dir = os.path.join(directory, 'courts')
+
+    if not os.path.isdir(courts_dir):
+        os.makedirs(courts_dir)
+
+    for c in range(65, 91):
+        letter = chr(c)
+        courts = []
+
+        for k in range(0 if letter in EMPTY_LETTERS else between(rnd, 1, courts_per_letter)):
+            town = pick(rnd, TOWNS)[0]
+            name = u'{}{} {} {}'.format(letter, town[1:], pick(rnd, KINDS), k + 1)
+            slug = u''.join(ch for ch in name.lower().replace(u' ', u'-') if (ch.isalnum() and ord(ch) < 128) or ch == u'-')
+            courts.append((name, slug))
+
+            write(os.path.join(courts_dir, slug + u'.html'), court_page(rnd, name, slug, header, footer))
+
+        write(os.path.join(courts_dir, letter + u'.html'), index_page(letter, courts, header, footer))
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Write a synthetic corpus of court index and detail pages')
+    parser.add_argument('directory', nargs='?', default=FIXTURES, help='where to write the pages (default: benchmarks/fixtures)')
+    parser.add_argument('--courts-per-letter', type=int, default=6, help='up to this many courts per letter (default: 6)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed; the same seed gives the same corpus (default: 1)')
+    args = parser.parse_args()
+
+    make_fixtures(args.directory, args.courts_per_letter, args.seed)
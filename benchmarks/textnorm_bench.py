@@ -0,0 +1,108 @@
+"""textnorm_bench.py - checks the textnorm cleaners against the regex code they replaced, then times both
+
+    python benchmarks/textnorm_bench.py [repeats]
+"""
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from CourtScraper import textnorm
+
+########################################################
+### THE ORIGINAL IMPLEMENTATIONS, KEPT FOR REFERENCE ###
+########################################################
+
+def old_process_flat_address(chunk):
+    return [i.strip() if re.search(re.compile(".*\\n\s+$"), i) else i.strip() for i in (re.findall("\S+\s.*", (re.sub("[mM]aps\s+[a-zA-Z].*", "", chunk))))]
+
+def old_process_single_and_multi_line_address(address_string):
+    return [item.strip() for item in re.findall("\S+\s.*", address_string)] if re.search(re.compile("\\n"), address_string) else address_string.strip()
+
+def old_remove_matched_line(regx_match, a_list):
+    return [i for i in a_list if not re.match(regx_match, i)]
+
+def old_remove_colon(string): return re.sub(":", "", string)
+
+def old_email_filter(lines):
+    email = []
+    for line in lines:
+        if not re.findall('solicitor', line):
+            if re.match('.*enq.*', line):
+                m = re.match('.*enq.*', line)
+                email.append(m.group(0))
+    return email
+
+def new_email_filter(lines):
+    email = []
+    for line in lines:
+        if not textnorm.is_solicitor(line):
+            enquiries = textnorm.enquiries_line(line)
+            if enquiries:
+                email.append(enquiries)
+    return email
+
+
+
+##############
+### INPUTS ###
+##############
+
+#   The examples from the docstrings of process_flat_address() and process_span_address()
+FLAT_ADDRESS = u"""
+        1st Floor
+
+        Piccadilly Exchange
+
+        Piccadilly Plaza
+
+      Manchester
+
+
+        Greater Manchester
+
+      M1 4AH
+
+Maps and Direction
+"""
+
+SPAN_STREET_ADDRESS = u"\n            \n              Aberystwyth Justice Centre \n            \n              Y Lanfa\n            \n              Trefechan\n"
+
+SPAN_LOCALITY = u"Aberystwyth"
+
+POSTAL_LINES = [u'Civil and family enquiries:', u'Norwich Combined Court', u'The Law Courts', u'Bishop Gate', u'Norwich', u'Norfolk', u'NR3 1UR']
+
+CONTACT_LINES = [u'enquiries@aylesbury.crowncourt.gsi.gov.uk', u'solicitorenquiries@aylesbury.crowncourt.gsi.gov.uk', u'listing@aylesbury.crowncourt.gsi.gov.uk', u'01296 434 401', u'Enquiries:']
+
+CASES = [
+    ('process_flat_address', old_process_flat_address, textnorm.process_flat_address, (FLAT_ADDRESS,)),
+    ('process_single_and_multi_line_address (multi)', old_process_single_and_multi_line_address, textnorm.process_single_and_multi_line_address, (SPAN_STREET_ADDRESS,)),
+    ('process_single_and_multi_line_address (single)', old_process_single_and_multi_line_address, textnorm.process_single_and_multi_line_address, (SPAN_LOCALITY,)),
+    ('remove_matched_line', old_remove_matched_line, textnorm.remove_matched_line, ('.*:.*', POSTAL_LINES)),
+    ('remove_colon', old_remove_colon, textnorm.remove_colon, (u'Crown Court location code:',)),
+    ('email filtering', old_email_filter, new_email_filter, (CONTACT_LINES,)),
+]
+
+
+
+############
+### MAIN ###
+############
+
+if __name__ == "__main__":
+
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    print("{:<50} {:>12} {:>12} {:>8}".format("helper", "before (us)", "after (us)", "speed-up"))
+
+    for name, old, new, args in CASES:
+        if old(*args) != new(*args):
+            sys.exit("{}: output differs\n  before: {!r}\n  after:  {!r}".format(name, old(*args), new(*args)))
+
+        before = min(timeit.repeat(lambda: old(*args), number=repeats, repeat=3)) / repeats * 1e6
+        after = min(timeit.repeat(lambda: new(*args), number=repeats, repeat=3)) / repeats * 1e6
+
+        print("{:<50} {:>12.2f} {:>12.2f} {:>7.1f}x".format(name, before, after, before / after))
@@ -0,0 +1,22 @@
+"""conftest.py - puts CourtScraper on the path, and the fixtures the tests share"""
+
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from helpers import FakeResponse, FakeSession
+
+@pytest.fixture
+def fetcher():
+    """A Fetcher that never sleeps between retries, whose session is a FakeSession answering 200 to everything"""
+
+    from CourtScraper.fetch import Fetcher
+
+    fetcher = Fetcher(backoff=0)
+    fetcher.session = FakeSession(FakeResponse())
+
+    return fetcher
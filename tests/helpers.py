@@ -0,0 +1,103 @@
+"""helpers.py - stand-ins for requests, and court and index pages in the site's markup, shared by the tests"""
+
+
+
+##############################
+### FAKE REQUESTS SESSIONS ###
+##############################
+
+class FakeResponse(object):
+    """The parts of requests.Response the Fetcher reads"""
+
+    def __init__(self, status_code=200, text=u'', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        import requests
+
+        if self.status_code >= 400:
+            raise requests.HTTPError('{} error'.format(self.status_code), response=self)
+
+class FakeSession(object):
+    """Answers get() from a script: each entry a FakeResponse, an exception to raise, or a function of (url, headers)
+
+    Every call is recorded as (url, headers) in `calls`; once the script runs out, the last entry answers every call.
+    """
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls.append((url, dict(headers or {})))
+        answer = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+
+        if isinstance(answer, Exception):
+            raise answer
+
+        return answer(url, headers or {}) if callable(answer) else answer
+
+
+
+#############
+### PAGES ###
+#############
+
+COURT_PAGE = u"""<html><body>
+<div class="content inner cf court">
+<h1>Aberystwyth Justice Centre</h1>
+<div id="addresses">
+<div id="visiting">
+<h2>Visiting address</h2>
+<p><span property="streetAddress">
+              Aberystwyth Justice Centre <br/>
+              Y Lanfa<br/>
+              Trefechan<br/>
+</span>
+<span property="addressLocality">Aberystwyth</span>
+<span property="addressRegion">Ceredigion</span>
+<span property="postalCode">SY23 1AS</span></p>
+</div>
+<div id="postal">
+<h2>Postal address</h2>
+        Civil and family enquiries:
+        PO Box 12
+        Y Lanfa, Aberystwyth
+        SY23 9ZZ
+</div>
+<div id="pros">
+<dl>
+<dt>Crown Court location code:</dt><dd>3253</dd>
+<dt>County Court location code:</dt><dd>102</dd>
+<dt>DX:</dt><dd>99560 Aberystwyth 2</dd>
+</dl>
+</div>
+</div>
+<div id="contacts">
+<div class="contact-type"><span class="label-pad" property="contactType">Enquiries:</span></div>
+<div class="phone-number"><a href="tel:01970 621 250" property="telephone">01970 621 250</a></div>
+<div class="spacer"></div>
+<div class="contact-type"><span class="label-pad" property="contactType">Enquiries:</span></div>
+<div class="email-addresses">
+<a href="mailto:enquiries@aberystwyth.countycourt.gsi.gov.uk" property="email">enquiries@aberystwyth.countycourt.gsi.gov.uk</a>
+<a href="mailto:solicitors@aberystwyth.countycourt.gsi.gov.uk" property="email">solicitors@aberystwyth.countycourt.gsi.gov.uk</a>
+</div>
+<div class="spacer"></div>
+</div>
+</div>
+</body></html>
+"""
+
+INDEX_PAGE = u"""<html><body>
+<div class="content inner cf">
+<h1>Courts beginning with A</h1>
+<ul>
+<li><a href="/courts/aberystwyth-justice-centre">Aberystwyth Justice Centre</a></li>
+<li><a href="/courts/ayr-sheriff-court">Ayr Sheriff Court</a></li>
+</ul>
+</div>
+</body></html>
+"""
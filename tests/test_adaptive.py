@@ -0,0 +1,195 @@
+"""test_adaptive.py - the AIMD concurrency controller: when it grows and cuts the limit, and holding requests to it"""
+
+import time
+import threading
+
+from helpers import FakeResponse, FakeSession
+from CourtScraper.adaptive import AdaptiveConcurrency, OK, THROTTLED, FAILED, request_outcome
+
+def fill(controller):
+    """Acquires every slot the limit allows; returns their tokens"""
+
+    return [controller.acquire() for i in range(controller.limit)]
+
+def test_request_outcomes():
+    assert [request_outcome(status) for status in (200, 304, 404, 429, 500, 503)] == [OK, OK, OK, THROTTLED, FAILED, FAILED]
+    assert [request_outcome(503, retry_after) for retry_after in (0, 30)] == [FAILED, THROTTLED]
+
+
+
+################
+### INCREASE ###
+################
+
+def test_the_limit_doubles_in_slow_start_while_in_use():
+    controller = AdaptiveConcurrency(initial=2, window=2)
+
+    for token in fill(controller):
+        controller.release(token)
+
+    assert controller.limit == 4
+
+    for token in fill(controller):
+        controller.release(token)
+
+    assert controller.limit == 8
+
+def test_the_limit_grows_by_one_after_the_first_cut():
+    controller = AdaptiveConcurrency(initial=8, window=4)
+    controller.release(controller.acquire(), THROTTLED)
+
+    for token in fill(controller):
+        controller.release(token)
+
+    assert controller.limit == 5
+
+def test_the_limit_does_not_grow_unless_it_held_requests_back():
+    controller = AdaptiveConcurrency(initial=4, window=2)
+
+    for i in range(4):
+        controller.release(controller.acquire())
+
+    assert controller.limit == 4
+
+def test_the_limit_stays_within_its_range():
+    controller = AdaptiveConcurrency(initial=4, minimum=2, maximum=6, window=4)
+
+    for round_trip in range(3):
+        for token in fill(controller):
+            controller.release(token)
+
+    assert controller.limit == 6
+
+    for round_trip in range(3):
+        controller.release(controller.acquire(), THROTTLED)
+
+    assert controller.limit == 2
+
+
+
+############
+### CUTS ###
+############
+
+def test_throttled_requests_cut_the_limit_at_once():
+    controller = AdaptiveConcurrency(initial=16)
+    controller.release(controller.acquire(), THROTTLED)
+
+    assert controller.limit == 8
+    assert controller.decisions['throttled'] == 1
+
+def test_failed_requests_only_cut_the_limit_over_the_error_target():
+    controller = AdaptiveConcurrency(initial=16, error_target=0.25, window=4)
+
+    for outcome in (FAILED, OK, OK, OK):
+        controller.release(controller.acquire(), outcome)
+
+    assert controller.limit == 16
+
+    for outcome in (FAILED, OK, FAILED, OK):
+        controller.release(controller.acquire(), outcome)
+
+    assert controller.limit == 8
+    assert controller.decisions['errors'] == 1
+
+def test_the_limit_keeps_growing_with_errors_under_the_target():
+    controller = AdaptiveConcurrency(initial=2, maximum=16, error_target=0.05, window=20)
+    released = 0
+
+    #   One error in every 25 requests: 4%
+    for round_trip in range(30):
+        for token in fill(controller):
+            released += 1
+            controller.release(token, FAILED if released % 25 == 0 else OK)
+
+    assert controller.limit == 16
+    assert controller.decisions['errors'] == 0
+
+def test_a_round_trip_of_429s_cuts_the_limit_once():
+    controller = AdaptiveConcurrency(initial=16, maximum=16, window=4)
+    tokens = fill(controller)
+    time.sleep(0.01)
+
+    for token in tokens:
+        controller.release(token, THROTTLED)
+
+    assert controller.limit == 8
+    assert controller.decisions['throttled'] == 1
+
+def test_requests_sent_before_a_cut_do_not_count_towards_the_next_window():
+    controller = AdaptiveConcurrency(initial=16, maximum=16, window=4)
+    tokens = fill(controller)
+    time.sleep(0.01)
+
+    controller.release(tokens[0], THROTTLED)
+
+    for token in tokens[1:]:
+        controller.release(token, THROTTLED if token == tokens[1] else FAILED)
+
+    assert controller.limit == 8
+    assert controller.latencies == []
+    assert sum(controller.decisions.values()) == 1
+
+def test_a_single_very_slow_request_cuts_the_limit():
+    controller = AdaptiveConcurrency(initial=8, latency_target=0.01, spike=3)
+    token = controller.acquire()
+    time.sleep(0.05)
+    controller.release(token)
+
+    assert controller.limit == 4
+    assert controller.decisions['latency_spike'] == 1
+
+def test_a_slow_window_cuts_the_limit():
+    controller = AdaptiveConcurrency(initial=8, latency_target=1, spike=3, window=4)
+
+    for i in range(4):
+        controller.acquire()
+        controller.release(time.time() - 2)
+
+    assert controller.limit == 4
+    assert controller.decisions['latency'] == 1
+
+
+
+#################
+### THE LIMIT ###
+#################
+
+def test_requests_wait_for_a_free_slot():
+    controller = AdaptiveConcurrency(initial=1)
+    token = controller.acquire()
+    acquired = []
+    waiting = threading.Thread(target=lambda: acquired.append(controller.acquire()))
+    waiting.start()
+    time.sleep(0.05)
+
+    assert acquired == []
+
+    controller.release(token)
+    waiting.join(1)
+
+    assert len(acquired) == 1
+
+def test_a_fetcher_holds_a_slot_per_request_and_reports_how_it_went(fetcher):
+    fetcher.concurrency = AdaptiveConcurrency(initial=16, maximum=16)
+    fetcher.session = FakeSession(lambda url, headers: time.sleep(0.2) or FakeResponse(429))
+    threads = [threading.Thread(target=fetcher.send, args=(fetcher.session, 'http://host/courts/a', {})) for i in range(16)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert fetcher.concurrency.in_flight == 0
+    assert fetcher.concurrency.limit == 8
+
+def test_summary_and_report():
+    controller = AdaptiveConcurrency(initial=4, maximum=8)
+    controller.release(controller.acquire(), THROTTLED)
+
+    summary = controller.summary()
+
+    assert (summary['limit'], summary['peak']) == (2, 4)
+    assert [change['decision'] for change in summary['changes']] == ['throttled']
+    assert controller.report() == "concurrency: limit 2 (peak 4, range 1-8)  increases: 0  cuts: throttled x1"
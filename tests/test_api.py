@@ -0,0 +1,179 @@
+"""test_api.py - api.CourtLookup: resolving names and slugs, the row cache, and sharing fetches between callers"""
+
+import time
+import threading
+
+import pytest
+
+from helpers import COURT_PAGE
+from CourtScraper import api
+from CourtScraper.discovery import CourtIndex
+
+AYR = u'https://host//courts/ayr-sheriff-court'
+MOLD = u'https://host//courts/mold-justice-centre'
+
+class CountingLookup(api.CourtLookup):
+    """A CourtLookup whose fetch() builds the row itself, counting calls, instead of fetching and parsing the page"""
+
+    def __init__(self, *args, **kwargs):
+        self.fetched = []
+        self.delay = 0
+        api.CourtLookup.__init__(self, *args, **kwargs)
+
+    def fetch(self, url, court_name=None):
+        self.fetched.append(url)
+        time.sleep(self.delay)
+
+        return {'court_name': court_name, 'url': url, 'telephones': [u'01292 111']}
+
+@pytest.fixture
+def court_index(tmpdir):
+    path = str(tmpdir.join('courts.json'))
+    index = CourtIndex(path)
+    index.see(AYR, u'Ayr Sheriff Court', 'A')
+    index.see(MOLD, u'Mold Justice Centre', 'M')
+    index.save()
+
+    return path
+
+@pytest.fixture
+def lookup(court_index):
+    return CountingLookup(fetcher=object(), court_index=court_index)
+
+
+
+###############
+### RESOLVE ###
+###############
+
+def test_courts_resolve_by_name_or_slug_ignoring_case_and_spacing(lookup):
+    assert lookup.resolve(u'ayr   SHERIFF court')[1] == u'Ayr Sheriff Court'
+    assert lookup.resolve(u'mold-justice-centre')[1] == u'Mold Justice Centre'
+
+def test_unknown_courts_raise_key_error(lookup):
+    with pytest.raises(KeyError):
+        lookup.resolve(u'Atlantis Crown Court')
+
+def test_unknown_courts_reload_the_index_no_more_than_every_few_minutes(lookup, monkeypatch):
+    loads = []
+    listing = lookup.listing
+    monkeypatch.setattr(lookup, 'listing', lambda: loads.append(1) or listing())
+
+    lookup.resolve(u'Ayr Sheriff Court')
+
+    for i in range(3):
+        with pytest.raises(KeyError):
+            lookup.resolve(u'Atlantis Crown Court')
+
+    assert len(loads) == 1
+
+def test_the_a_to_z_pages_are_read_without_a_court_index():
+    from helpers import INDEX_PAGE
+
+    class IndexFetcher(object):
+        def __init__(self):
+            self.urls = []
+
+        def get(self, url):
+            self.urls.append(url)
+            return INDEX_PAGE
+
+    fetcher = IndexFetcher()
+    lookup = CountingLookup(base=u'https://host', buff=u'/courts/a-z/', fetcher=fetcher, court_index=None, workers=2)
+
+    assert lookup.resolve(u'aberystwyth-justice-centre') == (u'https://host/courts/aberystwyth-justice-centre', u'Aberystwyth Justice Centre')
+    assert sorted(fetcher.urls) == [u'https://host/courts/a-z/' + chr(i) for i in range(65, 91)]
+
+
+
+#################
+### ROW CACHE ###
+#################
+
+def test_rows_are_cached_until_their_ttl(lookup):
+    lookup.get_court(u'Ayr Sheriff Court')
+    lookup.get_court(u'ayr-sheriff-court')
+
+    assert lookup.fetched == [AYR]
+    assert lookup.stats() == {'cached': 1, 'hits': 1, 'misses': 1, 'shared': 0}
+
+    lookup.ttl = 0
+    lookup.invalidate()
+    lookup.get_court(u'Ayr Sheriff Court')
+    lookup.get_court(u'Ayr Sheriff Court')
+
+    assert len(lookup.fetched) == 3
+
+def test_the_least_recently_used_row_is_dropped_first(lookup):
+    lookup.max_size = 1
+    lookup.get_court(u'Ayr Sheriff Court')
+    lookup.get_court(u'Mold Justice Centre')
+    lookup.get_court(u'Mold Justice Centre')
+    lookup.get_court(u'Ayr Sheriff Court')
+
+    assert lookup.fetched == [AYR, MOLD, AYR]
+
+def test_callers_get_copies_of_the_cached_row(lookup):
+    lookup.get_court(u'Ayr Sheriff Court')['telephones'].append(u'changed')
+
+    assert lookup.get_court(u'Ayr Sheriff Court')['telephones'] == [u'01292 111']
+
+def test_invalidate_drops_one_court(lookup):
+    lookup.get_court(u'Ayr Sheriff Court')
+    lookup.get_court(u'Mold Justice Centre')
+    lookup.invalidate(u'ayr-sheriff-court')
+    lookup.get_court(u'Ayr Sheriff Court')
+    lookup.get_court(u'Mold Justice Centre')
+
+    assert lookup.fetched == [AYR, MOLD, AYR]
+
+def test_callers_asking_at_once_share_one_fetch(lookup):
+    lookup.delay = 0.2
+    rows = []
+    threads = [threading.Thread(target=lambda: rows.append(lookup.get_court(u'Ayr Sheriff Court'))) for i in range(5)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert lookup.fetched == [AYR]
+    assert len(rows) == 5
+    assert lookup.stats()['shared'] == 4
+
+def test_failed_fetches_are_not_cached(lookup):
+    calls = []
+
+    def fetch(url, court_name=None):
+        calls.append(url)
+
+        if len(calls) == 1:
+            raise IOError('connection reset')
+
+        return {'court_name': court_name, 'url': url}
+
+    lookup.fetch = fetch
+
+    with pytest.raises(IOError):
+        lookup.get_court(u'Ayr Sheriff Court')
+
+    assert lookup.get_court(u'Ayr Sheriff Court')['court_name'] == u'Ayr Sheriff Court'
+    assert len(calls) == 2
+
+
+
+###########
+### ROW ###
+###########
+
+def test_fetch_standardises_the_court_page(court_index):
+    class PageFetcher(object):
+        def get(self, url):
+            return COURT_PAGE
+
+    row = api.CourtLookup(fetcher=PageFetcher(), court_index=court_index).fetch(AYR, u'Ayr Sheriff Court')
+
+    assert row['court_name'] == u'Ayr Sheriff Court'
+    assert row['url'] == AYR
+    assert row['postal_street_address'] == u'PO Box 12\nY Lanfa, Aberystwyth\nSY23 9ZZ'
@@ -0,0 +1,188 @@
+"""test_archive.py - writing pages to an archive and reading them back, and what the Fetcher archives"""
+
+import os
+import gzip
+
+from helpers import FakeResponse, FakeSession
+from CourtScraper import scraper
+from CourtScraper.archive import ArchiveReader, ArchiveWriter, INDEX
+from CourtScraper.cache import ResponseCache
+
+AYR = u'https://host/courts/ayr'
+MOLD = u'https://host/courts/mold'
+
+def index_lines(path):
+    with open(os.path.join(path, INDEX), 'rb') as f:
+        return f.read().splitlines()
+
+
+
+###########################
+### WRITING AND READING ###
+###########################
+
+def test_pages_read_back_as_written(tmpdir):
+    path = str(tmpdir.join('pages'))
+
+    with ArchiveWriter(path) as archive:
+        archive.add(AYR, u'Ayr Sheriff Court \u2013 Wellington Square')
+        archive.add(MOLD, u'Mold Justice Centre')
+
+    with ArchiveReader(path) as pages:
+        assert len(pages) == 2
+        assert pages.get(AYR) == u'Ayr Sheriff Court \u2013 Wellington Square'
+        assert list(pages.pages()) == [(AYR, u'Ayr Sheriff Court \u2013 Wellington Square'), (MOLD, u'Mold Justice Centre')]
+
+def test_segments_are_gzip_warc_files(tmpdir):
+    path = str(tmpdir.join('pages'))
+
+    with ArchiveWriter(path) as archive:
+        archive.add(AYR, u'Ayr')
+
+    with gzip.open(os.path.join(path, 'segment-00001.warc.gz'), 'rb') as f:
+        record = f.read()
+
+    assert record.startswith(b'WARC/1.0\r\n')
+    assert b'WARC-Target-URI: ' + AYR.encode('utf-8') in record
+
+def test_writers_move_on_to_a_new_segment_when_one_is_full(tmpdir):
+    path = str(tmpdir.join('pages'))
+
+    with ArchiveWriter(path, segment_bytes=1) as archive:
+        archive.add(AYR, u'Ayr')
+        archive.add(MOLD, u'Mold')
+
+    with ArchiveWriter(path) as archive:
+        archive.add(u'https://host/courts/bury', u'Bury')
+
+    assert sorted(name for name in os.listdir(path) if name != INDEX) == ['segment-00001.warc.gz', 'segment-00002.warc.gz', 'segment-00003.warc.gz']
+    assert ArchiveReader(path).get(MOLD) == u'Mold'
+
+def test_the_latest_record_of_a_url_wins_and_cut_index_lines_are_ignored(tmpdir):
+    path = str(tmpdir.join('pages'))
+
+    with ArchiveWriter(path) as archive:
+        archive.add(AYR, u'old')
+        archive.add(AYR, u'new')
+
+    with open(os.path.join(path, INDEX), 'ab') as f:
+        f.write(b'https://host/courts/mold\tsegment-00001.warc.gz\t0')
+
+    pages = ArchiveReader(path)
+
+    assert pages.get(AYR) == u'new'
+    assert MOLD not in pages
+
+def test_a_line_torn_by_a_crash_does_not_swallow_the_next_one(tmpdir):
+    path = str(tmpdir.join('pages'))
+
+    with ArchiveWriter(path) as archive:
+        archive.add(AYR, u'Ayr')
+
+    with open(os.path.join(path, INDEX), 'ab') as f:
+        f.write(b'https://host/courts/bury\tsegment-00001.warc')
+
+    with ArchiveWriter(path) as archive:
+        archive.add(MOLD, u'Mold')
+
+    pages = ArchiveReader(path)
+
+    assert (pages.get(AYR), pages.get(MOLD)) == (u'Ayr', u'Mold')
+    assert len(index_lines(path)) == 2
+
+def test_an_index_holding_only_a_torn_line_is_started_again(tmpdir):
+    path = tmpdir.mkdir('pages')
+    path.join(INDEX).write_binary(b'https://host/courts/bury\tsegm')
+
+    with ArchiveWriter(str(path)) as archive:
+        archive.add(AYR, u'Ayr')
+
+    assert ArchiveReader(str(path)).get(AYR) == u'Ayr'
+    assert len(index_lines(str(path))) == 1
+
+def test_tabs_and_line_breaks_in_urls_are_escaped(tmpdir):
+    path = str(tmpdir.join('pages'))
+    url = u'https://host/courts/ayr\tsheriff\r\ncourt'
+
+    with ArchiveWriter(path) as archive:
+        archive.add(url, u'Ayr')
+        archive.add(MOLD, u'Mold')
+
+    pages = ArchiveReader(path)
+
+    assert pages.get(url) == u'Ayr'
+    assert u'https://host/courts/ayr%09sheriff%0D%0Acourt' in pages
+    assert len(index_lines(path)) == 2
+
+
+
+#######################
+### UNCHANGED PAGES ###
+#######################
+
+def test_unchanged_pages_are_not_archived_again(tmpdir):
+    path = str(tmpdir.join('pages'))
+
+    with ArchiveWriter(path) as archive:
+        assert archive.add(AYR, u'Ayr')
+        assert not archive.add(AYR, u'Ayr')
+
+    #   Nor by the next run's writer
+    with ArchiveWriter(path) as archive:
+        assert not archive.add(AYR, u'Ayr')
+        assert archive.add(MOLD, u'Mold')
+        assert archive.add(AYR, u'Ayr, moved')
+
+        assert (archive.count, archive.unchanged) == (2, 1)
+
+    assert len(index_lines(path)) == 3
+    assert ArchiveReader(path).get(AYR) == u'Ayr, moved'
+
+def test_cache_hits_and_not_modified_pages_are_archived_once(fetcher, tmpdir):
+    path = str(tmpdir.join('pages'))
+    fetcher.cache = ResponseCache(str(tmpdir.join('cache.sqlite')))
+    fetcher.archive = ArchiveWriter(path)
+    fetcher.session = FakeSession(FakeResponse(200, u'Ayr', {'ETag': '"v1"'}), FakeResponse(304))
+
+    for i in range(3):
+        assert fetcher.get(AYR) == u'Ayr'
+
+    fetcher.cache.ttl = 60
+    fetcher.get(AYR)
+
+    fetcher.archive.close()
+    fetcher.cache.close()
+
+    assert fetcher.stats.not_modified == 2
+    assert fetcher.stats.cache_hits == 1
+    assert len(index_lines(path)) == 1
+
+def test_cached_pages_missing_from_the_archive_are_added(fetcher, tmpdir):
+    fetcher.cache = ResponseCache(str(tmpdir.join('cache.sqlite')), ttl=60)
+    fetcher.cache.store(AYR, u'Ayr')
+    fetcher.archive = ArchiveWriter(str(tmpdir.join('pages')))
+
+    fetcher.get(AYR)
+    fetcher.archive.close()
+    fetcher.cache.close()
+
+    assert ArchiveReader(str(tmpdir.join('pages'))).get(AYR) == u'Ayr'
+
+
+
+##################
+### RE-PARSING ###
+##################
+
+def test_archived_court_pages_come_out_in_a_crawls_order(tmpdir):
+    path = str(tmpdir.join('pages'))
+
+    with ArchiveWriter(path) as archive:
+        for url in (u'https://host//courts/mold', u'https://host//courts/ayr', u'https://host/courts/a-z/A', u'https://host//courts/aberdeen'):
+            archive.add(url, url)
+
+    items = list(scraper.load_archived_pages(ArchiveReader(path)))
+
+    assert [(item['letter'], item['url']) for item in items] == [
+        ('A', u'https://host//courts/aberdeen'), ('A', u'https://host//courts/ayr'), ('M', u'https://host//courts/mold')]
+    assert all(item['html'] == item['url'] for item in items)
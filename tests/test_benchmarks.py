@@ -0,0 +1,83 @@
+"""test_benchmarks.py - the benchmark fixtures: a reproducible corpus, and a server that serves it like the court finder"""
+
+import os
+import sys
+import hashlib
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from make_fixtures import EMPTY_LETTERS, make_fixtures
+from fixture_server import serve_in_thread
+from crawl_bench import court_pages
+from CourtScraper import scraper
+from CourtScraper.cache import ResponseCache
+from CourtScraper.fetch import Fetcher
+
+def corpus_digest(directory):
+    digest = hashlib.sha1()
+
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), 'rb') as f:
+            digest.update(name.encode('utf-8') + f.read())
+
+    return digest.hexdigest()
+
+@pytest.fixture(scope='module')
+def corpus(tmpdir_factory):
+    directory = str(tmpdir_factory.mktemp('fixtures'))
+    make_fixtures(directory, courts_per_letter=2)
+
+    return directory
+
+@pytest.fixture
+def server(corpus):
+    server = serve_in_thread(corpus)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_the_same_seed_makes_the_same_corpus(corpus, tmpdir):
+    make_fixtures(str(tmpdir), courts_per_letter=2)
+
+    assert corpus_digest(str(tmpdir.join('courts'))) == corpus_digest(os.path.join(corpus, 'courts'))
+
+def test_every_letter_has_an_index_page(corpus):
+    names = os.listdir(os.path.join(corpus, 'courts'))
+
+    assert all(chr(c) + '.html' in names for c in range(65, 91))
+    assert not any(os.path.basename(path)[0].upper() in EMPTY_LETTERS for path in court_pages(corpus))
+
+def test_pages_are_served_with_etags_and_revalidated(server, tmpdir):
+    fetcher = Fetcher(cache=ResponseCache(str(tmpdir.join('cache.sqlite'))))
+    url = server.url + 'courts/A'
+
+    assert u'Courts beginning with A' in fetcher.get(url)
+    assert u'Courts beginning with A' in fetcher.get(url)
+    assert fetcher.stats.not_modified == 1
+    assert fetcher.request(server.url + 'courts/nowhere').status_code == 404
+
+    fetcher.cache.close()
+
+def test_injected_errors_are_retried(corpus):
+    server = serve_in_thread(corpus, error_rate=1.0, seed=1)
+    fetcher = Fetcher(retries=2, backoff=0)
+
+    try:
+        with pytest.raises(Exception):
+            fetcher.get(server.url + 'courts/A')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert server.errors == 3
+    assert fetcher.stats.failures == 1
+
+def test_a_crawl_of_the_server_finds_every_court(server, corpus, monkeypatch):
+    monkeypatch.setattr(scraper, 'FETCHER', Fetcher())
+
+    items = list(scraper.crawl(server.url, 'courts/', workers=4))
+
+    assert len(items) == len(court_pages(corpus))
+    assert all(item['row']['court_name'] and item['row']['url'].startswith(server.url) for item in items)
@@ -0,0 +1,83 @@
+"""test_cache.py - cache.ResponseCache: stored bodies and validators, freshness and least recently used eviction"""
+
+import time
+import random
+
+import pytest
+
+from CourtScraper.cache import ResponseCache
+
+@pytest.fixture
+def cache(tmpdir):
+    cache = ResponseCache(str(tmpdir.join('cache.sqlite')))
+    yield cache
+    cache.close()
+
+def test_lookup_returns_what_was_stored(cache):
+    cache.store('http://host/courts/a', u'Ynys M\xf4n', '"v1"', 'Tue, 01 Jan 2019 00:00:00 GMT')
+
+    entry = cache.lookup('http://host/courts/a')
+
+    assert entry.body == u'Ynys M\xf4n'
+    assert (entry.etag, entry.last_modified) == ('"v1"', 'Tue, 01 Jan 2019 00:00:00 GMT')
+    assert cache.lookup('http://host/courts/b') is None
+
+def test_store_replaces_an_entry(cache):
+    cache.store('http://host/courts/a', u'old')
+    cache.store('http://host/courts/a', u'new', '"v2"')
+
+    assert cache.lookup('http://host/courts/a').body == u'new'
+    assert cache.total_bytes == cache.db.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+
+def test_entries_are_fresh_for_the_ttl(cache):
+    cache.store('http://host/courts/a', u'page')
+    entry = cache.lookup('http://host/courts/a')
+
+    assert not cache.is_fresh(entry)
+
+    cache.ttl = 60
+    assert cache.is_fresh(entry)
+    assert not cache.is_fresh(entry._replace(fetched_at=time.time() - 61))
+
+def test_touch_renews_an_entry(cache):
+    cache.store('http://host/courts/a', u'page')
+    before = cache.lookup('http://host/courts/a').fetched_at
+
+    time.sleep(0.01)
+    cache.touch('http://host/courts/a')
+
+    assert cache.lookup('http://host/courts/a').fetched_at > before
+
+def test_least_recently_used_entries_are_evicted_first(tmpdir):
+    cache = ResponseCache(str(tmpdir.join('cache.sqlite')), max_bytes=10 ** 6)
+    #   Random text barely compresses, so each body takes about its own length
+    rnd = random.Random(1)
+    page = u''.join(u'{:08x}'.format(rnd.getrandbits(32)) for i in range(4000))
+
+    for name in 'abc':
+        cache.store('http://host/courts/' + name, name + page)
+        time.sleep(0.01)
+
+    cache.lookup('http://host/courts/a')
+    cache.max_bytes = cache.total_bytes - 1
+    cache.store('http://host/courts/d', u'd' + page)
+
+    assert cache.lookup('http://host/courts/b') is None
+    assert cache.lookup('http://host/courts/a') is not None
+    assert cache.lookup('http://host/courts/d') is not None
+    assert cache.total_bytes <= cache.max_bytes
+
+    cache.close()
+
+def test_entries_survive_reopening(tmpdir):
+    path = str(tmpdir.join('cache.sqlite'))
+    cache = ResponseCache(path)
+    cache.store('http://host/courts/a', u'page', '"v1"')
+    cache.close()
+
+    cache = ResponseCache(path)
+
+    assert cache.lookup('http://host/courts/a').etag == '"v1"'
+    assert cache.total_bytes > 0
+
+    cache.close()
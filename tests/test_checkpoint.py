@@ -0,0 +1,116 @@
+"""test_checkpoint.py - the crawl journal, and resuming a crawl from it"""
+
+import os
+
+import pytest
+
+from CourtScraper import scraper, cli
+from CourtScraper.checkpoint import Checkpoint, CheckpointMismatch
+from CourtScraper.manifest import Manifest
+
+BASE = u'https://host/'
+
+def court(letter, slug, **item):
+    return dict({'letter': letter, 'court': slug.title(), 'url': BASE + u'/courts/' + slug, 'row': {'court_name': slug.title()}}, **item)
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join('crawl.checkpoint'))
+
+def test_finished_courts_and_letters_load_back(path):
+    checkpoint = Checkpoint(path)
+    checkpoint.start(BASE)
+    checkpoint.record_court(court('A', u'ayr', html=u'<html/>', digest='d1'))
+    checkpoint.record_letter('A')
+    checkpoint.record_court(court('B', u'bury'))
+    checkpoint.close()
+
+    loaded = Checkpoint.load(path)
+
+    assert loaded.base == BASE
+    assert loaded.letters == set('A')
+    assert [item['url'] for item in loaded.finished_courts('A')] == [BASE + u'/courts/ayr']
+    assert 'html' not in loaded.resumed_item(BASE + u'/courts/ayr')
+    assert loaded.resumed_item(BASE + u'/courts/bury')['resumed']
+    assert loaded.resumed_item(BASE + u'/courts/cardiff') is None
+
+def test_a_line_cut_short_by_a_crash_is_ignored(path):
+    checkpoint = Checkpoint(path)
+    checkpoint.start(BASE)
+    checkpoint.record_court(court('A', u'ayr'))
+    checkpoint.close()
+
+    with open(path, 'ab') as f:
+        f.write(b'{"letter": "A", "url": "https://ho')
+
+    assert list(Checkpoint.load(path).courts) == [BASE + u'/courts/ayr']
+
+def test_resuming_a_checkpoint_of_another_site_fails(path):
+    checkpoint = Checkpoint(path)
+    checkpoint.start(BASE)
+    checkpoint.close()
+
+    with pytest.raises(CheckpointMismatch):
+        Checkpoint.load(path).start(u'https://elsewhere/', resume=True)
+
+def test_starting_afresh_forgets_the_old_journal_and_finishing_removes_it(path):
+    checkpoint = Checkpoint(path)
+    checkpoint.start(BASE)
+    checkpoint.record_court(court('A', u'ayr'))
+    checkpoint.close()
+
+    checkpoint = Checkpoint.load(path)
+    checkpoint.start(BASE, resume=False)
+
+    assert not checkpoint.courts
+    assert Checkpoint.load(path).courts == {}
+
+    checkpoint.finish()
+
+    assert not os.path.exists(path)
+
+def test_checkpoint_items_journals_new_courts_and_passed_letters(path):
+    checkpoint = Checkpoint(path)
+    checkpoint.start(BASE)
+    items = [court('A', u'ayr', resumed=True), court('C', u'cardiff')]
+
+    assert list(scraper.checkpoint_items(items, checkpoint, letters=range(65, 69))) == items
+    assert list(checkpoint.courts) == [BASE + u'/courts/cardiff']
+    assert checkpoint.letters == set('ABCD')
+
+    checkpoint.close()
+
+def test_resumed_crawls_skip_finished_letters_and_courts(path, monkeypatch):
+    checkpoint = Checkpoint(path)
+    checkpoint.start(BASE)
+    checkpoint.record_court(court('A', u'ayr'))
+    checkpoint.record_letter('A')
+    checkpoint.record_court(court('B', u'bury'))
+    checkpoint.close()
+
+    fetched = []
+
+    def get_courts(base, buff, char):
+        fetched.append(chr(char))
+        return {u'Bury': BASE + u'/courts/bury', u'Bath': BASE + u'/courts/bath'}
+
+    monkeypatch.setattr(scraper, 'get_courts', get_courts)
+    items = list(scraper.discover_courts(BASE, u'courts/', letters=[65, 66], checkpoint=Checkpoint.load(path)))
+
+    assert fetched == ['B']
+    assert [(item['url'], bool(item.get('resumed'))) for item in items] == [
+        (BASE + u'/courts/ayr', True), (BASE + u'/courts/bath', False), (BASE + u'/courts/bury', True)]
+
+def test_incremental_runs_resume_courts_finished_without_a_digest():
+    manifest = Manifest('unused.json', {BASE + u'/courts/ayr': {'hash': 'd1', 'row': {'court_name': u'Ayr'}}})
+    resumed = court('A', u'ayr', resumed=True)
+
+    items = list(scraper.remember_rows(scraper.skip_unchanged([resumed], manifest), manifest))
+
+    assert items == [resumed]
+    assert manifest.removed() == []
+    assert manifest.lookup(BASE + u'/courts/ayr', 'd1') == {'court_name': u'Ayr'}
+
+def test_resume_needs_the_checkpoint():
+    with pytest.raises(SystemExit):
+        cli.main(['crawl', '--resume', '--no-checkpoint'])
@@ -0,0 +1,81 @@
+"""test_discovery.py - canonical court URLs, sitemaps, and the court index of new and removed courts"""
+
+import pytest
+
+from CourtScraper.discovery import CourtIndex, canonical_url, court_letter, sitemap_listing, sitemap_locations
+
+URLSET = u"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<url><loc>https://host/courts/bury-court</loc></url>
+<url><loc>https://host/courts/ayr-sheriff-court/</loc></url>
+<url><loc>https://host/courts/A</loc></url>
+<url><loc>https://host/help/accessibility</loc></url>
+<url><loc>https://host/courts/2nd-floor-tribunal</loc></url>
+</urlset>
+"""
+
+SITEMAP_INDEX = u"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<sitemap><loc>https://host/sitemap-1.xml</loc></sitemap>
+</sitemapindex>
+"""
+
+def test_canonical_urls_collapse_repeated_slashes_but_not_the_scheme():
+    assert canonical_url(u'https://host//courts/ayr') == u'https://host/courts/ayr'
+    assert canonical_url(u'/courts//ayr') == u'/courts/ayr'
+
+def test_court_letters():
+    assert court_letter(u'ayr-sheriff-court') == 'A'
+    assert court_letter(u'2nd-floor-tribunal') == '#'
+
+def test_sitemaps_list_court_pages_by_letter():
+    pages = {u'https://host/sitemap.xml': SITEMAP_INDEX, u'https://host/sitemap-1.xml': URLSET}
+
+    assert sitemap_locations(SITEMAP_INDEX) == (True, [u'https://host/sitemap-1.xml'])
+    assert sitemap_listing(pages.get, u'https://host/sitemap.xml') == [
+        ('#', [(None, u'https://host/courts/2nd-floor-tribunal')]),
+        ('A', [(None, u'https://host/courts/ayr-sheriff-court/')]),
+        ('B', [(None, u'https://host/courts/bury-court')]),
+        ]
+
+def test_sitemap_indexes_are_followed_only_so_deep():
+    assert sitemap_listing(lambda url: SITEMAP_INDEX, u'https://host/sitemap.xml', depth=3) == []
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join('courts.json'))
+
+def test_the_index_reports_new_and_removed_courts(path):
+    index = CourtIndex.load(path)
+    index.see(u'https://host//courts/ayr', u'Ayr', 'A')
+    index.see(u'https://host//courts/bury', u'Bury', 'B')
+    index.save()
+
+    index = CourtIndex.load(path)
+    index.see(u'https://host/courts/ayr', None, 'A')
+    index.see(u'https://host/courts/cardiff', None, 'C')
+
+    assert index.added == [u'https://host/courts/cardiff']
+    assert index.removed() == [u'https://host/courts/bury']
+    assert index.entries[u'https://host/courts/ayr']['court'] == u'Ayr'
+
+    index.save()
+
+    #   Gone courts are only reported once
+    index = CourtIndex.load(path)
+    index.see(u'https://host/courts/ayr', None, 'A')
+    index.see(u'https://host/courts/cardiff', None, 'C')
+
+    assert (index.added, index.removed()) == ([], [])
+
+def test_courts_that_come_back_are_new_again(path):
+    index = CourtIndex(path)
+    index.see(u'https://host/courts/ayr', u'Ayr', 'A')
+    index.save()
+
+    CourtIndex.load(path).save()
+
+    index = CourtIndex.load(path)
+    index.see(u'https://host/courts/ayr', u'Ayr', 'A')
+
+    assert index.added == [u'https://host/courts/ayr']
@@ -0,0 +1,205 @@
+"""test_fetch.py - fetch.Fetcher and the concurrency around it: rate limiting, retries, caching and archiving"""
+
+import time
+import threading
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from helpers import FakeResponse, FakeSession
+from CourtScraper import scraper
+from CourtScraper.cache import CacheMiss, ResponseCache
+from CourtScraper.fetch import TokenBucket, HostRateLimiter, retry_after_seconds
+
+
+
+##################################
+### THROTTLING / RATE LIMITING ###
+##################################
+
+def test_token_bucket_spaces_requests_at_its_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    start = time.time()
+
+    for i in range(6):
+        bucket.acquire()
+
+    #   The first token is in reserve; the other five wait 1/50s each
+    assert time.time() - start >= 0.09
+
+def test_token_bucket_allows_a_burst_up_to_its_capacity():
+    bucket = TokenBucket(rate=1, capacity=5)
+    start = time.time()
+
+    for i in range(5):
+        bucket.acquire()
+
+    assert time.time() - start < 0.5
+
+def test_host_rate_limiter_keeps_one_bucket_per_host():
+    limiter = HostRateLimiter(rate=1, burst=1)
+    start = time.time()
+
+    limiter.wait('http://one.example/courts/a')
+    limiter.wait('http://two.example/courts/a')
+
+    assert time.time() - start < 0.5
+    assert sorted(limiter.buckets) == ['one.example', 'two.example']
+
+
+
+###########################
+### CONCURRENT FETCHING ###
+###########################
+
+class SlowFetcher(object):
+    """Answers get() with the URL, slower for earlier URLs, and counts how many calls overlap"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = self.most_in_flight = 0
+
+    def get(self, url):
+        with self.lock:
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+
+        time.sleep(0.05 / int(url))
+
+        with self.lock:
+            self.in_flight -= 1
+
+        return u'page ' + url
+
+def test_fetch_pages_fetches_in_parallel_and_keeps_input_order(monkeypatch):
+    fetcher = SlowFetcher()
+    monkeypatch.setattr(scraper, 'FETCHER', fetcher)
+
+    items = list(scraper.fetch_pages(({'url': str(i)} for i in range(1, 13)), workers=4))
+
+    assert [item['html'] for item in items] == [u'page {}'.format(i) for i in range(1, 13)]
+    assert 1 < fetcher.most_in_flight <= 8
+
+def test_fetch_pages_passes_finished_items_through(monkeypatch):
+    monkeypatch.setattr(scraper, 'FETCHER', SlowFetcher())
+
+    items = list(scraper.fetch_pages([{'url': '1', 'row': {'court_name': u'Done'}}]))
+
+    assert 'html' not in items[0]
+
+
+
+###############################
+### RETRIES AND THEIR DELAY ###
+###############################
+
+def test_request_retries_transient_statuses_until_one_succeeds(fetcher):
+    fetcher.session = FakeSession(FakeResponse(503), FakeResponse(429), FakeResponse(200, u'court'))
+
+    assert fetcher.request('http://host/courts/a').text == u'court'
+    assert len(fetcher.session.calls) == 3
+    assert fetcher.stats.retries == 2
+    assert fetcher.stats.retry_reasons == {'503': 1, '429': 1}
+    assert fetcher.stats.failures == 0
+
+def test_request_retries_connection_errors(fetcher):
+    fetcher.session = FakeSession(requests.ConnectionError('refused'), requests.Timeout('slow'), FakeResponse(200, u'court'))
+
+    assert fetcher.request('http://host/courts/a').text == u'court'
+    assert fetcher.stats.retry_reasons == {'ConnectionError': 1, 'Timeout': 1}
+
+def test_request_gives_up_after_the_last_retry(fetcher):
+    fetcher.retries = 2
+    fetcher.session = FakeSession(FakeResponse(502))
+
+    with pytest.raises(requests.HTTPError):
+        fetcher.request('http://host/courts/a')
+
+    assert len(fetcher.session.calls) == 3
+    assert fetcher.stats.failures == 1
+
+def test_request_does_not_retry_final_statuses(fetcher):
+    fetcher.session = FakeSession(FakeResponse(404))
+
+    assert fetcher.request('http://host/courts/gone').status_code == 404
+    assert len(fetcher.session.calls) == 1
+    assert fetcher.stats.retries == 0
+
+def test_delay_is_jittered_under_an_exponential_ceiling(fetcher):
+    fetcher.backoff, fetcher.max_backoff = 0.5, 3
+
+    for attempt in range(6):
+        assert 0 <= fetcher.delay(attempt) <= min(3, 0.5 * 2 ** attempt)
+
+def test_delay_follows_retry_after_up_to_the_maximum(fetcher):
+    fetcher.max_backoff = 60
+
+    assert fetcher.delay(0, 7) == 7
+    assert fetcher.delay(0, 600) == 60
+
+def test_retry_after_takes_seconds_or_an_http_date():
+    assert retry_after_seconds('120') == 120
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds('soon') is None
+    assert 25 <= retry_after_seconds(formatdate(time.time() + 30, usegmt=True)) <= 30
+
+
+
+########################################
+### CACHING AND CONDITIONAL REQUESTS ###
+########################################
+
+@pytest.fixture
+def cached(fetcher, tmpdir):
+    """The fetcher, with an empty ResponseCache"""
+
+    fetcher.cache = ResponseCache(str(tmpdir.join('cache.sqlite')))
+    yield fetcher
+    fetcher.cache.close()
+
+def test_get_stores_pages_with_their_validators(cached):
+    cached.session = FakeSession(FakeResponse(200, u'court', {'ETag': '"v1"', 'Last-Modified': 'Tue, 01 Jan 2019 00:00:00 GMT'}))
+
+    assert cached.get('http://host/courts/a') == u'court'
+    assert cached.cache.lookup('http://host/courts/a').etag == '"v1"'
+
+def test_get_revalidates_cached_pages_and_keeps_them_on_304(cached):
+    cached.cache.store('http://host/courts/a', u'court', '"v1"', 'Tue, 01 Jan 2019 00:00:00 GMT')
+    cached.session = FakeSession(FakeResponse(304))
+
+    assert cached.get('http://host/courts/a') == u'court'
+    assert cached.session.calls[0][1] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Tue, 01 Jan 2019 00:00:00 GMT'}
+    assert cached.stats.not_modified == 1
+
+def test_get_replaces_cached_pages_that_changed(cached):
+    cached.cache.store('http://host/courts/a', u'old', '"v1"')
+    cached.session = FakeSession(FakeResponse(200, u'new', {'ETag': '"v2"'}))
+
+    assert cached.get('http://host/courts/a') == u'new'
+    assert cached.cache.lookup('http://host/courts/a').etag == '"v2"'
+
+def test_get_serves_fresh_pages_without_a_request(cached):
+    cached.cache.ttl = 60
+    cached.cache.store('http://host/courts/a', u'court')
+
+    assert cached.get('http://host/courts/a') == u'court'
+    assert cached.session.calls == []
+    assert cached.stats.cache_hits == 1
+
+def test_offline_get_only_uses_the_cache(cached):
+    cached.offline = True
+    cached.cache.store('http://host/courts/a', u'court')
+
+    assert cached.get('http://host/courts/a') == u'court'
+
+    with pytest.raises(CacheMiss):
+        cached.get('http://host/courts/b')
+
+    assert cached.session.calls == []
+
+def test_error_pages_are_not_cached(cached):
+    cached.session = FakeSession(FakeResponse(404, u'not found'))
+    cached.get('http://host/courts/gone')
+
+    assert cached.cache.lookup('http://host/courts/gone') is None
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""test_geo.py - postcodes, the postcode table, and nearest-court searches over the spatial index"""
+
+import io
+import math
+import random
+
+import pytest
+
+from CourtScraper.geo import EARTH_RADIUS_KM, court_postcode, court_types, postcode_key
+
+POSTCODES = u"""pcds,lat,long
+SY23 1AS,52.4106,-4.0829
+SY23 9ZZ,52.4200,-4.0800
+KA8 0BD,55.4627,-4.6286
+M1 4AH,53.4781,-2.2361
+NR3 1UR,52.6340,1.2978
+XX9 9XX,99.999999,0.0
+SY23 1ÅS,52.0,-4.0
+"""
+
+COURTS = [
+    {'court_name': u'Aberystwyth Justice Centre', 'visiting_postcode': u'SY23 1AS', 'crown_court_id': u'3253'},
+    {'court_name': u'Ayr Sheriff Court', 'postal_street_address': u'Russell House\nKA8 0BD'},
+    {'court_name': u'Manchester Civil Justice Centre', 'visiting_postcode': u'm14ah', 'county_court_id': u'180'},
+    {'court_name': u'Nowhere Tribunal', 'visiting_postcode': None},
+    ]
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+@pytest.fixture
+def np():
+    return pytest.importorskip('numpy')
+
+@pytest.fixture
+def table(np, tmpdir):
+    from CourtScraper.geo import PostcodeTable
+
+    path = str(tmpdir.join('postcodes.csv'))
+
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(POSTCODES)
+
+    return PostcodeTable.load(path)
+
+def test_postcode_keys_ignore_spaces_and_case():
+    assert postcode_key(u' sy23  1as ') == b'SY231AS'
+    assert postcode_key(u'SY23 1AS') == b'SY231AS'
+
+def test_postcodes_that_are_not_ascii_are_unknown():
+    with pytest.raises(KeyError):
+        postcode_key(u'SY23 1ÅS')
+
+def test_court_postcodes_and_types():
+    assert [court_postcode(row) for row in COURTS] == [u'SY23 1AS', u'KA8 0BD', u'M1 4AH', None]
+    assert court_types(COURTS[0]) == set(['crown'])
+    assert court_types(COURTS[3]) == set(['tribunal'])
+
+def test_the_table_skips_postcodes_without_a_location(table):
+    assert len(table) == 5
+    assert table.locate(u'sy231as') == (52.4106, -4.0829)
+    assert table.locate(u'XX9 9XX') is None
+    assert table.locate(u'SY23 1ÅS') is None
+
+def test_the_spatial_index_finds_what_a_full_scan_finds(np):
+    from CourtScraper.geo import SpatialIndex
+
+    rnd = random.Random(1)
+    points = [(rnd.uniform(49.9, 58.7), rnd.uniform(-7.5, 1.8)) for i in range(500)]
+    index = SpatialIndex([lat for lat, lon in points], [lon for lat, lon in points], range(500), cell_km=20)
+
+    for lat, lon in [(52.41, -4.08), (51.5, -0.12), (60.0, -1.0)]:
+        found = index.nearest(lat, lon, 7)
+        expected = sorted((haversine_km(lat, lon, plat, plon), i) for i, (plat, plon) in enumerate(points))[:7]
+
+        assert [item for km, item in found] == [i for km, i in expected]
+        assert all(abs(km - expected_km) < 0.01 for (km, item), (expected_km, i) in zip(found, expected))
+
+def test_nearest_courts_by_distance_and_type(table):
+    from CourtScraper.geo import CourtLocator
+
+    locator = CourtLocator(COURTS, table)
+    names = lambda found: [row['court_name'] for km, row in found]
+
+    assert [row['court_name'] for row in locator.unlocated] == [u'Nowhere Tribunal']
+    assert names(locator.nearest(u'SY23 9ZZ', 2)) == [u'Aberystwyth Justice Centre', u'Manchester Civil Justice Centre']
+    assert names(locator.nearest(u'KA8 0BD', 5, 'county')) == [u'Manchester Civil Justice Centre']
+    assert locator.nearest(u'SY23 9ZZ', 1)[0][0] == pytest.approx(1.1, abs=0.1)
+
+def test_unknown_postcodes_raise_key_error(table):
+    from CourtScraper.geo import CourtLocator
+
+    locator = CourtLocator(COURTS, table)
+
+    for postcode in (u'EH1 1AA', u'SY23 1ÅS', u'not a postcode'):
+        with pytest.raises(KeyError):
+            locator.nearest(postcode)
+
+def test_an_empty_table_finds_nothing(np):
+    from CourtScraper.geo import CourtLocator, PostcodeTable
+
+    empty = PostcodeTable(np.array([]), np.array([]), np.array([]))
+
+    assert empty.locate(u'SY23 1AS') is None
+    assert CourtLocator(COURTS, empty).nearest(u'SY23 1AS') == []
@@ -0,0 +1,88 @@
+"""test_manifest.py - manifest.Manifest and the incremental crawl stages built on it"""
+
+import json
+
+import pytest
+
+from CourtScraper import manifest as manifest_module
+from CourtScraper.manifest import Manifest, atomic_open, page_digest
+from CourtScraper.scraper import skip_unchanged, remember_rows
+
+ROW = {'court_name': u'Ayr Sheriff Court', 'url': u'http://host/courts/ayr'}
+
+def test_page_digest_covers_the_court_name_and_the_page():
+    digest = page_digest(u'Ayr', u'<html/>')
+
+    assert digest == page_digest(u'Ayr', u'<html/>')
+    assert digest != page_digest(u'Ayr Sheriff Court', u'<html/>')
+    assert digest != page_digest(u'Ayr', u'<html></html>')
+
+def test_lookup_returns_the_row_only_for_an_unchanged_page():
+    manifest = Manifest('unused.json')
+    manifest.update(ROW['url'], 'digest-1', ROW)
+
+    assert manifest.lookup(ROW['url'], 'digest-1') == ROW
+    assert manifest.lookup(ROW['url'], 'digest-2') is None
+    assert manifest.lookup(u'http://host/courts/new', 'digest-1') is None
+    assert manifest.unchanged == 1
+
+def test_update_counts_added_and_changed_courts():
+    manifest = Manifest('unused.json')
+    manifest.update(ROW['url'], 'digest-1', ROW)
+    manifest.update(ROW['url'], 'digest-2', ROW)
+
+    assert (manifest.added, manifest.changed) == (1, 1)
+
+def test_courts_not_seen_are_removed_and_pruned():
+    manifest = Manifest('unused.json', {u'http://host/courts/a': {'hash': 'x', 'row': {}}, u'http://host/courts/b': {'hash': 'y', 'row': {}}})
+    manifest.lookup(u'http://host/courts/a', 'x')
+
+    assert manifest.removed() == [u'http://host/courts/b']
+
+    manifest.prune()
+
+    assert list(manifest.entries) == [u'http://host/courts/a']
+
+def test_saved_manifest_loads_back(tmpdir):
+    path = str(tmpdir.join('manifest.json'))
+    manifest = Manifest(path)
+    manifest.update(ROW['url'], 'digest-1', ROW)
+    manifest.save()
+
+    assert Manifest.load(path).lookup(ROW['url'], 'digest-1') == ROW
+
+def test_manifest_of_another_format_is_ignored(tmpdir):
+    path = tmpdir.join('manifest.json')
+    path.write(json.dumps({'format': manifest_module.FORMAT - 1, 'courts': {ROW['url']: {'hash': 'digest-1', 'row': ROW}}}))
+
+    assert Manifest.load(str(path)).entries == {}
+
+def test_atomic_open_keeps_the_old_file_when_writing_fails(tmpdir):
+    path = tmpdir.join('out.json')
+    path.write('old')
+
+    with pytest.raises(RuntimeError):
+        with atomic_open(str(path)) as f:
+            f.write(b'half')
+            raise RuntimeError('crash')
+
+    assert path.read() == 'old'
+    assert tmpdir.listdir() == [path]
+
+def test_unchanged_pages_reuse_their_row_and_changed_ones_are_remembered():
+    manifest = Manifest('unused.json')
+    unchanged = {'court': u'Ayr', 'url': u'http://host/courts/ayr', 'html': u'same'}
+    changed = {'court': u'Bury', 'url': u'http://host/courts/bury', 'html': u'new'}
+    manifest.update(unchanged['url'], page_digest(u'Ayr', u'same'), ROW)
+    manifest.update(changed['url'], page_digest(u'Bury', u'old'), {})
+
+    items = list(skip_unchanged([unchanged, changed], manifest))
+
+    assert items[0]['row'] == ROW and items[0]['unchanged']
+    assert 'row' not in items[1]
+
+    items[1]['row'] = {'court_name': u'Bury'}
+    list(remember_rows(items, manifest))
+
+    assert manifest.lookup(changed['url'], page_digest(u'Bury', u'new')) == {'court_name': u'Bury'}
+    assert manifest.removed() == []
@@ -0,0 +1,158 @@
+"""test_metrics.py - stage histograms, the run summary in its formats, and the status a crawl's summary is saved with"""
+
+import json
+import time
+
+import pytest
+
+from CourtScraper import cli, scraper
+from CourtScraper.fetch import FetchStats
+from CourtScraper.metrics import Histogram, Metrics
+
+def test_histogram_counts_into_buckets_and_estimates_quantiles():
+    histogram = Histogram(buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.05, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 7, 1]
+    assert (histogram.count, histogram.max) == (10, 2.0)
+    assert 0.1 < histogram.quantile(0.5) < 1.0
+    assert histogram.quantile(1.0) <= 2.0
+    assert Histogram().quantile(0.5) is None
+
+def test_stages_are_timed_and_unknown_ones_refused():
+    metrics = Metrics()
+
+    with metrics.time('parse'):
+        pass
+
+    assert metrics.stages['parse'].count == 1
+
+    with pytest.raises(ValueError):
+        metrics.profile('download')
+
+def test_courts_are_counted_per_letter():
+    metrics = Metrics()
+    metrics.record_court('A')
+    metrics.record_court('A')
+    metrics.record_court('B')
+    metrics.record_court()
+
+    assert metrics.courts == 4
+    assert [(letter, courts) for letter, (courts, seconds) in metrics.letters.items()] == [('A', 2), ('B', 1)]
+
+def test_summary_folds_in_the_fetch_stats():
+    stats = FetchStats()
+    stats.record('http://host/courts/a', 0.2, 1000)
+    stats.record_retry('503')
+
+    summary = Metrics().summary(stats, 'ok')
+
+    assert summary['status'] == 'ok'
+    assert summary['fetch']['requests'] == 1
+    assert summary['fetch']['retry_reasons'] == {'503': 1}
+    json.dumps(summary)
+
+def test_prometheus_text_has_cumulative_stage_buckets():
+    metrics = Metrics(stages=('fetch',))
+    metrics.stages['fetch'].observe(0.02)
+    metrics.stages['fetch'].observe(3.0)
+    metrics.record_court('A')
+
+    lines = metrics.prometheus_text(FetchStats(), 'ok').splitlines()
+
+    assert '# TYPE courtscraper_stage_seconds histogram' in lines
+    assert 'courtscraper_stage_seconds_bucket{stage="fetch",le="0.025"} 1' in lines
+    assert 'courtscraper_stage_seconds_bucket{stage="fetch",le="+Inf"} 2' in lines
+    assert 'courtscraper_courts_total{letter="A"} 1' in lines
+    assert 'courtscraper_run_succeeded 1' in lines
+
+def test_a_profiled_stage_saves_its_profile(tmpdir):
+    metrics = Metrics()
+    metrics.profile('parse')
+
+    with metrics.time('parse'):
+        sorted(range(1000))
+
+    assert metrics.save_profile(str(tmpdir.join('parse.prof')))
+    assert tmpdir.join('parse.prof').size() > 0
+
+def test_the_sampling_profiler_stops_before_it_saves(tmpdir):
+    metrics = Metrics()
+    metrics.profile('parse', 'sampling')
+    sampler = metrics.profiler
+
+    with metrics.time('parse'):
+        end = time.time() + 0.1
+
+        while time.time() < end:
+            sorted(range(1000))
+
+    assert metrics.save_profile(str(tmpdir.join('parse.stacks')))
+    assert not sampler.thread.is_alive()
+
+    lines = tmpdir.join('parse.stacks').read().splitlines()
+
+    assert sum(int(line.rsplit(' ', 1)[1]) for line in lines) == sum(sampler.samples.values()) > 0
+    assert any('test_metrics:test_the_sampling_profiler_stops_before_it_saves' in line for line in lines)
+
+
+
+#######################
+### RUN STATUS, CLI ###
+#######################
+
+def run_crawl(tmpdir, monkeypatch, crawl, *options):
+    """Runs the crawl command over a stand-in for scraper.crawl; returns the status its --metrics summary was saved with"""
+
+    monkeypatch.setattr(scraper, 'crawl', crawl)
+    monkeypatch.setattr(scraper, 'FETCHER', scraper.FETCHER)
+    monkeypatch.setattr(scraper, 'METRICS', Metrics())
+    summary = tmpdir.join('metrics.json')
+
+    try:
+        cli.main(['crawl', '--no-cache', '--no-checkpoint', '--output', str(tmpdir.join('out.jsonl')), '--metrics', str(summary),
+                  '--court-index', str(tmpdir.join('courts.json'))] + list(options))
+    finally:
+        status = json.loads(summary.read())['status']
+
+    return status
+
+def crawl(*args):
+    yield {'letter': 'A', 'court': u'Ayr', 'url': u'https://host//courts/ayr', 'row': {'court_name': u'Ayr'}}
+
+def test_a_completed_crawl_is_saved_as_ok(tmpdir, monkeypatch):
+    assert run_crawl(tmpdir, monkeypatch, crawl) == 'ok'
+    assert tmpdir.join('out.jsonl').check()
+
+def test_an_interrupted_crawl_is_saved_as_interrupted(tmpdir, monkeypatch):
+    def interrupted(*args):
+        for item in crawl():
+            yield item
+
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_crawl(tmpdir, monkeypatch, interrupted)
+
+    assert json.loads(tmpdir.join('metrics.json').read())['status'] == 'interrupted'
+    assert not tmpdir.join('out.jsonl').check()
+
+def test_a_crawl_that_fails_is_saved_as_failed(tmpdir, monkeypatch):
+    def failing(*args):
+        raise IOError('disk full')
+        yield
+
+    with pytest.raises(IOError):
+        run_crawl(tmpdir, monkeypatch, failing)
+
+    assert json.loads(tmpdir.join('metrics.json').read())['status'] == 'failed'
+
+def test_progress_names_courts_the_sitemap_left_nameless(tmpdir, monkeypatch, capsys):
+    def nameless(*args):
+        yield {'letter': 'A', 'court': None, 'url': u'https://host/courts/ayr', 'row': {'court_name': u'Ayr Sheriff Court'}}
+
+    run_crawl(tmpdir, monkeypatch, nameless, '--sitemap', 'https://host/sitemap.xml')
+
+    assert u'Total: 0: Ayr Sheriff Court' in capsys.readouterr()[0]
@@ -0,0 +1,46 @@
+"""test_model.py - the court record model, and the standardised rows built from it"""
+
+import pytest
+
+from CourtScraper.model import Address, Contact, CourtRecord
+from CourtScraper.scraper import standardise_record
+
+@pytest.fixture
+def record():
+    return CourtRecord(
+        u'Aberystwyth Justice Centre', u'https://host//courts/aberystwyth-justice-centre',
+        addresses=[Address(u'visiting', [u'Y Lanfa', u'Trefechan'], town=u'Aberystwyth', region=u'Ceredigion', postcode=u'SY23 1AS'),
+                   Address(u'postal', [u'PO Box 12', u'SY23 9ZZ'])],
+        contacts=[Contact(u'telephone', u'Enquiries:', [u'01970 621 250', u'']),
+                  Contact(u'email', u'Enquiries:', [u'enquiries@ayr.gsi.gov.uk', u'solicitors@ayr.gsi.gov.uk'])],
+        codes={u'Crown Court location code': u'3253', u'DX': u'99560 Aberystwyth 2'})
+
+def test_records_are_slotted():
+    with pytest.raises(AttributeError):
+        CourtRecord(u'Ayr', u'https://host//courts/ayr').notes = u'no room for this'
+
+def test_lookups_by_kind_and_label(record):
+    assert record.address(u'postal').street_address == u'PO Box 12\nSY23 9ZZ'
+    assert record.address(u'registered') is None
+    assert record.contact(u'email', u'Enquiries:').values[0] == u'enquiries@ayr.gsi.gov.uk'
+    assert record.contact(u'email', u'Listing:') is None
+    assert (record.crown_court_id, record.county_court_id, record.dx) == (u'3253', None, u'99560 Aberystwyth 2')
+
+def test_the_last_of_a_repeated_kind_wins():
+    record = CourtRecord(u'Ayr', u'https://host//courts/ayr', addresses=[Address(u'visiting', [u'Old']), Address(u'visiting', [u'New'])])
+
+    assert record.address(u'visiting').lines == [u'New']
+
+def test_standardise_record(record):
+    assert standardise_record(record) == {
+        'court_name': u'Aberystwyth Justice Centre', 'url': u'https://host//courts/aberystwyth-justice-centre',
+        'crown_court_id': u'3253', 'county_court_id': None, 'dx': u'99560 Aberystwyth 2',
+        'telephones': [u'01970 621 250'], 'emails': [u'enquiries@ayr.gsi.gov.uk'],
+        'visiting_street_address': u'Y Lanfa\nTrefechan', 'visiting_town': u'Aberystwyth', 'visiting_region': u'Ceredigion', 'visiting_postcode': u'SY23 1AS',
+        'postal_street_address': u'PO Box 12\nSY23 9ZZ', 'postal_town': None, 'postal_region': None, 'postal_postcode': None,
+        }
+
+def test_emails_fall_back_to_contact_lines_mentioning_enquiries():
+    record = CourtRecord(u'Ayr', u'https://host//courts/ayr', contacts=[Contact(u'email', u'Listing:', [u'listing@ayr.gsi.gov.uk', u'enquiries@ayr.gsi.gov.uk'])])
+
+    assert standardise_record(record)['emails'] == [u'enquiries@ayr.gsi.gov.uk']
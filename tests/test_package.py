@@ -0,0 +1,47 @@
+"""test_package.py - the package as a whole: lazy exports, what importing it costs, and its modules' docstrings"""
+
+import os
+import ast
+import sys
+import glob
+import warnings
+import subprocess
+
+import pytest
+
+import CourtScraper
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def imported_after(code):
+    """The heavy dependencies a fresh interpreter has imported after running `code`"""
+
+    check = code + "\nimport sys\nprint(' '.join(sorted(m for m in ('requests', 'bs4', 'lxml', 'numpy', 'pyarrow') if m in sys.modules)))"
+    output = subprocess.check_output([sys.executable, '-c', check], cwd=ROOT)
+
+    return output.decode('ascii').split()
+
+def test_exports_are_imported_when_first_used():
+    from CourtScraper.model import CourtRecord
+
+    assert CourtScraper.CourtRecord is CourtRecord
+    assert CourtScraper.__all__ == sorted(CourtScraper.EXPORTS)
+
+def test_unknown_names_raise_attribute_error():
+    with pytest.raises(AttributeError):
+        CourtScraper.no_such_name
+
+def test_importing_the_package_imports_no_heavy_dependencies():
+    assert imported_after('import CourtScraper') == []
+
+def test_offline_modules_import_no_heavy_dependencies():
+    assert imported_after('from CourtScraper import cli, query, snapshot, archive, sinks, fetch, scraper') == []
+
+@pytest.mark.parametrize('path', sorted(glob.glob(os.path.join(ROOT, 'CourtScraper', '*.py')) + glob.glob(os.path.join(ROOT, 'benchmarks', '*.py'))))
+def test_modules_open_with_their_docstring(path):
+    #   textnorm_bench.py keeps the original regexes, invalid escapes and all
+    with open(path, 'rb') as f, warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        module = ast.parse(f.read())
+
+    assert ast.get_docstring(module), "{} has no docstring at the top".format(os.path.basename(path))
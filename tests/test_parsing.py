@@ -0,0 +1,60 @@
+"""test_parsing.py - parsing's backends and strainers, and the court records extracted from what they keep"""
+
+import pytest
+
+from helpers import COURT_PAGE, INDEX_PAGE
+from CourtScraper import parsing, scraper
+
+URL = u'https://host//courts/aberystwyth-justice-centre'
+
+@pytest.fixture(params=parsing.BACKENDS)
+def backend(request):
+    """Each backend in turn, where it is installed"""
+
+    previous = parsing.BACKEND
+
+    try:
+        parsing.set_backend(request.param)
+    except ValueError:
+        pytest.skip('{} is not installed'.format(request.param))
+
+    yield request.param
+    parsing.BACKEND = previous
+
+def test_unknown_backends_are_refused():
+    with pytest.raises(ValueError):
+        parsing.set_backend('html5lib')
+
+def test_auto_picks_an_installed_backend():
+    previous = parsing.BACKEND
+    parsing.set_backend('auto')
+
+    assert parsing.backend() == parsing.default_backend()
+
+    parsing.BACKEND = previous
+
+def test_court_pages_keep_only_the_court_block(backend):
+    page = parsing.parse_court_page(u'<html><body><header><h1>Site</h1></header>' + COURT_PAGE + u'<footer>Crown copyright</footer></body></html>')
+
+    assert [h1.text for h1 in page.find_all('h1')] == [u'Aberystwyth Justice Centre']
+    assert page.find('footer') is None
+
+def test_index_pages_list_their_courts(backend):
+    links = scraper.court_links(parsing.parse_index_page(INDEX_PAGE), u'https://host/')
+
+    assert links == {
+        u'Aberystwyth Justice Centre': u'https://host//courts/aberystwyth-justice-centre',
+        u'Ayr Sheriff Court': u'https://host//courts/ayr-sheriff-court',
+        }
+
+def test_court_pages_standardise_to_the_same_row_on_every_backend(backend):
+    row = scraper.standardise_record(scraper.extract_court_details(URL, COURT_PAGE))
+
+    assert row == {
+        'court_name': u'Aberystwyth Justice Centre', 'url': URL,
+        'crown_court_id': u'3253', 'county_court_id': u'102', 'dx': u'99560 Aberystwyth 2',
+        'telephones': [u'01970 621 250'], 'emails': [u'enquiries@aberystwyth.countycourt.gsi.gov.uk'],
+        'visiting_street_address': u'Aberystwyth Justice Centre\nY Lanfa\nTrefechan', 'visiting_town': u'Aberystwyth',
+        'visiting_region': u'Ceredigion', 'visiting_postcode': u'SY23 1AS',
+        'postal_street_address': u'PO Box 12\nY Lanfa, Aberystwyth\nSY23 9ZZ', 'postal_town': None, 'postal_region': None, 'postal_postcode': None,
+        }
@@ -0,0 +1,100 @@
+"""test_pipeline.py - the streaming crawl: bounded buffering between stages, ordered parallel maps and court discovery"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from CourtScraper import scraper
+
+def test_buffered_yields_everything_in_order():
+    assert list(scraper.buffered(iter(range(200)), maxsize=8)) == list(range(200))
+
+def test_buffered_reraises_errors_in_the_consumer():
+    def stage():
+        yield 1
+        raise ValueError('bad page')
+
+    items = scraper.buffered(stage())
+
+    assert next(items) == 1
+
+    with pytest.raises(ValueError):
+        next(items)
+
+def test_buffered_works_at_most_maxsize_ahead():
+    produced = []
+
+    def stage():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    items = scraper.buffered(stage(), maxsize=4)
+    next(items)
+    time.sleep(0.2)
+
+    #   the queue's 4, the one handed over, and the one waiting to go in
+    assert len(produced) <= 6
+
+    items.close()
+
+def test_buffered_lets_its_producer_go_when_the_consumer_stops():
+    before = threading.active_count()
+    items = scraper.buffered(iter(range(1000)), maxsize=2)
+    next(items)
+    items.close()
+    time.sleep(0.3)
+
+    assert threading.active_count() <= before
+
+def test_ordered_map_keeps_input_order_and_a_bounded_window():
+    submitted = []
+
+    def work(i):
+        time.sleep(0.01 * (5 - i % 5))
+        return i * 10
+
+    executor = ThreadPoolExecutor(4)
+
+    def arguments():
+        for i in range(20):
+            submitted.append(i)
+            yield (i,)
+
+    results = scraper.ordered_map(executor, work, arguments(), window=3)
+
+    assert next(results) == 0
+    assert len(submitted) == 3
+    assert list(results) == [i * 10 for i in range(1, 20)]
+
+    executor.shutdown()
+
+def test_chunked():
+    assert list(scraper.chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+def test_discover_courts_lists_letters_in_order_and_each_court_once(monkeypatch):
+    listings = {
+        'A': {u'Ayr Sheriff Court': u'https://host//courts/ayr'},
+        'B': {u'Bury Court': u'https://host//courts/bury', u'Ayr (Bury office)': u'https://host/courts/ayr'},
+        }
+    monkeypatch.setattr(scraper, 'get_courts', lambda base, buff, char: listings[chr(char)])
+
+    items = list(scraper.discover_courts(u'https://host/', u'courts/', letters=[ord('B'), ord('A')], workers=2))
+
+    assert [(item['letter'], item['court']) for item in items] == [('B', u'Ayr (Bury office)'), ('B', u'Bury Court')]
+
+def test_write_rows_writes_every_row_to_every_sink():
+    class Sink(object):
+        def __init__(self):
+            self.rows = []
+
+        def write(self, row):
+            self.rows.append(row)
+
+    sinks = [Sink(), Sink()]
+    items = [{'letter': 'A', 'row': {'court_name': u'Ayr'}}, {'letter': 'B', 'row': {'court_name': u'Bury'}}]
+
+    assert list(scraper.write_rows(items, sinks)) == items
+    assert sinks[0].rows == sinks[1].rows == [{'court_name': u'Ayr'}, {'court_name': u'Bury'}]
@@ -0,0 +1,43 @@
+"""test_processes.py - parsing and standardising saved pages across worker processes"""
+
+import io
+
+from helpers import COURT_PAGE
+from CourtScraper import scraper
+
+def save_pages(tmpdir, count):
+    paths = []
+
+    for i in range(count):
+        path = str(tmpdir.join('court-{:02d}.html'.format(i)))
+
+        with io.open(path, 'w', encoding='utf-8') as f:
+            f.write(COURT_PAGE.replace(u'Aberystwyth Justice Centre</h1>', u'Court {}</h1>'.format(i)))
+
+        paths.append(path)
+
+    return paths
+
+def test_saved_page_paths_expands_directories_in_name_order(tmpdir):
+    paths = save_pages(tmpdir, 3)
+    tmpdir.join('notes.txt').write('not a page')
+
+    assert list(scraper.saved_page_paths([str(tmpdir)])) == paths
+    assert list(scraper.saved_page_paths(paths[:1])) == paths[:1]
+
+def test_processes_give_the_rows_of_a_single_process_in_input_order(tmpdir):
+    paths = save_pages(tmpdir, 10)
+
+    expected = list(scraper.standardise_records(scraper.parse_pages(scraper.load_saved_pages(paths))))
+    items = list(scraper.parse_pages_in_processes(scraper.saved_pages(paths), processes=2, chunk_size=3))
+
+    assert [item['court'] for item in items] == [u'Court {}'.format(i) for i in range(10)]
+    assert [item['row'] for item in items] == [item['row'] for item in expected]
+
+def test_pages_already_in_memory_and_finished_items_pass_through_workers():
+    items = [{'court': None, 'url': u'memory', 'html': COURT_PAGE}, {'court': u'Done', 'url': u'done', 'row': {'court_name': u'Done'}}]
+
+    parsed = list(scraper.parse_pages_in_processes(items, processes=1))
+
+    assert parsed[0]['row']['court_name'] == u'Aberystwyth Justice Centre'
+    assert parsed[1]['row'] == {'court_name': u'Done'}
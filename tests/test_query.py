@@ -0,0 +1,95 @@
+"""test_query.py - the hash indexes over court rows, in memory and memory-mapped, and reading rows back from exports"""
+
+import pytest
+
+from CourtScraper import query
+from CourtScraper.query import CourtQuery, MappedCourtQuery, load_rows
+from CourtScraper.sinks import CsvSink, JsonLinesSink, QueryIndexSink
+
+ROWS = [
+    {'court_name': u'Aberystwyth Justice Centre', 'url': u'https://host//courts/aberystwyth', 'crown_court_id': u'3253', 'county_court_id': u'102',
+     'dx': u'99560 Aberystwyth 2', 'emails': [u'enquiries@aberystwyth.countycourt.gsi.gov.uk'], 'telephones': [u'01970 621 250'],
+     'visiting_town': u'Aberystwyth', 'visiting_region': u'Ceredigion', 'visiting_postcode': u'SY23 1AS'},
+    {'court_name': u'Ynys M\xf4n Court', 'url': u'https://host//courts/ynys-mon', 'crown_court_id': None, 'county_court_id': u'103',
+     'emails': [], 'telephones': [], 'visiting_town': u'Llangefni', 'visiting_region': u'Ynys M\xf4n',
+     'postal_street_address': u'PO Box 1\nAberystwyth\nsy23 9zz'},
+    ]
+
+def many_rows(count):
+    return [{'court_name': u'Court {}'.format(i), 'crown_court_id': str(i), 'county_court_id': str(i % 7), 'emails': [u'c{}@court{}.gov.uk'.format(i, i % 5)],
+             'visiting_postcode': u'AB{} 1CD'.format(i % 11), 'visiting_town': u'Town {}'.format(i % 3)} for i in range(300)]
+
+def names(rows):
+    return [row['court_name'] for row in rows]
+
+def test_lookups_ignore_case_and_spacing():
+    courts = CourtQuery(ROWS)
+
+    assert names(courts.find('crown_court_id', u'3253')) == [u'Aberystwyth Justice Centre']
+    assert names(courts.find('dx', u' 99560   aberystwyth 2')) == [u'Aberystwyth Justice Centre']
+    assert names(courts.find('region', u'YNYS M\xd4N')) == [u'Ynys M\xf4n Court']
+    assert names(courts.find('email_domain', u'aberystwyth.countycourt.gsi.gov.uk')) == [u'Aberystwyth Justice Centre']
+    assert courts.find('town', u'Cardiff') == []
+
+def test_postcode_areas_come_from_postcode_fields_and_flat_addresses():
+    assert names(CourtQuery(ROWS).find('outward_code', u'sy23')) == [u'Aberystwyth Justice Centre', u'Ynys M\xf4n Court']
+
+def test_the_mapped_index_answers_like_the_one_in_memory(tmpdir):
+    path = str(tmpdir.join('courts.idx'))
+    courts = CourtQuery(many_rows(300))
+    courts.save(path)
+
+    with MappedCourtQuery(path) as mapped:
+        assert len(mapped) == 300
+
+        for index in query.INDEXES:
+            for key in courts.keys(index):
+                assert mapped.find(index, key) == courts.find(index, key)
+
+        assert mapped.find('crown_court_id', u'9999') == []
+        assert mapped.find('town', u'') == []
+
+def test_other_files_are_not_opened_as_indexes(tmpdir):
+    path = tmpdir.join('courts.idx')
+    path.write_binary(b'NOPE' + b'\0' * 64)
+
+    with pytest.raises(ValueError):
+        MappedCourtQuery(str(path))
+
+def test_the_index_sink_writes_a_mapped_index(tmpdir):
+    path = str(tmpdir.join('courts.idx'))
+
+    with QueryIndexSink(path) as sink:
+        for row in ROWS:
+            sink.write(row)
+
+    with MappedCourtQuery(path) as mapped:
+        assert names(mapped.find('county_court_id', u'103')) == [u'Ynys M\xf4n Court']
+
+def test_an_aborted_index_sink_builds_nothing(tmpdir, monkeypatch):
+    def build(rows):
+        raise AssertionError('built the index of an aborted crawl')
+
+    monkeypatch.setattr(query, 'build', build)
+
+    with pytest.raises(RuntimeError):
+        with QueryIndexSink(str(tmpdir.join('courts.idx'))) as sink:
+            sink.write(ROWS[0])
+            raise RuntimeError('crawl failed')
+
+    assert tmpdir.listdir() == []
+
+@pytest.mark.parametrize('sink, name', [(JsonLinesSink, 'rows.jsonl'), (CsvSink, 'rows.csv')])
+def test_rows_load_back_from_exports(tmpdir, sink, name):
+    path = str(tmpdir.join(name))
+
+    with sink(path) as out:
+        for row in ROWS:
+            out.write(row)
+
+    rows = list(load_rows(path))
+
+    assert names(rows) == names(ROWS)
+    assert rows[0]['emails'] == ROWS[0]['emails']
+    assert rows[1]['telephones'] == []
+    assert rows[1]['crown_court_id'] is None
@@ -0,0 +1,152 @@
+"""test_sinks.py - the export sinks: batching, all-or-nothing output, appending, and what each format writes"""
+
+import io
+import csv
+import sys
+import json
+
+import pytest
+
+from CourtScraper.sinks import Sink, CsvSink, JsonLinesSink, CSV_FIELDS, open_sink, sink_for
+
+ROWS = [
+    {'court_name': u'Ynys M\xf4n Court', 'url': u'https://host//courts/ynys-mon', 'telephones': [u'01248 123 456', u'01248 654 321'], 'emails': [],
+     'visiting_town': u'Llangefni', 'visiting_region': u'Anglesey'},
+    {'court_name': u'Ayr Sheriff Court', 'url': u'https://host//courts/ayr', 'telephones': [], 'emails': [u'enquiries@ayr.gsi.gov.uk'],
+     'visiting_town': u'Ayr', 'visiting_region': None},
+    ]
+
+def read_csv(path):
+    if sys.version_info[0] > 2:
+        with io.open(path, newline='', encoding='utf-8') as f:
+            return list(csv.reader(f))
+
+    with open(path, 'rb') as f:
+        return [[cell.decode('utf-8') for cell in line] for line in csv.reader(f)]
+
+def write(sink, rows=ROWS):
+    with sink:
+        for row in rows:
+            sink.write(row)
+
+class BatchSink(Sink):
+    def open(self, append):
+        self.batches = []
+
+    def write_batch(self, rows):
+        self.batches.append(len(rows))
+
+def test_rows_are_handed_over_in_batches(tmpdir):
+    sink = BatchSink(str(tmpdir.join('out.batches')), batch_size=2)
+    write(sink, ROWS * 3)
+
+    assert sink.batches == [2, 2, 2]
+    assert sink.count == 6
+
+def test_csv_keeps_the_original_layout(tmpdir):
+    path = str(tmpdir.join('out.csv'))
+    write(CsvSink(path))
+
+    lines = read_csv(path)
+
+    assert lines[0] == CSV_FIELDS
+    assert lines[1][:5] == [u'Ynys M\xf4n Court', u'', u'', u'01248 123 456,01248 654 321', u'']
+    assert lines[2][4] == u'enquiries@ayr.gsi.gov.uk'
+
+def test_output_only_replaces_the_file_when_committed(tmpdir):
+    path = tmpdir.join('out.jsonl')
+    path.write('previous export\n')
+
+    with pytest.raises(RuntimeError):
+        with JsonLinesSink(str(path)) as sink:
+            sink.write(ROWS[0])
+            raise RuntimeError('crawl failed')
+
+    assert path.read() == 'previous export\n'
+    assert tmpdir.listdir() == [path]
+
+class FailingSink(BatchSink):
+    """A BatchSink whose finish() fails when committing, recording how it was called"""
+
+    def finish(self, commit):
+        self.committed = commit
+
+        if commit:
+            raise IOError('disk full')
+
+def test_failing_to_finish_leaves_no_temp_file(tmpdir):
+    sink = FailingSink(str(tmpdir.join('out.batches')))
+    sink.write(ROWS[0])
+
+    with pytest.raises(IOError):
+        sink.close()
+
+    assert tmpdir.listdir() == []
+
+def test_aborted_sinks_are_finished_without_committing(tmpdir):
+    with pytest.raises(RuntimeError):
+        with FailingSink(str(tmpdir.join('out.batches'))) as sink:
+            sink.write(ROWS[0])
+            raise RuntimeError('crawl failed')
+
+    assert sink.committed is False
+    assert sink.batches == []
+    assert tmpdir.listdir() == []
+
+def test_csv_appends_under_the_existing_header(tmpdir):
+    path = str(tmpdir.join('out.csv'))
+    write(CsvSink(path), ROWS[:1])
+    write(CsvSink(path, append=True), ROWS[1:])
+
+    lines = read_csv(path)
+
+    assert [line[0] for line in lines] == ['court name', u'Ynys M\xf4n Court', u'Ayr Sheriff Court']
+
+def test_csv_appending_to_a_new_file_writes_the_header(tmpdir):
+    path = str(tmpdir.join('out.csv'))
+    write(CsvSink(path, append=True), ROWS[:1])
+
+    assert read_csv(path)[0] == CSV_FIELDS
+
+def test_json_lines_keep_lists_and_unicode(tmpdir):
+    path = tmpdir.join('out.jsonl')
+    write(JsonLinesSink(str(path)))
+
+    rows = [json.loads(line) for line in path.read_binary().decode('utf-8').splitlines()]
+
+    assert rows[0]['court_name'] == u'Ynys M\xf4n Court'
+    assert rows[0]['telephones'] == [u'01248 123 456', u'01248 654 321']
+    assert rows[1]['postal_postcode'] is None
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_columnar_sinks_read_back_as_typed_columns(tmpdir, extension):
+    pa = pytest.importorskip('pyarrow')
+    path = str(tmpdir.join('out' + extension))
+    write(open_sink(path, batch_size=1), ROWS * 2)
+
+    if extension == '.parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+        assert pq.ParquetFile(path).num_row_groups == 4
+    else:
+        table = pa.ipc.open_file(path).read_all()
+
+    assert table.column('telephones').to_pylist()[0] == [u'01248 123 456', u'01248 654 321']
+    assert pa.types.is_dictionary(table.schema.field('visiting_town').type)
+    assert table.column('visiting_town').to_pylist() == [u'Llangefni', u'Ayr'] * 2
+
+def test_sinks_are_picked_by_extension_or_format():
+    assert sink_for('courts.CSV') is CsvSink
+    assert sink_for('courts.out', 'jsonl') is JsonLinesSink
+
+    with pytest.raises(ValueError):
+        sink_for('courts.xlsx')
+
+def test_only_csv_can_append(tmpdir):
+    with pytest.raises(ValueError):
+        JsonLinesSink(str(tmpdir.join('out.jsonl')), append=True)
+
+    sink = open_sink(str(tmpdir.join('out.jsonl')), append=True)
+    sink.close(commit=False)
+
+    assert tmpdir.listdir() == []
@@ -0,0 +1,136 @@
+"""test_snapshot.py - taking snapshots, reading them back, and diffing two of them"""
+
+import io
+import json
+
+import pytest
+
+from CourtScraper import snapshot
+from CourtScraper.sinks import SnapshotSink
+
+AYR = {'court_name': u'Ayr Sheriff Court', 'url': u'https://host//courts/ayr', 'telephones': [u'01292 111', u'01292 222'],
+       'emails': [], 'visiting_town': u'Ayr', 'dx': u'DX 1'}
+MOLD = {'court_name': u'Mold Justice Centre', 'url': u'https://host//courts/mold', 'telephones': [], 'emails': [u'mold@example.org'],
+        'visiting_town': u'Mold'}
+
+def changed(row, **fields):
+    row = dict(row)
+    row.update(fields)
+    return row
+
+def write_raw(path, header, entries):
+    with io.open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(header) + u"\n")
+
+        for url, digest, row in entries:
+            f.write(json.dumps({'url': url, 'fingerprint': digest, 'row': row}) + u"\n")
+
+
+
+################
+### SNAPSHOT ###
+################
+
+def test_take_sorts_by_url_and_keeps_the_last_row_per_url():
+    entries = snapshot.take([MOLD, AYR, changed(AYR, dx=u'DX 2')])
+
+    assert [url for url, digest, row in entries] == [u'https://host/courts/ayr', u'https://host/courts/mold']
+    assert entries[0][2]['dx'] == u'DX 2'
+
+def test_take_keys_courts_by_canonical_url_and_keeps_the_crawled_one_in_the_row():
+    index_crawl = snapshot.take([AYR])
+    sitemap_crawl = snapshot.take([changed(AYR, url=u'https://host/courts/ayr')])
+
+    assert index_crawl[0][0] == sitemap_crawl[0][0] == u'https://host/courts/ayr'
+    assert index_crawl[0][2]['url'] == u'https://host//courts/ayr'
+    assert list(snapshot.diff(index_crawl, sitemap_crawl)) == []
+
+def test_take_keys_csv_rows_by_court_name():
+    row = dict(AYR)
+    del row['url']
+
+    assert snapshot.take([row])[0][0] == u'Ayr Sheriff Court'
+
+def test_fingerprint_ignores_list_order_and_blanks():
+    assert snapshot.fingerprint(AYR) == snapshot.fingerprint(changed(AYR, telephones=[u'01292 222', u'01292 111'], visiting_region=u''))
+    assert snapshot.fingerprint(AYR) != snapshot.fingerprint(changed(AYR, dx=u'DX 2'))
+
+def test_save_and_read_round_trip(tmpdir):
+    path = str(tmpdir.join('courts.snap'))
+    snapshot.save(path, [MOLD, AYR])
+
+    assert list(snapshot.read(path)) == snapshot.take([AYR, MOLD])
+
+def test_snapshot_sink_writes_a_snapshot(tmpdir):
+    path = str(tmpdir.join('courts.snap'))
+
+    with SnapshotSink(path) as sink:
+        sink.write(MOLD)
+        sink.write(AYR)
+
+    assert [url for url, digest, row in snapshot.read(path)] == [u'https://host/courts/ayr', u'https://host/courts/mold']
+
+def test_an_aborted_snapshot_sink_writes_nothing(tmpdir, monkeypatch):
+    def take(rows):
+        raise AssertionError('took a snapshot of an aborted crawl')
+
+    monkeypatch.setattr(snapshot, 'take', take)
+
+    with pytest.raises(RuntimeError):
+        with SnapshotSink(str(tmpdir.join('courts.snap'))) as sink:
+            sink.write(AYR)
+            raise RuntimeError('crawl failed')
+
+    assert tmpdir.listdir() == []
+
+def test_read_makes_format_1_urls_canonical(tmpdir):
+    path = str(tmpdir.join('old.snap'))
+    write_raw(path, {'format': 1}, [(AYR['url'], snapshot.fingerprint(AYR), AYR)])
+
+    assert list(snapshot.diff(snapshot.read(path), snapshot.take([AYR]))) == []
+
+def test_format_1_urls_that_are_one_canonical_url_are_read_once(tmpdir):
+    path = str(tmpdir.join('old.snap'))
+    moved = changed(AYR, url=u'https://host/courts/ayr', dx=u'DX 2')
+    write_raw(path, {'format': 1}, [(AYR['url'], snapshot.fingerprint(AYR), AYR), (u'https://host//courts/mold', snapshot.fingerprint(MOLD), MOLD),
+                                    (moved['url'], snapshot.fingerprint(moved), moved)])
+
+    assert [(url, row.get('dx')) for url, digest, row in snapshot.read(path)] == [
+        (u'https://host/courts/ayr', u'DX 2'), (u'https://host/courts/mold', None)]
+
+def test_read_rejects_other_files(tmpdir):
+    path = str(tmpdir.join('rows.jsonl'))
+    write_raw(path, {'court_name': u'Ayr'}, [])
+
+    with pytest.raises(ValueError):
+        list(snapshot.read(path))
+
+def test_read_rejects_unsorted_snapshots(tmpdir):
+    path = str(tmpdir.join('edited.snap'))
+    write_raw(path, {'format': snapshot.FORMAT}, [(u'https://host/courts/mold', u'', MOLD), (u'https://host/courts/ayr', u'', AYR)])
+
+    with pytest.raises(ValueError):
+        list(snapshot.read(path))
+
+
+
+############
+### DIFF ###
+############
+
+def test_diff_reports_added_removed_and_modified_courts_in_url_order():
+    newport = changed(MOLD, court_name=u'Newport Crown Court', url=u'https://host//courts/newport')
+    old = snapshot.take([AYR, MOLD])
+    new = snapshot.take([changed(AYR, telephones=[u'01292 111', u'01292 333'], dx=u'DX 2'), newport])
+
+    changes = list(snapshot.diff(old, new))
+
+    assert [(change['change'], change['url']) for change in changes] == [
+        ('modified', u'https://host/courts/ayr'), ('removed', u'https://host/courts/mold'), ('added', u'https://host/courts/newport')]
+    assert changes[0]['fields'] == {
+        'codes': {'dx': {'before': u'DX 1', 'after': u'DX 2'}},
+        'telephone': {'telephones': {'added': [u'01292 333'], 'removed': [u'01292 222']}},
+        }
+
+def test_diff_skips_unchanged_courts():
+    assert list(snapshot.diff(snapshot.take([AYR, MOLD]), snapshot.take([MOLD, AYR]))) == []
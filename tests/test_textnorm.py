@@ -0,0 +1,49 @@
+"""test_textnorm.py - the line cleaners and postcode patterns in textnorm"""
+
+from CourtScraper import textnorm
+from CourtScraper.textnorm import (COLON_LINE, process_flat_address, process_single_and_multi_line_address, remove_matched_line,
+                                   enquiries_line, is_solicitor, find_postcode, outward_code)
+
+FLAT_ADDRESS = u"""
+        1st Floor
+
+        Piccadilly Exchange
+
+      Manchester City
+
+
+        Greater Manchester
+
+      M1 4AH
+
+  Maps and Directions
+"""
+
+def test_flat_addresses_split_into_stripped_lines_without_the_maps_link():
+    assert process_flat_address(FLAT_ADDRESS) == [u'1st Floor', u'Piccadilly Exchange', u'Manchester City', u'Greater Manchester', u'M1 4AH']
+
+def test_span_addresses_are_lists_when_multi_line_and_strings_otherwise():
+    assert process_single_and_multi_line_address(u'\n   Aberystwyth Justice Centre \n   Y Lanfa Road\n') == [u'Aberystwyth Justice Centre', u'Y Lanfa Road']
+    assert process_single_and_multi_line_address(u'  Aberystwyth ') == u'Aberystwyth'
+
+def test_remove_matched_line_takes_patterns_or_strings():
+    lines = [u'Civil and family enquiries:', u'PO Box 12']
+
+    assert remove_matched_line(COLON_LINE, lines) == [u'PO Box 12']
+    assert remove_matched_line('.*Box.*', lines) == [u'Civil and family enquiries:']
+    assert '.*Box.*' in textnorm.COMPILED
+
+def test_enquiries_lines_and_solicitors():
+    assert enquiries_line(u'enquiries@ayr.gsi.gov.uk') == u'enquiries@ayr.gsi.gov.uk'
+    assert enquiries_line(u'listing@ayr.gsi.gov.uk') is None
+    assert is_solicitor(u'solicitors@ayr.gsi.gov.uk')
+
+def test_find_postcode_normalises_the_last_one():
+    assert find_postcode(u'1 High Street\nm1 4ah') == u'M1 4AH'
+    assert find_postcode(u'SW1A 2AA then SY231AS') == u'SY23 1AS'
+    assert find_postcode(u'no postcode here') is None
+    assert find_postcode(None) is None
+
+def test_outward_code():
+    assert outward_code(u'SY23 1AS') == u'SY23'
+    assert outward_code(u'') is None